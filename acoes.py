@@ -0,0 +1,180 @@
+import struct
+from typing import BinaryIO, Iterator, NamedTuple, Optional, Sequence, Tuple
+from carta import Carta
+
+# Tipos de ação de uma partida
+COMPRAR_MONTE = 1
+COMPRAR_DESCARTE = 2
+FORMAR = 3  # Forma um agrupamento novo com as cartas
+ESTENDER = 4  # Adiciona as cartas ao agrupamento 'agrupamento' do jogador
+DESCARTAR = 5  # Descarta a carta e passa a vez
+PASSAR = 6  # Passa a vez sem descartar
+DESFAZER = 7  # Desfaz a última ação
+NOMES = {COMPRAR_MONTE: "comprar_monte", COMPRAR_DESCARTE: "comprar_descarte", FORMAR: "formar",
+         ESTENDER: "estender", DESCARTAR: "descartar", PASSAR: "passar", DESFAZER: "desfazer"}
+
+# Registros do log que não são ações
+NOVO_JOGO = 100  # Início de uma partida: versão, semente, número de jogadores, baralhos, regras e equipes
+CHECKPOINT = 101  # Estado completo da partida (Jogo.para_bytes) no início de um turno
+
+VERSAO = 3
+# Versões anteriores ainda lidas: 1 (um baralho, cada jogador sozinho) e 2 (com baralhos e equipes); nas duas
+# não havia mortos e a compra do descarte levava só a carta do topo
+SEM_AGRUPAMENTO = 255
+
+# Cada registro do log é: tipo (B), tamanho do conteúdo (H) e o conteúdo. O
+# tamanho permite pular registros sem decodificá-los.
+_REGISTRO = struct.Struct('<BH')
+_ACAO = struct.Struct('<BB')  # jogador, agrupamento
+_NOVO_JOGO = struct.Struct('<BQB')  # versão, semente, número de jogadores
+_BARALHOS = struct.Struct('<B')  # Depois de _NOVO_JOGO (desde a versão 2)
+_REGRAS = struct.Struct('<BB')  # Depois de _BARALHOS (versão 3): mortos e descarte inteiro
+# Por fim, a equipe de cada jogador (B, desde a versão 2)
+_TURNO = struct.Struct('<I')
+
+
+class Acao(NamedTuple):
+    """Uma ação de um jogador, identificada pelos códigos das cartas envolvidas"""
+    tipo: int
+    jogador: int
+    cartas: Tuple[int, ...] = ()
+    agrupamento: int = SEM_AGRUPAMENTO
+
+    def __str__(self) -> str:
+        cartas = " ".join(str(Carta(c)) for c in self.cartas)
+        alvo = f" #{self.agrupamento}" if self.agrupamento != SEM_AGRUPAMENTO else ""
+        return f"J{self.jogador + 1} {NOMES.get(self.tipo, self.tipo)}{alvo} {cartas}".rstrip()
+
+
+class Delta(NamedTuple):
+    """O que uma ação mudou na partida, o suficiente para desfazê-la exatamente"""
+    acao: Acao
+    ordens: Tuple[int, ...] = ()  # Chaves de ordem na mão (Mao.ordem) das cartas que saíram dela
+    comprada: Optional[Carta] = None  # Carta que uma compra do monte pôs na mão
+    pilha: Tuple[Carta, ...] = ()  # Cartas que uma compra do descarte pôs na mão, de baixo para cima
+    morto: bool = False  # A compra do monte abriu um morto
+    comprou_carta: bool = False  # Flag de compra do jogador antes da ação
+    pontos_agrupamentos: int = 0  # Pontos dos agrupamentos do jogador antes da ação
+    resumo: Optional[tuple] = None  # Agrupamento.salvar_resumo() do agrupamento estendido
+    mensagem: str = ""  # Mensagem da tela antes da ação
+
+
+def codificar_acao(acao: Acao) -> bytes:
+    conteudo = _ACAO.pack(acao.jogador, acao.agrupamento) + struct.pack(f'<{len(acao.cartas)}H', *acao.cartas)
+    return _REGISTRO.pack(acao.tipo, len(conteudo)) + conteudo
+
+
+def decodificar_acao(tipo: int, conteudo: bytes) -> Acao:
+    jogador, agrupamento = _ACAO.unpack_from(conteudo)
+    cartas = struct.unpack_from(f'<{(len(conteudo) - _ACAO.size) // 2}H', conteudo, _ACAO.size)
+    return Acao(tipo, jogador, cartas, agrupamento)
+
+
+class RegistroAcoes:
+    """Log binário e só de acréscimo das ações das partidas
+
+    Um mesmo arquivo pode conter várias partidas seguidas: cada uma começa
+    com um registro NOVO_JOGO (com a semente, que reproduz o embaralhamento)
+    e segue com uma ação por registro. A cada 'intervalo_checkpoint' turnos o
+    estado completo da partida também é gravado, para que a reprodução possa
+    pular direto para um turno sem refazer a partida desde o início.
+    """
+    def __init__(self, arquivo: BinaryIO, intervalo_checkpoint: int = 20):
+        self.arquivo = arquivo
+        self.intervalo_checkpoint = intervalo_checkpoint
+
+    @classmethod
+    def abrir(cls, caminho: str, intervalo_checkpoint: int = 20) -> 'RegistroAcoes':
+        """Abre (ou cria) um arquivo de log para acrescentar partidas"""
+        return cls(open(caminho, "ab"), intervalo_checkpoint)
+
+    def _gravar(self, tipo: int, conteudo: bytes) -> None:
+        self.arquivo.write(_REGISTRO.pack(tipo, len(conteudo)))
+        self.arquivo.write(conteudo)
+
+    def novo_jogo(self, semente: int, num_jogadores: int, baralhos: int = 1,
+                  equipes: Optional[Sequence[int]] = None, mortos: int = 2, descarte_inteiro: bool = True) -> None:
+        equipes = range(num_jogadores) if equipes is None else equipes
+        self._gravar(NOVO_JOGO, _NOVO_JOGO.pack(VERSAO, semente, num_jogadores) + _BARALHOS.pack(baralhos)
+                     + _REGRAS.pack(mortos, descarte_inteiro) + bytes(equipes))
+
+    def registrar(self, acao: Acao) -> None:
+        self.arquivo.write(codificar_acao(acao))
+
+    def inicio_de_turno(self, jogo) -> None:
+        """Grava um checkpoint se o turno que começa é múltiplo do intervalo"""
+        if self.intervalo_checkpoint and jogo.turno % self.intervalo_checkpoint == 0:
+            self._gravar(CHECKPOINT, _TURNO.pack(jogo.turno) + jogo.para_bytes())
+
+    def fechar(self) -> None:
+        self.arquivo.close()
+
+
+def ler_registros(arquivo: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    """Percorre os registros (tipo, conteúdo) de um log sem carregá-lo inteiro"""
+    while True:
+        cabecalho = arquivo.read(_REGISTRO.size)
+        if not cabecalho:
+            return
+        if len(cabecalho) < _REGISTRO.size:
+            raise ValueError("Log truncado no meio de um registro")
+        tipo, tamanho = _REGISTRO.unpack(cabecalho)
+        conteudo = arquivo.read(tamanho)
+        if len(conteudo) < tamanho:
+            raise ValueError("Log truncado no meio de um registro")
+        yield tipo, conteudo
+
+
+class NovoJogo(NamedTuple):
+    """Configuração de uma partida, lida de um registro NOVO_JOGO"""
+    semente: int
+    num_jogadores: int
+    baralhos: int
+    equipes: Tuple[int, ...]  # Equipe de cada jogador
+    mortos: int
+    descarte_inteiro: bool  # Comprar do descarte leva a pilha inteira
+
+
+def decodificar_novo_jogo(conteudo: bytes) -> NovoJogo:
+    """Retorna a configuração da partida de um registro NOVO_JOGO"""
+    versao, semente, num_jogadores = _NOVO_JOGO.unpack_from(conteudo)
+    if versao == 1:
+        return NovoJogo(semente, num_jogadores, 1, tuple(range(num_jogadores)), 0, False)
+    if versao not in (2, VERSAO):
+        raise ValueError(f"Versão de log não suportada: {versao}")
+    pos = _NOVO_JOGO.size
+    baralhos = _BARALHOS.unpack_from(conteudo, pos)[0]
+    pos += _BARALHOS.size
+    mortos, descarte_inteiro = 0, False
+    if versao >= 3:
+        mortos, descarte_inteiro = _REGRAS.unpack_from(conteudo, pos)
+        pos += _REGRAS.size
+    return NovoJogo(semente, num_jogadores, baralhos, tuple(conteudo[pos:]), mortos, bool(descarte_inteiro))
+
+
+def decodificar_checkpoint(conteudo: bytes) -> Tuple[int, bytes]:
+    """Retorna (turno, estado em bytes) de um registro CHECKPOINT"""
+    return _TURNO.unpack_from(conteudo)[0], conteudo[_TURNO.size:]
+
+
+def aplicar_acao(jogo, acao: Acao) -> bool:
+    """Executa uma ação registrada numa partida; retorna False se ela não foi aceita"""
+    if acao.jogador != jogo.jogador_atual:
+        return False
+    cartas = [Carta(c) for c in acao.cartas]
+    if acao.tipo == COMPRAR_MONTE:
+        return jogo.comprar_do_monte()
+    if acao.tipo == COMPRAR_DESCARTE:
+        return jogo.comprar_do_descarte()
+    if acao.tipo == FORMAR:
+        return jogo.formar_agrupamento(cartas)
+    if acao.tipo == ESTENDER:
+        return jogo.estender_agrupamento(acao.agrupamento, cartas)
+    if acao.tipo == DESCARTAR:
+        return len(cartas) == 1 and jogo.descartar_carta(cartas[0])
+    if acao.tipo == PASSAR:
+        jogo.passar_vez()
+        return True
+    if acao.tipo == DESFAZER:
+        return jogo.desfazer() is not None
+    raise ValueError(f"Tipo de ação desconhecido: {acao.tipo}")
@@ -0,0 +1,242 @@
+from typing import List, Optional
+from carta import Carta, NUM_VALORES
+from constants import VERIFICAR_CACHE
+
+# Tipos possíveis de um agrupamento (um mesmo agrupamento pode ser os dois,
+# por exemplo uma carta normal acompanhada apenas de curingas)
+TRINCA = 1
+SEQUENCIA = 2
+
+class Agrupamento:
+    """Classe que representa um agrupamento de cartas (trinca ou sequência)
+
+    Além da lista de cartas, o agrupamento mantém um resumo atualizado a cada
+    carta incluída (máscaras de valores por naipe, contagem de curingas,
+    menor/maior valor, soma dos pontos e o tipo), de modo que validar o
+    agrupamento, calcular seus pontos ou testar se uma carta pode entrar nele
+    não exige percorrer as cartas.
+
+    Nas sequências cada carta ocupa uma posição (slot) indexada pelo valor, e
+    os curingas e '2's ocupam posições explícitas: preenchem primeiro os
+    buracos entre as cartas normais e depois estendem a sequência para cima
+    (ou para baixo, se já chegou ao K).
+    """
+    def __init__(self, cartas: List[Carta] = None):
+        self._cartas: List[Carta] = list(cartas) if cartas else []  # Ordem de inclusão
+        self.selecionado = False
+
+        # Resumo incremental das cartas
+        self.mascaras: List[int] = [0, 0, 0, 0]  # Bits dos valores normais presentes em cada naipe
+        self.uniao: int = 0  # Bits dos valores normais presentes em qualquer naipe
+        self.naipes: int = 0  # Bits dos naipes com cartas normais
+        self.naturais: int = 0  # Cartas normais (nem curinga nem '2')
+        self.curingas: int = 0  # Curingas e '2's
+        self.dois: int = 0  # '2's (também contados em curingas)
+        self.min_valor: int = -1
+        self.max_valor: int = -1
+        self.repetida: bool = False  # Algum valor normal repetido no mesmo naipe
+        self.codigos: int = 0  # Bits dos códigos das cartas presentes
+        self.soma: int = 0  # Soma dos pontos das cartas
+        self.tipo: int = 0
+        self.versao: int = 0  # Muda a cada carta incluída ou resumo restaurado
+
+        # Posições da sequência, indexadas pelo valor (só válidas se eh_sequencia())
+        self.slots: List[Optional[Carta]] = [None] * NUM_VALORES
+        self.inicio: int = -1
+        self.fim: int = -1
+
+        for carta in self._cartas:
+            self._incluir(carta)
+        self._classificar()
+        self.ordenar_sequencia()
+
+    def __str__(self) -> str:
+        return f"Agrupamento: {self.cartas}"
+
+    def __len__(self) -> int:
+        return len(self._cartas)
+
+    @property
+    def cartas(self) -> List[Carta]:
+        """Cartas na ordem de exibição (pelas posições, se for sequência)"""
+        if self.tipo & SEQUENCIA:
+            return self.slots[self.inicio:self.fim + 1]
+        return self._cartas
+
+    def copiar(self) -> 'Agrupamento':
+        """Retorna uma cópia independente do agrupamento (cartas, resumo e posições)"""
+        copia = Agrupamento.__new__(Agrupamento)
+        copia.__dict__.update(self.__dict__)
+        copia._cartas = self._cartas.copy()
+        copia.mascaras = self.mascaras.copy()
+        copia.slots = self.slots.copy()
+        copia.selecionado = False
+        return copia
+
+    def salvar_resumo(self) -> tuple:
+        """Guarda o resumo e as posições atuais, para desfazer inclusões com restaurar_resumo"""
+        # As posições só mudam enquanto o agrupamento é sequência
+        slots = tuple(self.slots) if self.tipo & SEQUENCIA else None
+        return (len(self._cartas), tuple(self.mascaras), self.uniao, self.naipes, self.naturais, self.curingas,
+                self.dois, self.min_valor, self.max_valor, self.repetida, self.codigos, self.soma, self.tipo,
+                slots, self.inicio, self.fim)
+
+    def restaurar_resumo(self, resumo: tuple) -> None:
+        """Volta ao estado guardado por salvar_resumo, descartando as cartas incluídas depois"""
+        (quantidade, mascaras, self.uniao, self.naipes, self.naturais, self.curingas, self.dois, self.min_valor,
+         self.max_valor, self.repetida, self.codigos, self.soma, self.tipo, slots, self.inicio, self.fim) = resumo
+        del self._cartas[quantidade:]
+        self.versao += 1
+        self.mascaras = list(mascaras)
+        if slots is not None:
+            self.slots = list(slots)
+
+    def _incluir(self, carta: Carta) -> None:
+        """Atualiza o resumo com uma nova carta"""
+        self.codigos |= 1 << carta.codigo
+        self.soma += carta.pontos
+        if carta.especial:
+            self.curingas += 1
+            if not carta.curinga:
+                self.dois += 1
+            return
+
+        bit = 1 << carta.valor_idx
+        if self.mascaras[carta.naipe_idx] & bit:
+            self.repetida = True
+        self.mascaras[carta.naipe_idx] |= bit
+        self.uniao |= bit
+        self.naipes |= 1 << carta.naipe_idx
+        if self.naturais == 0:
+            self.min_valor = self.max_valor = carta.valor_idx
+        else:
+            self.min_valor = min(self.min_valor, carta.valor_idx)
+            self.max_valor = max(self.max_valor, carta.valor_idx)
+        self.naturais += 1
+
+    def _classificar(self) -> None:
+        """Recalcula o tipo do agrupamento a partir do resumo"""
+        self.tipo = 0
+        if self.naturais == 0:
+            return
+
+        # Trinca: todas as cartas normais têm o mesmo valor (um único bit na união)
+        if self.uniao & (self.uniao - 1) == 0:
+            self.tipo |= TRINCA
+
+        # Sequência: um único naipe, sem repetição, com curingas suficientes
+        # para os buracos entre as cartas normais e cabendo entre o Ás e o K
+        if self.naipes & (self.naipes - 1) == 0 and not self.repetida:
+            buracos = self.max_valor - self.min_valor + 1 - self.naturais
+            if buracos <= self.curingas and len(self._cartas) <= NUM_VALORES:
+                self.tipo |= SEQUENCIA
+
+    def adicionar_carta(self, carta: Carta) -> bool:
+        """Tenta adicionar uma carta ao agrupamento, retorna True se bem-sucedido"""
+        if self.codigos >> carta.codigo & 1:
+            return False
+
+        # Verifica se a carta pode ser adicionada
+        if not (self.eh_trinca() and carta.pode_adicionar_trinca(self)) and \
+                not (self.eh_sequencia() and carta.pode_adicionar_sequencia(self)):
+            return False
+
+        self._cartas.append(carta)
+        self._incluir(carta)
+        self._classificar()
+        self.versao += 1
+        if self.eh_sequencia():
+            # Encaixa a carta nas posições da sequência
+            self._encaixar(carta)
+        return True
+
+    def _estender(self, carta: Carta) -> None:
+        """Coloca a carta numa das pontas da sequência (acima, se possível)"""
+        if self.fim < NUM_VALORES - 1:
+            self.fim += 1
+            self.slots[self.fim] = carta
+        else:
+            self.inicio -= 1
+            self.slots[self.inicio] = carta
+
+    def _encaixar(self, carta: Carta) -> None:
+        """Coloca uma nova carta nas posições de uma sequência já organizada"""
+        if carta.especial:
+            self._estender(carta)
+            return
+
+        valor = carta.valor_idx
+        if valor == self.inicio - 1:
+            self.inicio = valor
+        elif valor == self.fim + 1:
+            self.fim = valor
+        else:
+            # A carta toma o lugar de um curinga, que vai para uma das pontas
+            self._estender(self.slots[valor])
+        self.slots[valor] = carta
+
+    def ordenar_sequencia(self) -> None:
+        """Organiza as posições da sequência a partir das cartas"""
+        if not self.eh_sequencia():
+            return
+
+        self.slots = [None] * NUM_VALORES
+        self.inicio = self.min_valor
+        self.fim = self.max_valor
+
+        # Cartas normais ficam na posição do seu valor
+        especiais = []
+        for carta in self._cartas:
+            if carta.especial:
+                especiais.append(carta)
+            else:
+                self.slots[carta.valor_idx] = carta
+
+        # Curingas preenchem os buracos e depois estendem a sequência
+        restantes = iter(especiais)
+        for valor in range(self.inicio, self.fim + 1):
+            if self.slots[valor] is None:
+                self.slots[valor] = next(restantes)
+        for carta in restantes:
+            self._estender(carta)
+
+    def validar(self) -> bool:
+        """Valida se o agrupamento é válido (trinca ou sequência)"""
+        return len(self._cartas) >= 3 and self.tipo != 0
+
+    def eh_trinca(self) -> bool:
+        """Verifica se o agrupamento é uma trinca"""
+        return bool(self.tipo & TRINCA)
+
+    def eh_sequencia(self) -> bool:
+        """Verifica se o agrupamento é uma sequência"""
+        return bool(self.tipo & SEQUENCIA)
+
+    def eh_canastra(self) -> bool:
+        """Verifica se o agrupamento é uma canastra"""
+        return len(self._cartas) >= 7 and self.tipo != 0
+
+    def get_pontos(self) -> int:
+        """Calcula os pontos do agrupamento a partir do resumo"""
+        if len(self._cartas) < 3 or self.tipo == 0:
+            pontos = 0
+        elif len(self._cartas) >= 7:
+            pontos = self.soma + (100 if self.curingas else 200)
+        else:
+            pontos = self.soma
+
+        if VERIFICAR_CACHE:
+            recalculado = self.recalcular_pontos()
+            if recalculado != pontos:
+                raise RuntimeError(f"Pontos do agrupamento desatualizados: {pontos} != {recalculado}")
+        return pontos
+
+    def recalcular_pontos(self) -> int:
+        """Calcula os pontos percorrendo as cartas, sem usar o resumo guardado"""
+        if not Agrupamento(self._cartas).validar():
+            return 0
+
+        pontos = sum(c.pontos for c in self._cartas)
+        if len(self._cartas) >= 7:
+            pontos += 100 if any(c.especial for c in self._cartas) else 200
+        return pontos
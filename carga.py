@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import json
+import random
+import resource
+import socket
+import sys
+import time
+from typing import List, Optional
+from servidor import Servidor, codificar_mensagem
+from transmissao import aplicar_diferenca
+
+
+def memoria_maxima_mb() -> float:
+    """Maior memória residente do processo até agora, em MB"""
+    maxima = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxima / (1024 * 1024) if sys.platform == "darwin" else maxima / 1024
+
+
+class ClienteSimulado:
+    """Cliente que joga sozinho pelo protocolo do servidor: compra do monte e descarta ao acaso
+
+    Mede a latência entre o envio de cada ação e a chegada do estado que a
+    reflete. Com 'largada', senta na mesa e só joga depois que o evento é
+    disparado.
+    """
+    def __init__(self, mesa: str, nome: str, rng: random.Random, max_turnos: int,
+                 largada: Optional[asyncio.Event] = None):
+        self.mesa = mesa
+        self.nome = nome
+        self.rng = rng
+        self.max_turnos = max_turnos
+        self.largada = largada
+        self.sentado = asyncio.Event()
+        self.latencias: List[float] = []
+        self.acoes = 0
+        self.erros = 0
+
+    async def jogar(self, host: str, porta: int) -> None:
+        reader, writer = await asyncio.open_connection(host, porta)
+        writer.write(codificar_mensagem({"tipo": "entrar", "mesa": self.mesa, "nome": self.nome}))
+        enviada: Optional[float] = None
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                mensagem = json.loads(linha)
+                if mensagem["tipo"] == "erro":
+                    self.erros += 1
+                if mensagem["tipo"] != "estado":
+                    continue
+                if not self.sentado.is_set():
+                    self.sentado.set()
+                    if self.largada is not None:
+                        await self.largada.wait()
+                if enviada is not None:
+                    self.latencias.append(time.perf_counter() - enviada)
+                    enviada = None
+                if mensagem["estado"] == "fim" or mensagem["turno"] >= self.max_turnos:
+                    break
+                if mensagem["estado"] != "jogando" or mensagem["jogador_atual"] != mensagem["assento"]:
+                    continue
+                if not mensagem["comprou_carta"]:
+                    acao = {"tipo": "acao", "acao": "comprar_monte" if mensagem["monte"] or mensagem["mortos"]
+                             else "comprar_descarte"}
+                elif mensagem["mao"]:
+                    acao = {"tipo": "acao", "acao": "descartar", "cartas": [self.rng.choice(mensagem["mao"])]}
+                else:
+                    acao = {"tipo": "acao", "acao": "passar"}
+                writer.write(codificar_mensagem(acao))
+                enviada = time.perf_counter()
+                self.acoes += 1
+        finally:
+            writer.close()
+
+
+class EspectadorSimulado:
+    """Cliente que assiste a uma mesa pelo feed de deltas e reconstrói a visão
+
+    Confere a sequência das mensagens: cada delta deve vir logo depois do
+    anterior, a não ser que um quadro completo (ressincronização) o preceda.
+    Um espectador lento lê devagar e com um buffer de recepção pequeno, para
+    forçar o servidor a ressincronizá-lo.
+    """
+    def __init__(self, mesa: str, lento: bool = False):
+        self.mesa = mesa
+        self.lento = lento
+        self.assinado = asyncio.Event()
+        self.visao: Optional[dict] = None
+        self.seq = -1
+        self.deltas = 0
+        self.quadros = 0
+        self.bytes_deltas = 0
+        self.bytes_quadros = 0
+        self.falhas = 0  # Deltas fora de sequência
+
+    async def assistir(self, host: str, porta: int) -> None:
+        try:
+            await self._assistir(host, porta)
+        finally:
+            self.assinado.set()
+
+    async def _assistir(self, host: str, porta: int) -> None:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if self.lento:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, (host, porta))
+        reader, writer = await asyncio.open_connection(sock=sock)
+        try:
+            writer.write(codificar_mensagem({"tipo": "assistir", "mesa": self.mesa}))
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                mensagem = json.loads(linha)
+                if mensagem["tipo"] in ("erro", "encerrada"):
+                    break
+                self._receber(mensagem, len(linha))
+                self.assinado.set()
+                if self.lento:
+                    await asyncio.sleep(0.02)
+        finally:
+            writer.close()
+
+    def _receber(self, mensagem: dict, tamanho: int) -> None:
+        if mensagem["tipo"] == "quadro":
+            self.visao = mensagem["visao"]
+            self.quadros += 1
+            self.bytes_quadros += tamanho
+        elif mensagem["tipo"] == "delta":
+            if mensagem["seq"] != self.seq + 1:
+                self.falhas += 1
+            aplicar_diferenca(self.visao, mensagem)
+            self.deltas += 1
+            self.bytes_deltas += tamanho
+        self.seq = mensagem["seq"]
+
+
+def _percentil(valores: List[float], fracao: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(fracao * len(ordenados)))]
+
+
+async def teste_de_carga(mesas: int, max_turnos: int = 40, semente: int = 0, espectadores: int = 0,
+                         lentos: float = 0.0) -> dict:
+    """Sobe um servidor local e joga 'mesas' partidas simultâneas com clientes simulados
+
+    Com 'espectadores', cada mesa também é assistida por esse número de
+    clientes do feed de deltas, dos quais a fração 'lentos' lê devagar.
+    """
+    servidor = Servidor(maximo_mesas=mesas)
+    porta = await servidor.iniciar("127.0.0.1", 0)
+    memoria_antes = memoria_maxima_mb()
+    rng = random.Random(semente)
+    largada = asyncio.Event()
+    clientes = [ClienteSimulado(f"mesa{i}", f"cliente{i}-{assento}", random.Random(rng.random()), max_turnos,
+                                largada) for i in range(mesas) for assento in range(2)]
+    assistentes = [EspectadorSimulado(f"mesa{i}", lento=k < round(lentos * espectadores))
+                   for i in range(mesas) for k in range(espectadores)]
+
+    # Todos sentam e todos os espectadores recebem o primeiro quadro antes de a primeira ação ser jogada
+    tarefas = [asyncio.ensure_future(cliente.jogar("127.0.0.1", porta)) for cliente in clientes]
+    await asyncio.gather(*(cliente.sentado.wait() for cliente in clientes))
+    tarefas += [asyncio.ensure_future(espectador.assistir("127.0.0.1", porta)) for espectador in assistentes]
+    await asyncio.gather(*(espectador.assinado.wait() for espectador in assistentes))
+
+    inicio = time.perf_counter()
+    largada.set()
+    await asyncio.gather(*tarefas)
+    duracao = time.perf_counter() - inicio
+    await servidor.encerrar()
+
+    latencias = [latencia for cliente in clientes for latencia in cliente.latencias]
+    return {
+        "mesas": mesas,
+        "clientes": len(clientes),
+        "segundos": duracao,
+        "acoes": servidor.acoes,
+        "acoes_por_segundo": servidor.acoes / duracao if duracao else 0.0,
+        "erros": sum(cliente.erros for cliente in clientes),
+        "latencia_p50_ms": 1000 * _percentil(latencias, 0.5),
+        "latencia_p99_ms": 1000 * _percentil(latencias, 0.99),
+        "memoria_mb": memoria_maxima_mb(),
+        "memoria_por_mesa_kb": 1024 * (memoria_maxima_mb() - memoria_antes) / mesas,
+        "espectadores": len(assistentes),
+        "mensagens_feed": sum(e.deltas + e.quadros for e in assistentes),
+        "mensagens_feed_por_segundo": sum(e.deltas + e.quadros for e in assistentes) / duracao if duracao else 0.0,
+        "bytes_por_delta": sum(e.bytes_deltas for e in assistentes) / max(1, sum(e.deltas for e in assistentes)),
+        "bytes_por_quadro": sum(e.bytes_quadros for e in assistentes) / max(1, sum(e.quadros for e in assistentes)),
+        "ressincronizacoes": sum(max(0, e.quadros - 1) for e in assistentes),
+        "falhas_de_sequencia": sum(e.falhas for e in assistentes),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Roda o teste de carga pela linha de comando"""
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor de mesas com clientes simulados")
+    parser.add_argument("-m", "--mesas", type=int, default=100, help="partidas simultâneas (dois clientes cada)")
+    parser.add_argument("--max-turnos", type=int, default=40, help="turnos jogados em cada mesa")
+    parser.add_argument("-s", "--semente", type=int, default=0)
+    parser.add_argument("-e", "--espectadores", type=int, default=0, help="espectadores do feed por mesa")
+    parser.add_argument("--lentos", type=float, default=0.0, help="fração dos espectadores que lê devagar")
+    parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    resultado = asyncio.run(teste_de_carga(args.mesas, args.max_turnos, args.semente, args.espectadores, args.lentos))
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+        return
+    print(f"{resultado['mesas']} mesas, {resultado['clientes']} clientes, {resultado['acoes']} ações "
+          f"em {resultado['segundos']:.1f}s ({resultado['acoes_por_segundo']:.0f} ações/s, {resultado['erros']} erros)")
+    print(f"Latência: p50 {resultado['latencia_p50_ms']:.2f} ms, p99 {resultado['latencia_p99_ms']:.2f} ms")
+    print(f"Memória: {resultado['memoria_mb']:.1f} MB no pico, ~{resultado['memoria_por_mesa_kb']:.1f} KB por mesa")
+    if resultado["espectadores"]:
+        print(f"Feed: {resultado['espectadores']} espectadores, {resultado['mensagens_feed']} mensagens "
+              f"({resultado['mensagens_feed_por_segundo']:.0f}/s), {resultado['bytes_por_delta']:.0f} bytes por delta "
+              f"contra {resultado['bytes_por_quadro']:.0f} por quadro, {resultado['ressincronizacoes']} "
+              f"ressincronizações, {resultado['falhas_de_sequencia']} falhas de sequência")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
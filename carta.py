@@ -1,38 +1,77 @@
-import pygame
-from typing import Tuple
-from constants import CARD_WIDTH, CARD_HEIGHT, WHITE, BLACK, RED, YELLOW
+from array import array
+from typing import Iterable, List, Tuple
+from constants import BLACK, RED, YELLOW
+
+# Cada carta é identificada por um código inteiro: 0-51 são as cartas normais
+# (naipe * 13 + valor) e 52-53 são os dois curingas. Com vários baralhos o
+# código continua (54-107 no segundo baralho e assim por diante), e a "face"
+# da carta é sempre codigo % FACES_POR_BARALHO.
+FACES_POR_BARALHO = 54
+NUM_VALORES = 13
+FACE_CURINGA = 52
 
 class Carta:
-    """Classe que representa uma carta do jogo"""
+    """Classe que representa uma carta do jogo
+
+    As cartas são flyweights: existe uma única instância por código, obtida
+    com Carta(codigo) ou Carta.de_codigo(codigo). Mãos e agrupamentos apenas
+    referenciam essas instâncias compartilhadas.
+    """
     NAIPES = ['♠', '♥', '♦', '♣']
     VALORES = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
     ESPECIAIS = {'Curinga': 'C'}
 
-    def __init__(self, naipe: str, valor: str, curinga: bool = False):
-        self.naipe = naipe
-        self.valor = valor
-        self.curinga = curinga  # '2' não é automaticamente curinga
-        self.virada = False
-        self.rect = pygame.Rect(0, 0, CARD_WIDTH, CARD_HEIGHT)
-        
+    __slots__ = ('codigo', 'face', 'naipe', 'valor', 'naipe_idx', 'valor_idx', 'curinga', 'especial', 'pontos')
+
+    _internadas: List['Carta'] = []
+
+    def __new__(cls, codigo: int) -> 'Carta':
+        if codigo < 0:
+            raise ValueError(f"Código de carta inválido: {codigo}")
+        if codigo < len(cls._internadas):
+            return cls._internadas[codigo]
+
+        # Cria as instâncias que faltam até o código pedido (baralhos extras)
+        for novo in range(len(cls._internadas), codigo + 1):
+            carta = object.__new__(cls)
+            carta._preencher(novo)
+            cls._internadas.append(carta)
+        return cls._internadas[codigo]
+
+    def _preencher(self, codigo: int) -> None:
+        """Preenche os atributos da carta a partir das tabelas de faces"""
+        face = codigo % FACES_POR_BARALHO
+        self.codigo = codigo
+        self.face = face
+        self.naipe_idx = NAIPE_IDX[face]
+        self.valor_idx = VALOR_IDX[face]
+        self.curinga = face >= FACE_CURINGA  # '2' não é automaticamente curinga
+        self.naipe = self.NAIPES[self.naipe_idx] if not self.curinga else ''
+        self.valor = self.VALORES[self.valor_idx] if not self.curinga else 'Curinga'
+        self.especial = ESPECIAL[face]
+        self.pontos = PONTOS[face]
+
+    @classmethod
+    def de_codigo(cls, codigo: int) -> 'Carta':
+        """Retorna a instância compartilhada da carta com o código dado"""
+        return cls(codigo)
+
+    def __reduce__(self):
+        # Mantém o flyweight ao copiar ou serializar (pickle, deepcopy)
+        return (Carta.de_codigo, (self.codigo,))
+
     def __str__(self) -> str:
         if self.curinga and self.valor == 'Curinga':
             return self.ESPECIAIS['Curinga']
         return f"{self.valor}{self.naipe}"
-    
+
     def __repr__(self) -> str:
         return self.__str__()
-    
+
     def get_pontos(self) -> int:
         """Retorna os pontos da carta"""
-        if self.curinga and self.valor == 'Curinga':
-            return 20
-        if self.valor == 'A':
-            return 15
-        if self.valor in ['2', '8', '9', '10', 'J', 'Q', 'K']:
-            return 10
-        return 5
-    
+        return self.pontos
+
     def get_cor(self) -> Tuple[int, int, int]:
         """Retorna a cor da carta com base no naipe"""
         if self.curinga and self.valor == 'Curinga':
@@ -40,96 +79,96 @@ class Carta:
         if self.naipe in ['♥', '♦']:
             return RED
         return BLACK
-    
-    def desenhar(self, x: int, y: int, selecionada: bool = False) -> None:
-        """Desenha a carta na tela"""
-        self.rect.x = x
-        self.rect.y = y
-        
-        # Desenha o retângulo da carta
-        cor_borda = BLUE if selecionada else BLACK
-        pygame.draw.rect(screen, WHITE, self.rect)
-        pygame.draw.rect(screen, cor_borda, self.rect, 2)
-        
-        if self.virada:
-            pygame.draw.rect(screen, BLUE, self.rect)
-            return
-        
-        # Desenha o valor e naipe da carta
-        texto = font.render(str(self), True, self.get_cor())
-        texto_rect = texto.get_rect(center=(x + CARD_WIDTH // 2, y + CARD_HEIGHT // 2))
-        screen.blit(texto, texto_rect)
-    
+
     def pode_sequenciar(self, outra: 'Carta') -> bool:
         """Verifica se esta carta pode sequenciar com outra"""
-        if self.curinga or outra.curinga or self.valor == '2' or outra.valor == '2':
+        if self.especial or outra.especial:
             return True
-        
-        if self.naipe != outra.naipe:
+
+        if self.naipe_idx != outra.naipe_idx:
             return False
-        
-        idx_atual = self.VALORES.index(self.valor)
-        idx_outra = self.VALORES.index(outra.valor)
-        
-        return abs(idx_atual - idx_outra) == 1
-    
+
+        return abs(self.valor_idx - outra.valor_idx) == 1
+
     def eh_consecutiva(self, outra: 'Carta') -> bool:
         """Verifica se esta carta é consecutiva à outra"""
-        if self.curinga or outra.curinga or self.valor == '2' or outra.valor == '2':
+        if self.especial or outra.especial:
             return True
-        
-        if self.naipe != outra.naipe:
+
+        if self.naipe_idx != outra.naipe_idx:
             return False
-        
-        idx_atual = self.VALORES.index(self.valor)
-        idx_outra = self.VALORES.index(outra.valor)
-        
-        return idx_atual == idx_outra + 1 or idx_atual == idx_outra - 1
-    
+
+        return self.valor_idx == outra.valor_idx + 1 or self.valor_idx == outra.valor_idx - 1
+
     def pode_adicionar_trinca(self, agrupamento: 'Agrupamento') -> bool:
         """Verifica se a carta pode ser adicionada a uma trinca"""
         if not agrupamento.eh_trinca():
             return False
-        
+
         # Curingas verdadeiros não podem ser adicionados a trincas
-        if self.curinga and self.valor == 'Curinga':
+        if self.curinga:
             return False
-        
+
         # Se é um '2', pode ser adicionado como carta normal
-        if self.valor == '2':
+        if self.especial:
             # Verifica se o agrupamento já tem um '2'
-            return '2' in [c.valor for c in agrupamento.cartas]
-        
-        # Se o agrupamento tem curingas, verifica se o valor bate com as cartas não curingas
-        valores_nao_curingas = [c.valor for c in agrupamento.cartas if not c.curinga and c.valor != '2']
-        if not valores_nao_curingas:  # Todas são curingas ou '2's
-            return True
-            
-        return self.valor == valores_nao_curingas[0]
-    
+            return agrupamento.dois > 0
+
+        # O valor precisa ser o mesmo das cartas não curingas (um único bit na união)
+        return agrupamento.uniao == 1 << self.valor_idx
+
     def pode_adicionar_sequencia(self, agrupamento: 'Agrupamento') -> bool:
         """Verifica se a carta pode ser adicionada a uma sequência"""
         if not agrupamento.eh_sequencia():
             return False
-        
+
+        # A sequência já ocupa todos os valores do Ás ao K
+        if len(agrupamento) >= NUM_VALORES:
+            return False
+
         # Se é curinga ou '2', pode ser adicionada a qualquer sequência
-        if self.curinga or self.valor == '2':
+        if self.especial:
             return True
-        
-        # Pega as cartas não curingas do agrupamento (excluindo '2's)
-        cartas_nao_curingas = [c for c in agrupamento.cartas if not c.curinga and c.valor != '2']
-        
+
         # Verifica naipe
-        if cartas_nao_curingas and self.naipe != cartas_nao_curingas[0].naipe:
+        if agrupamento.naipes != 1 << self.naipe_idx:
             return False
-        
-        # Verifica se pode ser adicionada no início ou no fim
-        valores = [Carta.VALORES.index(c.valor) for c in cartas_nao_curingas]
-        if not valores:
+
+        # Pode ser adicionada no início, no fim ou no lugar de um curinga
+        valor = self.valor_idx
+        if valor == agrupamento.inicio - 1 or valor == agrupamento.fim + 1:
             return True
-        
-        min_valor = min(valores)
-        max_valor = max(valores)
-        meu_valor = Carta.VALORES.index(self.valor)
-        
-        return meu_valor == min_valor - 1 or meu_valor == max_valor + 1
\ No newline at end of file
+        ocupante = agrupamento.slots[valor]
+        return ocupante is not None and ocupante.especial
+
+
+def _pontos_da_face(face: int) -> int:
+    """Pontos de uma face: curinga 20, Ás 15, 2 e 8-K 10, 3-7 5"""
+    if face >= FACE_CURINGA:
+        return 20
+    valor_idx = face % NUM_VALORES
+    if valor_idx == 0:
+        return 15
+    if valor_idx == 1 or valor_idx >= 7:
+        return 10
+    return 5
+
+
+# Tabelas pré-calculadas, indexadas pela face (codigo % FACES_POR_BARALHO)
+NAIPE_IDX: List[int] = [f // NUM_VALORES if f < FACE_CURINGA else -1 for f in range(FACES_POR_BARALHO)]
+VALOR_IDX: List[int] = [f % NUM_VALORES if f < FACE_CURINGA else -1 for f in range(FACES_POR_BARALHO)]
+ESPECIAL: List[bool] = [f >= FACE_CURINGA or f % NUM_VALORES == 1 for f in range(FACES_POR_BARALHO)]
+PONTOS: List[int] = [_pontos_da_face(f) for f in range(FACES_POR_BARALHO)]
+
+# Cria antecipadamente as instâncias do primeiro baralho
+Carta(FACES_POR_BARALHO - 1)
+
+
+def codificar(cartas: Iterable[Carta]) -> array:
+    """Converte uma lista de cartas num array compacto de códigos"""
+    return array('H', (c.codigo for c in cartas))
+
+
+def decodificar(codigos: Iterable[int]) -> List[Carta]:
+    """Converte códigos de volta nas instâncias compartilhadas de Carta"""
+    return [Carta(c) for c in codigos]
@@ -1,4 +1,4 @@
-import pygame
+import os
 
 # Configurações da tela
 SCREEN_WIDTH = 1200
@@ -18,4 +18,7 @@ GREEN = (0, 128, 0)
 
 # Fontes
 FONT_SIZE = 24
-SMALL_FONT_SIZE = 18
\ No newline at end of file
+SMALL_FONT_SIZE = 18
+# Confere os pontos guardados de mãos, agrupamentos e jogadores com um
+# recálculo completo a cada consulta (lento; use BURACO_VERIFICAR_CACHE=1)
+VERIFICAR_CACHE = os.environ.get("BURACO_VERIFICAR_CACHE") == "1"
@@ -0,0 +1,350 @@
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+from agrupamento import Agrupamento
+from carta import Carta, FACES_POR_BARALHO, NUM_VALORES
+from jogador import Jogador
+from jogo import Jogo
+from simulacao import jogar_partida
+
+# Arquivo de referência padrão de --comparar (gerado com --salvar na máquina de deploy)
+BASE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "desempenho_base.json")
+TOLERANCIA = 0.15  # Aumento relativo do tempo a partir do qual um caso conta como regressão
+FORMATO = 1  # Versão do formato do JSON de resultados
+
+
+class Caso(NamedTuple):
+    """Um caso do benchmark: 'preparar' monta os dados e retorna a função medida
+
+    'unidades' é quantas operações cada chamada faz (por exemplo, várias
+    partidas), e o tempo é relatado por unidade.
+    """
+    nome: str
+    preparar: Callable[[], Callable[[], object]]
+    unidades: int = 1
+
+
+def _baralho() -> Callable[[], object]:
+    jogo = Jogo(semente=0)
+    return jogo.criar_baralho
+
+
+def _distribuir() -> Callable[[], object]:
+    jogo = Jogo(semente=0)
+    jogo.criar_baralho()
+    baralho = list(jogo.monte.cartas)
+
+    def distribuir():
+        # Jogadores e monte novos a cada chamada, como no início de uma partida
+        jogo.jogadores = [Jogador("Jogador 1"), Jogador("Jogador 2")]
+        jogo.monte.cartas = list(baralho)
+        jogo.monte.descarte = []
+        jogo.distribuir_cartas()
+    return distribuir
+
+
+def _cartas_sequencia(tamanho: int) -> List[Carta]:
+    """Sequência de copas com 'tamanho' cartas, fora de ordem
+
+    Até 12 cartas usa cartas normais a partir do 3 e, a partir de 4 cartas,
+    um curinga na ponta; com 13 entra o 2 de copas no buraco do 2, e com 14
+    (mais um curinga) ela não cabe nos 13 valores e é inválida.
+    """
+    naipe = 1
+    normais = [Carta(naipe * NUM_VALORES + v) for v in list(range(2, NUM_VALORES)) + [0]]
+    if tamanho <= len(normais):
+        especiais = [Carta(52)] if tamanho >= 4 else []
+    else:
+        especiais = [Carta(naipe * NUM_VALORES + 1), Carta(52)][:tamanho - len(normais)]
+    cartas = normais[:tamanho - len(especiais)] + especiais
+    random.Random(tamanho).shuffle(cartas)
+    return cartas
+
+
+def _criar_agrupamento(tamanho: int) -> Callable[[], Callable[[], object]]:
+    def preparar():
+        cartas = _cartas_sequencia(tamanho)
+        return lambda: Agrupamento(cartas)
+    return preparar
+
+
+def _ordenar_sequencia(tamanho: int) -> Callable[[], Callable[[], object]]:
+    def preparar():
+        return Agrupamento(_cartas_sequencia(tamanho)).ordenar_sequencia
+    return preparar
+
+
+def _validar(tamanho: int) -> Callable[[], Callable[[], object]]:
+    def preparar():
+        agrupamento = Agrupamento(_cartas_sequencia(tamanho))
+        return lambda: (agrupamento.validar(), agrupamento.eh_sequencia(), agrupamento.eh_trinca())
+    return preparar
+
+
+def _pontos_jogador() -> Callable[[], object]:
+    """Jogador com 11 cartas na mão e três agrupamentos (uma canastra, uma trinca e uma sequência)"""
+    jogador = Jogador("Jogador 1")
+    agrupamentos = ([2, 3, 4, 5, 6, 7, 8], [15, 28, 41], [36, 37, 38])
+    mao = [0, 14, 27, 40, 10, 19, 31, 44, 48, 23, 52]
+    for codigo in mao + [c for agrupamento in agrupamentos for c in agrupamento]:
+        jogador.receber_carta(Carta(codigo))
+    for agrupamento in agrupamentos:
+        jogador.formar_agrupamento([Carta(c) for c in agrupamento])
+    return jogador.get_pontos
+
+
+def _partidas(estrategias: List[str], quantidade: int) -> Callable[[], Callable[[], object]]:
+    def preparar():
+        def jogar():
+            for semente in range(quantidade):
+                jogar_partida(estrategias, semente)
+        return jogar
+    return preparar
+
+
+def _quadro(modo: str) -> Callable[[], Callable[[], object]]:
+    """Custo de Interface.desenhar: quadro sem mudanças, com uma carta selecionada ou repintado inteiro"""
+    def preparar():
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        import pygame
+        from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+        from fontes import carregar_fontes
+        from interface import Interface
+        pygame.display.init()
+        pygame.font.init()
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        jogo = Jogo(semente=0)
+        jogo.iniciar()
+        interface = Interface(jogo, screen, *carregar_fontes())
+        interface.desenhar()
+        jogador = jogo.jogador_atual_obj()
+        carta = jogador.mao[0]
+
+        def desenhar():
+            if modo == "selecao":
+                jogador.alternar_selecao(carta)
+            elif modo == "completo":
+                interface.renderizador.invalidar()
+            interface.desenhar()
+        return desenhar
+    return preparar
+
+
+def _lote(funcao: str) -> Callable[[], Callable[[], object]]:
+    """Avaliação em lote (lote.py) de 10000 mãos de 11 cartas de dois baralhos: tempo por mão"""
+    def preparar():
+        import lote
+        rng = random.Random(0)
+        contagens = lote.contagens_de_codigos([rng.randrange(2 * FACES_POR_BARALHO) for _ in range(11 * 10000)], [11] * 10000)
+        avaliar = getattr(lote, funcao)
+        return lambda: avaliar(contagens)
+    return preparar
+
+
+def _inicio(modo: str) -> Callable[[], Callable[[], object]]:
+    """Custo de iniciar um processo novo: só importar as regras ou abrir o jogo até o primeiro quadro"""
+    def preparar():
+        diretorio = os.path.dirname(os.path.abspath(__file__))
+        if modo == "importacao":
+            comando = [sys.executable, "-c", "import jogo, legais, simulacao"]
+        else:
+            if importlib.util.find_spec("pygame") is None:
+                raise ImportError("No module named 'pygame'")
+            comando = [sys.executable, os.path.join(diretorio, "main.py"), "--medir-inicio"]
+        ambiente = dict(os.environ, SDL_VIDEODRIVER=os.environ.get("SDL_VIDEODRIVER", "dummy"),
+                        PYGAME_HIDE_SUPPORT_PROMPT="1")
+
+        def iniciar():
+            subprocess.run(comando, cwd=diretorio, env=ambiente, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return iniciar
+    return preparar
+
+
+def casos() -> List[Caso]:
+    """Todos os casos do benchmark, na ordem em que são medidos"""
+    lista = [
+        Caso("jogo.criar_baralho", _baralho),
+        Caso("jogo.distribuir_cartas", _distribuir),
+    ]
+    for tamanho in range(3, 15):
+        lista.append(Caso(f"agrupamento.criar.{tamanho}", _criar_agrupamento(tamanho)))
+    for tamanho in range(3, 15):
+        lista.append(Caso(f"agrupamento.ordenar_sequencia.{tamanho}", _ordenar_sequencia(tamanho)))
+    for tamanho in range(3, 15):
+        lista.append(Caso(f"agrupamento.validar.{tamanho}", _validar(tamanho)))
+    lista += [
+        Caso("jogador.get_pontos", _pontos_jogador),
+        Caso("partida.aleatoria", _partidas(["aleatoria", "aleatoria"], 10), unidades=10),
+        Caso("partida.gulosa", _partidas(["gulosa", "aleatoria"], 10), unidades=10),
+        Caso("lote.pontos_cartas", _lote("pontos_cartas"), unidades=10000),
+        Caso("lote.pontos_agrupamentos", _lote("pontos_agrupamentos"), unidades=10000),
+        Caso("lote.sequencias_formaveis", _lote("sequencias_formaveis"), unidades=10000),
+        Caso("quadro.sem_mudancas", _quadro("sem_mudancas")),
+        Caso("quadro.selecao", _quadro("selecao")),
+        Caso("quadro.completo", _quadro("completo")),
+        Caso("inicio.importacao", _inicio("importacao")),
+        Caso("inicio.primeiro_quadro", _inicio("primeiro_quadro")),
+    ]
+    return lista
+
+
+def medir(funcao: Callable[[], object], repeticoes: int = 5, tempo: float = 0.2) -> Dict[str, float]:
+    """Mede 'funcao' como o timeit: calibra o número de chamadas para cada repetição levar ~'tempo' segundos
+
+    Retorna o menor tempo e a mediana por chamada, em microssegundos. O
+    coletor de lixo fica desligado durante as medições.
+    """
+    chamadas = 1
+    while True:
+        decorrido = _cronometrar(funcao, chamadas)
+        if decorrido >= tempo / 5 or chamadas >= 10 ** 7:
+            break
+        chamadas *= 10 if decorrido < tempo / 50 else 2
+    chamadas = max(1, round(chamadas * tempo / max(decorrido, 1e-9)))
+    tempos = [_cronometrar(funcao, chamadas) / chamadas for _ in range(repeticoes)]
+    return {
+        "us": 1e6 * min(tempos),
+        "mediana_us": 1e6 * statistics.median(tempos),
+        "chamadas": chamadas,
+        "repeticoes": repeticoes,
+    }
+
+
+def _cronometrar(funcao: Callable[[], object], chamadas: int) -> float:
+    gc_ligado = gc.isenabled()
+    gc.disable()
+    try:
+        inicio = time.perf_counter()
+        for _ in range(chamadas):
+            funcao()
+        return time.perf_counter() - inicio
+    finally:
+        if gc_ligado:
+            gc.enable()
+
+
+def rodar(filtro: Optional[str] = None, repeticoes: int = 5, tempo: float = 0.2,
+          progresso: Optional[Callable[[str, Optional[dict]], None]] = None) -> dict:
+    """Roda os casos (os que contêm 'filtro' no nome) e retorna o resultado completo, pronto para JSON
+
+    Casos cujas dependências não estão instaladas (o Pygame, nos de quadro)
+    são listados em "ignorados".
+    """
+    resultado = {
+        "formato": FORMATO,
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "implementacao": platform.python_implementation(),
+        "plataforma": platform.platform(),
+        "verificar_cache": os.environ.get("BURACO_VERIFICAR_CACHE") == "1",
+        "casos": {},
+        "ignorados": {},
+    }
+    for caso in casos():
+        if filtro and filtro not in caso.nome:
+            continue
+        try:
+            funcao = caso.preparar()
+        except ImportError as erro:
+            resultado["ignorados"][caso.nome] = str(erro)
+            if progresso:
+                progresso(caso.nome, None)
+            continue
+        medicao = medir(funcao, repeticoes, tempo)
+        medicao["us"] /= caso.unidades
+        medicao["mediana_us"] /= caso.unidades
+        medicao["unidades"] = caso.unidades
+        resultado["casos"][caso.nome] = medicao
+        if progresso:
+            progresso(caso.nome, medicao)
+    return resultado
+
+
+def comparar(atual: dict, base: dict, tolerancia: float = TOLERANCIA) -> List[dict]:
+    """Compara cada caso com a referência pelo menor tempo: "regressao", "melhora", "igual" ou "novo\""""
+    comparacao = []
+    for nome, medicao in atual["casos"].items():
+        referencia = base.get("casos", {}).get(nome)
+        if referencia is None:
+            comparacao.append({"caso": nome, "atual_us": medicao["us"], "base_us": None, "razao": None,
+                               "situacao": "novo"})
+            continue
+        razao = medicao["us"] / referencia["us"] if referencia["us"] else float("inf")
+        situacao = "regressao" if razao > 1 + tolerancia else "melhora" if razao < 1 - tolerancia else "igual"
+        comparacao.append({"caso": nome, "atual_us": medicao["us"], "base_us": referencia["us"], "razao": razao,
+                           "situacao": situacao})
+    return comparacao
+
+
+def _formatar_tempo(us: float) -> str:
+    if us >= 1000:
+        return f"{us / 1000:.2f} ms"
+    return f"{us:.2f} µs"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Roda o benchmark pela linha de comando; sai com código 1 se houver regressões em relação à referência"""
+    parser = argparse.ArgumentParser(description="Benchmark das regras, da pontuação e do desenho do Buraco")
+    parser.add_argument("-f", "--filtro", help="só os casos cujo nome contém este texto")
+    parser.add_argument("-r", "--repeticoes", type=int, default=5, help="repetições por caso (vale a menor)")
+    parser.add_argument("-t", "--tempo", type=float, default=0.2, help="segundos por repetição")
+    parser.add_argument("-o", "--salvar", help="grava o resultado neste arquivo JSON")
+    parser.add_argument("-c", "--comparar", nargs="?", const=BASE_PADRAO,
+                        help=f"compara com um resultado gravado (padrão: {os.path.basename(BASE_PADRAO)})")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="aumento relativo tolerado antes de acusar regressão")
+    parser.add_argument("--json", action="store_true", help="imprime o resultado (e a comparação) em JSON")
+    args = parser.parse_args(argv)
+
+    def progresso(nome: str, medicao: Optional[dict]) -> None:
+        if args.json:
+            return
+        if medicao is None:
+            print(f"{nome:40} ignorado")
+        else:
+            print(f"{nome:40} {_formatar_tempo(medicao['us']):>12} (mediana {_formatar_tempo(medicao['mediana_us'])})")
+
+    resultado = rodar(args.filtro, args.repeticoes, args.tempo, progresso)
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+            arquivo.write("\n")
+
+    regressoes = []
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        comparacao = comparar(resultado, base, args.tolerancia)
+        regressoes = [c for c in comparacao if c["situacao"] == "regressao"]
+        resultado["comparacao"] = comparacao
+        if not args.json:
+            if (base.get("python"), base.get("plataforma")) != (resultado["python"], resultado["plataforma"]):
+                print(f"\nAviso: referência gravada com Python {base.get('python')} em {base.get('plataforma')}")
+            print(f"\nComparação com {args.comparar} (tolerância {args.tolerancia:.0%}):")
+            for c in comparacao:
+                if c["situacao"] == "novo":
+                    print(f"  {c['caso']:40} novo")
+                else:
+                    print(f"  {c['caso']:40} {_formatar_tempo(c['base_us']):>12} -> "
+                          f"{_formatar_tempo(c['atual_us']):>12} ({c['razao']:.2f}x) {c['situacao']}")
+            print(f"{len(regressoes)} regressões")
+
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    if regressoes:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
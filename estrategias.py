@@ -0,0 +1,101 @@
+import importlib
+import random
+from typing import Dict, List, Type
+from carta import Carta
+from jogo import Jogo
+from solucionador import melhor_jogada
+
+class Estrategia:
+    """Classe base dos jogadores automáticos
+
+    Uma estratégia joga o turno inteiro do jogador da vez usando as ações do
+    Jogo (comprar_do_monte, comprar_do_descarte, agrupamentos e
+    descartar_carta), sem passar pela interface.
+    """
+    nome = "base"
+
+    def __init__(self, rng: random.Random = None):
+        self.rng = rng or random.Random()
+
+    def jogar_turno(self, jogo: Jogo) -> None:
+        """Joga o turno do jogador atual"""
+        raise NotImplementedError
+
+
+class EstrategiaAleatoria(Estrategia):
+    """Compra de um lugar qualquer e descarta uma carta qualquer, sem formar agrupamentos"""
+    nome = "aleatoria"
+
+    def jogar_turno(self, jogo: Jogo) -> None:
+        jogador = jogo.jogador_atual_obj()
+        if not (jogo.monte.descarte and self.rng.random() < 0.5 and jogo.comprar_do_descarte()):
+            jogo.comprar_do_monte()
+        if jogador.mao:
+            jogo.descartar_carta(self.rng.choice(jogador.mao))
+
+
+class EstrategiaGulosa(Estrategia):
+    """Faz sempre a jogada de maior pontuação imediata (Jogador.melhor_jogada)
+
+    Compra do descarte quando as cartas que viriam dele (a pilha inteira ou
+    só o topo) aumentam o ganho da melhor jogada, bate quando consegue ficar sem cartas com uma canastra e
+    descarta a carta de maior pontuação que sobrou na mão.
+    """
+    nome = "gulosa"
+
+    def jogar_turno(self, jogo: Jogo) -> None:
+        jogador = jogo.jogador_atual_obj()
+
+        if jogo.pode_comprar_descarte() and self._vale_o_descarte(jogador, jogo.cartas_do_descarte()):
+            jogo.comprar_do_descarte()
+        elif not jogo.comprar_do_monte():
+            jogo.comprar_do_descarte()
+
+        # Tenta bater (usar todas as cartas com pelo menos uma canastra)
+        jogada = jogador.melhor_jogada()
+        if len(jogada.novos) + len(jogada.extensoes) > 0 and self._bate(jogador, jogada):
+            jogo.aplicar_jogada(jogada)
+            return
+
+        jogo.aplicar_jogada(jogador.melhor_jogada(minimo_na_mao=1))
+        if jogador.mao:
+            jogo.descartar_carta(max(jogador.mao, key=lambda c: c.pontos))
+
+    @staticmethod
+    def _vale_o_descarte(jogador, cartas: List[Carta]) -> bool:
+        sem_descarte = jogador.melhor_jogada(minimo_na_mao=1).ganho
+        com_descarte = melhor_jogada(list(jogador.mao) + cartas, jogador.agrupamentos, minimo_na_mao=1).ganho
+        # O ganho com o descarte é medido já com as cartas na mão, descontando seus pontos
+        return com_descarte - sum(c.pontos for c in cartas) > sem_descarte
+
+    @staticmethod
+    def _bate(jogador, jogada) -> bool:
+        usadas = sum(len(c) for c in jogada.novos) + sum(len(c) for _, c in jogada.extensoes)
+        if usadas != len(jogador.mao):
+            return False
+        if jogador.tem_canastra():
+            return True
+        return any(len(cartas) >= 7 for cartas in jogada.novos) or \
+            any(len(jogador.agrupamentos[i]) + len(cartas) >= 7 for i, cartas in jogada.extensoes)
+
+
+ESTRATEGIAS: Dict[str, Type[Estrategia]] = {
+    EstrategiaAleatoria.nome: EstrategiaAleatoria,
+    EstrategiaGulosa.nome: EstrategiaGulosa,
+}
+
+# Estratégias em módulos próprios (que importam este), carregadas só quando pedidas
+ESTRATEGIAS_EXTERNAS: Dict[str, str] = {
+    "mcts": "mcts:EstrategiaMCTS",
+}
+
+
+def carregar_estrategia(nome: str) -> Type[Estrategia]:
+    """Retorna a classe de estratégia pelo nome registrado ou por 'modulo:Classe'"""
+    if nome in ESTRATEGIAS:
+        return ESTRATEGIAS[nome]
+    nome = ESTRATEGIAS_EXTERNAS.get(nome, nome)
+    if ':' in nome:
+        modulo, classe = nome.split(':', 1)
+        return getattr(importlib.import_module(modulo), classe)
+    raise ValueError(f"Estratégia desconhecida: {nome}")
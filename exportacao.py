@@ -0,0 +1,378 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from acoes import Acao
+from agrupamento import Agrupamento
+from carta import FACES_POR_BARALHO
+from estrategias import carregar_estrategia
+from jogo import Jogo, MAX_JOGADORES, MORTOS
+from simulacao import assentos_da_partida, semente_da_partida, validar_semente
+
+# Exportação de partidas entre estratégias como amostras para treinar modelos
+# fora do jogo: uma amostra por ação, com o estado visível para o jogador da
+# vez, as ações legais naquele momento, a escolhida e o placar final. As
+# amostras e as ações ficam em dois arquivos de registros de tamanho fixo
+# (AMOSTRA e ACAO), lidos com np.memmap, e um índice JSON com as contagens.
+
+AMOSTRAS = "amostras.bin"
+ACOES = "acoes.bin"
+INDICE = "indice.json"
+FORMATO = 1  # Versão do layout dos registros
+
+VAZIO = 255  # Campo sem valor (sem carta no topo, assento sem jogador, posição sem agrupamento)
+MAX_AGRUPAMENTOS = 12  # Agrupamentos de cada equipe no estado (os seguintes ficam de fora, mas são contados)
+CAMPOS_AGRUPAMENTO = 8
+MAX_CARTAS_ACAO = 30  # Cartas de uma ação (basta para qualquer agrupamento de até 3 baralhos)
+
+# Estado (uint8), do ponto de vista do jogador da vez. Faces são codigo % 54;
+# tamanhos acima de 255 ficam em 255. Posições de cada campo:
+MAO = 0  # 54: cartas na mão do jogador da vez, por face
+DESCARTE = MAO + FACES_POR_BARALHO  # 54: cartas na pilha de descarte, por face
+TOPO = DESCARTE + FACES_POR_BARALHO  # Face do topo do descarte
+TAMANHO_DESCARTE = TOPO + 1
+MONTE = TAMANHO_DESCARTE + 1  # Cartas no monte de compra
+MORTOS_FECHADOS = MONTE + 1
+COMPROU = MORTOS_FECHADOS + 1  # O jogador da vez já comprou no turno
+NUM_JOGADORES = COMPROU + 1
+ASSENTO = NUM_JOGADORES + 1  # Assento do jogador da vez
+DESCARTE_INTEIRO = ASSENTO + 1  # Regra da compra do descarte (Jogo.descarte_inteiro)
+TURNO = DESCARTE_INTEIRO + 1  # 2 bytes, little-endian
+MAOS = TURNO + 2  # 4: cartas na mão de cada assento, a partir do jogador da vez
+NUM_AGRUPAMENTOS = MAOS + MAX_JOGADORES  # 4: agrupamentos de cada equipe, a partir da equipe da vez
+# 4 equipes (a partir da equipe da vez) x MAX_AGRUPAMENTOS x (tipo, naipe, início, fim, cartas,
+# especiais, '2's, canastra); numa trinca o naipe é VAZIO e início e fim são o valor
+AGRUPAMENTOS = NUM_AGRUPAMENTOS + MAX_JOGADORES
+LARGURA_ESTADO = AGRUPAMENTOS + MAX_JOGADORES * MAX_AGRUPAMENTOS * CAMPOS_AGRUPAMENTO
+LAYOUT = {
+    "mao": MAO, "descarte": DESCARTE, "topo": TOPO, "tamanho_descarte": TAMANHO_DESCARTE, "monte": MONTE,
+    "mortos_fechados": MORTOS_FECHADOS, "comprou": COMPROU, "num_jogadores": NUM_JOGADORES, "assento": ASSENTO,
+    "descarte_inteiro": DESCARTE_INTEIRO, "turno": TURNO, "maos": MAOS, "num_agrupamentos": NUM_AGRUPAMENTOS,
+    "agrupamentos": AGRUPAMENTOS, "largura": LARGURA_ESTADO,
+}
+
+# Uma ação legal: tipo, agrupamento (Acao.agrupamento) e as faces das cartas em ordem, completadas com VAZIO
+ACAO = np.dtype([("tipo", "u1"), ("agrupamento", "u1"), ("faces", "u1", (MAX_CARTAS_ACAO,))])
+# Uma amostra: as ações legais são ACAO[acoes:acoes + num_acoes] e 'escolhida' é a posição da feita entre elas;
+# os pontos são os finais da equipe do jogador da vez e os da melhor outra equipe; resultado 1, 0 (empate) ou -1
+AMOSTRA = np.dtype([("estado", "u1", (LARGURA_ESTADO,)), ("partida", "<u8"), ("acoes", "<u8"),
+                    ("num_acoes", "<u4"), ("escolhida", "<u4"), ("pontos", "<i2"), ("pontos_adversarios", "<i2"),
+                    ("resultado", "i1")])
+
+
+def _limitar(valor: int) -> int:
+    return min(valor, VAZIO)
+
+
+def _por_face(cartas) -> List[int]:
+    contagens = [0] * FACES_POR_BARALHO
+    for carta in cartas:
+        contagens[carta.face] += 1
+    return contagens
+
+
+def _campos_agrupamento(agrupamento: Agrupamento) -> Tuple[int, ...]:
+    if agrupamento.eh_sequencia():
+        naipe, inicio, fim = agrupamento.naipes.bit_length() - 1, agrupamento.inicio, agrupamento.fim
+    else:
+        naipe, inicio, fim = VAZIO, agrupamento.min_valor, agrupamento.min_valor
+    return (agrupamento.tipo, naipe, inicio, fim, _limitar(len(agrupamento)), agrupamento.curingas,
+            agrupamento.dois, agrupamento.eh_canastra())
+
+
+def codificar_estado(jogo: Jogo) -> np.ndarray:
+    """Estado visível para o jogador da vez, no layout fixo de LAYOUT"""
+    estado = np.zeros(LARGURA_ESTADO, dtype=np.uint8)
+    atual = jogo.jogador_atual
+    jogador = jogo.jogadores[atual]
+    monte = jogo.monte
+    estado[MAO:MAO + FACES_POR_BARALHO] = _por_face(jogador.mao)
+    estado[DESCARTE:DESCARTE + FACES_POR_BARALHO] = _por_face(monte.descarte)
+    estado[TOPO] = monte.descarte[-1].face if monte.descarte else VAZIO
+    estado[TAMANHO_DESCARTE] = _limitar(len(monte.descarte))
+    estado[MONTE] = _limitar(len(monte.cartas))
+    estado[MORTOS_FECHADOS] = len(monte.mortos)
+    estado[COMPROU] = jogador.comprou_carta
+    estado[NUM_JOGADORES] = len(jogo.jogadores)
+    estado[ASSENTO] = atual
+    estado[DESCARTE_INTEIRO] = jogo.descarte_inteiro
+    estado[TURNO:TURNO + 2] = (jogo.turno & 0xFF, jogo.turno >> 8 & 0xFF)
+    for k in range(MAX_JOGADORES):
+        outro = jogo.jogadores[(atual + k) % len(jogo.jogadores)] if k < len(jogo.jogadores) else None
+        estado[MAOS + k] = _limitar(len(outro.mao)) if outro else VAZIO
+    for k in range(len(jogo.equipes)):
+        equipe = jogo.equipes[(jogador.equipe.indice + k) % len(jogo.equipes)]
+        estado[NUM_AGRUPAMENTOS + k] = _limitar(len(equipe.agrupamentos))
+        for i, agrupamento in enumerate(equipe.agrupamentos[:MAX_AGRUPAMENTOS]):
+            inicio = AGRUPAMENTOS + (k * MAX_AGRUPAMENTOS + i) * CAMPOS_AGRUPAMENTO
+            estado[inicio:inicio + CAMPOS_AGRUPAMENTO] = _campos_agrupamento(agrupamento)
+    return estado
+
+
+def _chave(acao: Acao) -> Tuple[int, int, Tuple[int, ...]]:
+    """Ação sem o jogador e com as cartas por face: cópias da mesma carta dão a mesma ação"""
+    faces = tuple(sorted(codigo % FACES_POR_BARALHO for codigo in acao.cartas))
+    if len(faces) > MAX_CARTAS_ACAO:
+        raise ValueError(f"Ação com mais de {MAX_CARTAS_ACAO} cartas: {acao}")
+    return acao.tipo, acao.agrupamento, faces
+
+
+def _registros_acoes(chaves: Sequence[Tuple[int, int, Tuple[int, ...]]]) -> np.ndarray:
+    # Cada registro já montado em bytes: bem mais rápido que preencher campo a campo
+    dados = b"".join(bytes((tipo, agrupamento, *faces)) + bytes((VAZIO,)) * (MAX_CARTAS_ACAO - len(faces))
+                     for tipo, agrupamento, faces in chaves)
+    return np.frombuffer(dados, dtype=ACAO).copy()
+
+
+def jogar_partida_amostras(nomes: Sequence[str], semente: int, max_turnos: int = 1000, baralhos: int = 1,
+                           equipes: Optional[Sequence[int]] = None, mortos: int = MORTOS,
+                           descarte_inteiro: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Joga uma partida como simulacao.jogar_partida e retorna as suas amostras (AMOSTRA) e ações legais (ACAO)
+
+    Cada turno é jogado pela estratégia, desfeito e refeito ação por ação
+    para listar as ações legais antes de cada uma. A ação feita sempre está
+    entre as legais: se o gerador não a lista como ela foi feita (por
+    exemplo, uma extensão de várias cartas de uma vez), ela é acrescentada
+    ao fim. O campo 'acoes' de cada amostra conta a partir do início da
+    partida.
+    """
+    estrategias = [carregar_estrategia(nome)(random.Random(semente * len(nomes) + i)) for i, nome in enumerate(nomes)]
+    jogo = Jogo(semente, None, [f"Jogador {i + 1}" for i in range(len(nomes))], baralhos, equipes, mortos,
+                descarte_inteiro)
+    jogo.iniciar()
+
+    estados: List[np.ndarray] = []
+    linhas: List[Tuple[int, int, int, int]] = []  # (jogador, início das ações, número de ações, escolhida)
+    chaves: List[Tuple[int, int, Tuple[int, ...]]] = []
+    turnos = 0
+    while turnos < max_turnos and not jogo.verificar_fim_jogo():
+        atual = jogo.jogador_atual
+        feitas = len(jogo.historico)
+        estrategias[atual].jogar_turno(jogo)
+        turnos += 1
+        if jogo.jogador_atual == atual and not jogo.verificar_fim_jogo():
+            jogo.passar_vez()
+        turno = [delta.acao for delta in jogo.historico[feitas:]]
+        for _ in turno:
+            jogo.desfazer()
+        for acao in turno:
+            legais: Dict[Tuple[int, int, Tuple[int, ...]], int] = {}
+            for legal in jogo.acoes_legais():
+                legais.setdefault(_chave(legal), len(legais))
+            escolhida = legais.setdefault(_chave(acao), len(legais))
+            estados.append(codificar_estado(jogo))
+            linhas.append((atual, len(chaves), len(legais), escolhida))
+            chaves.extend(legais)
+            if jogo.fazer(acao) is None:
+                raise RuntimeError(f"Ação recusada ao refazer o turno: {acao}")
+    jogo.estado = "fim"
+
+    pontos = jogo.pontos_equipes()
+    vencedor = jogo.vencedor()
+    amostras = np.zeros(len(linhas), dtype=AMOSTRA)
+    if linhas:
+        amostras["estado"] = np.stack(estados)
+        amostras["partida"] = semente
+        jogadores, inicios, quantidades, escolhidas = zip(*linhas)
+        amostras["acoes"] = inicios
+        amostras["num_acoes"] = quantidades
+        amostras["escolhida"] = escolhidas
+        for i, j in enumerate(jogadores):
+            equipe = jogo.jogadores[j].equipe.indice
+            amostras[i]["pontos"] = pontos[equipe]
+            amostras[i]["pontos_adversarios"] = max(p for e, p in enumerate(pontos) if e != equipe)
+            amostras[i]["resultado"] = 0 if vencedor is None else 1 if vencedor.equipe.indice == equipe else -1
+    return amostras, _registros_acoes(chaves)
+
+
+def _exportar_lote(args: tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """Joga um lote de partidas dentro de um processo e junta as amostras (ações contadas a partir do lote)"""
+    nomes, semente, inicio, fim, max_turnos, alternar, regras = args
+    todas_amostras, todas_acoes = [], []
+    total_acoes = 0
+    for indice in range(inicio, fim):
+        amostras, acoes = jogar_partida_amostras(assentos_da_partida(nomes, indice, alternar),
+                                                 semente_da_partida(semente, indice), max_turnos, *regras)
+        amostras["acoes"] += total_acoes
+        total_acoes += len(acoes)
+        todas_amostras.append(amostras)
+        todas_acoes.append(acoes)
+    return np.concatenate(todas_amostras), np.concatenate(todas_acoes)
+
+
+def _descrever(dtype: np.dtype) -> list:
+    return json.loads(json.dumps(np.lib.format.dtype_to_descr(dtype)))
+
+
+def _indice_novo() -> dict:
+    return {"formato": FORMATO, "layout": LAYOUT, "amostra": _descrever(AMOSTRA), "acao": _descrever(ACAO),
+            "amostras": 0, "acoes": 0, "execucoes": []}
+
+
+def ler_indice(caminho: str) -> dict:
+    """Lê o índice de um diretório de amostras (ValueError se o layout é outro)"""
+    with open(os.path.join(caminho, INDICE), encoding="utf-8") as arquivo:
+        indice = json.load(arquivo)
+    if indice.get("formato") != FORMATO or indice["amostra"] != _descrever(AMOSTRA) or \
+            indice["acao"] != _descrever(ACAO):
+        raise ValueError(f"{caminho} foi gravado com outro layout de amostras")
+    return indice
+
+
+def _gravar_indice(caminho: str, indice: dict) -> None:
+    """Substitui o índice de uma vez, sem deixá-lo pela metade"""
+    destino = os.path.join(caminho, INDICE)
+    with open(destino + ".tmp", "w", encoding="utf-8") as arquivo:
+        json.dump(indice, arquivo, indent=2, ensure_ascii=False)
+        arquivo.write("\n")
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(destino + ".tmp", destino)
+
+
+def _abrir_para_acrescentar(caminho: str, registros: int, dtype: np.dtype):
+    """Abre um arquivo de registros para acréscimo, descartando o que passa do índice (gravação interrompida)"""
+    with open(caminho, "ab") as arquivo:
+        arquivo.truncate(registros * dtype.itemsize)
+    return open(caminho, "ab")
+
+
+def exportar(caminho: str, nomes: Sequence[str], partidas: int, processos: Optional[int] = None, semente: int = 0,
+             max_turnos: int = 1000, alternar: bool = True, tamanho_lote: Optional[int] = None, baralhos: int = 1,
+             equipes: Optional[Sequence[int]] = None, mortos: int = MORTOS, descarte_inteiro: bool = True) -> int:
+    """Joga 'partidas' partidas em paralelo e acrescenta as amostras ao diretório 'caminho'; retorna quantas
+
+    Os processos jogam lotes de partidas e o processo principal grava cada
+    lote, em ordem, no fim dos arquivos, atualizando o índice depois de cada
+    um: uma exportação interrompida perde só o lote que estava sendo
+    gravado. Uma nova exportação no mesmo diretório continua a numeração
+    das partidas das anteriores com a mesma semente, sem repeti-las.
+    """
+    validar_semente(semente)
+    os.makedirs(caminho, exist_ok=True)
+    indice = ler_indice(caminho) if os.path.exists(os.path.join(caminho, INDICE)) else _indice_novo()
+    primeira = max((e["fim"] for e in indice["execucoes"] if e["semente"] == semente), default=0)
+    execucao = {"semente": semente, "inicio": primeira, "fim": primeira, "estrategias": list(nomes),
+                "alternar": alternar, "baralhos": baralhos, "equipes": list(equipes) if equipes else None,
+                "mortos": mortos, "descarte_inteiro": descarte_inteiro, "data": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    indice["execucoes"].append(execucao)
+
+    processos = processos or os.cpu_count() or 1
+    tamanho_lote = tamanho_lote or max(1, min(100, partidas // (processos * 8)))
+    regras = (baralhos, equipes, mortos, descarte_inteiro)
+    lotes = [(tuple(nomes), semente, inicio, min(inicio + tamanho_lote, primeira + partidas), max_turnos, alternar,
+              regras) for inicio in range(primeira, primeira + partidas, tamanho_lote)]
+
+    arquivo_amostras = _abrir_para_acrescentar(os.path.join(caminho, AMOSTRAS), indice["amostras"], AMOSTRA)
+    arquivo_acoes = _abrir_para_acrescentar(os.path.join(caminho, ACOES), indice["acoes"], ACAO)
+    pool = Pool(processos) if processos > 1 else None
+    gravadas = 0
+    try:
+        resultados = pool.imap(_exportar_lote, lotes) if pool else map(_exportar_lote, lotes)
+        for lote, (amostras, acoes) in zip(lotes, resultados):
+            amostras["acoes"] += indice["acoes"]
+            for arquivo, registros in ((arquivo_acoes, acoes), (arquivo_amostras, amostras)):
+                arquivo.write(registros.tobytes())
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+            indice["amostras"] += len(amostras)
+            indice["acoes"] += len(acoes)
+            execucao["fim"] = lote[3]
+            _gravar_indice(caminho, indice)
+            gravadas += len(amostras)
+    finally:
+        if pool:
+            pool.terminate()
+        arquivo_amostras.close()
+        arquivo_acoes.close()
+    return gravadas
+
+
+class Amostra(NamedTuple):
+    """Uma amostra lida de um ConjuntoAmostras"""
+    estado: np.ndarray  # uint8, no layout de LAYOUT
+    acoes: np.ndarray  # Ações legais (registros ACAO)
+    escolhida: int  # Posição da ação feita em 'acoes'
+    pontos: int
+    pontos_adversarios: int
+    resultado: int
+    partida: int  # Semente da partida
+
+
+def _mapear(caminho: str, dtype: np.dtype, registros: int) -> np.ndarray:
+    if registros == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(caminho, dtype=dtype, mode="r", shape=(registros,))
+
+
+class ConjuntoAmostras:
+    """Amostras gravadas por exportar, com acesso aleatório sem carregar os arquivos na memória
+
+    'amostras' e 'acoes' são os registros mapeados (np.memmap), que podem
+    ser indexados em bloco (por exemplo, conjunto.amostras["estado"][lote]).
+    Só o que o índice conta é mapeado, então uma exportação em andamento no
+    mesmo diretório não atrapalha a leitura.
+    """
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.indice = ler_indice(caminho)
+        self.amostras = _mapear(os.path.join(caminho, AMOSTRAS), AMOSTRA, self.indice["amostras"])
+        self.acoes = _mapear(os.path.join(caminho, ACOES), ACAO, self.indice["acoes"])
+
+    def __len__(self) -> int:
+        return len(self.amostras)
+
+    def __getitem__(self, i: int) -> Amostra:
+        registro = self.amostras[i]
+        inicio = int(registro["acoes"])
+        return Amostra(registro["estado"], self.acoes[inicio:inicio + int(registro["num_acoes"])],
+                       int(registro["escolhida"]), int(registro["pontos"]), int(registro["pontos_adversarios"]),
+                       int(registro["resultado"]), int(registro["partida"]))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Exporta amostras pela linha de comando"""
+    parser = argparse.ArgumentParser(description="Exporta partidas entre estratégias como amostras para treino")
+    parser.add_argument("destino", help="diretório das amostras (criado, ou acrescido se já existe)")
+    parser.add_argument("-n", "--partidas", type=int, default=1000, help="número de partidas")
+    parser.add_argument("-j", "--processos", type=int, default=None, help="processos (padrão: todos os núcleos)")
+    parser.add_argument("-s", "--semente", type=int, default=0, help="semente geral (continua de onde parou)")
+    parser.add_argument("-e", "--estrategias", nargs="+", default=["gulosa", "gulosa"],
+                        help="estratégias de 2 a 4 jogadores (nome registrado ou modulo:Classe)")
+    parser.add_argument("-b", "--baralhos", type=int, default=1, help="baralhos de 54 cartas")
+    parser.add_argument("--parcerias", action="store_true", help="com 4 jogadores, joga em duplas")
+    parser.add_argument("-m", "--mortos", type=int, default=MORTOS, help="mortos separados na distribuição")
+    parser.add_argument("--descarte-topo", action="store_true", help="comprar do descarte leva só a carta do topo")
+    parser.add_argument("--max-turnos", type=int, default=1000, help="limite de turnos por partida")
+    args = parser.parse_args(argv)
+    if not 2 <= len(args.estrategias) <= MAX_JOGADORES:
+        parser.error(f"informe de 2 a {MAX_JOGADORES} estratégias")
+    if args.parcerias and len(args.estrategias) != 4:
+        parser.error("--parcerias exige 4 estratégias")
+    if args.baralhos > 3:
+        parser.error(f"até 3 baralhos (as ações guardam até {MAX_CARTAS_ACAO} cartas)")
+    equipes = (0, 1, 0, 1) if args.parcerias else None
+    try:
+        validar_semente(args.semente)
+        Jogo(0, nomes=args.estrategias, baralhos=args.baralhos, equipes=equipes, mortos=args.mortos)
+    except ValueError as erro:
+        parser.error(str(erro))
+
+    inicio = time.perf_counter()
+    gravadas = exportar(args.destino, args.estrategias, args.partidas, args.processos, args.semente,
+                        args.max_turnos, baralhos=args.baralhos, equipes=equipes, mortos=args.mortos,
+                        descarte_inteiro=not args.descarte_topo)
+    duracao = time.perf_counter() - inicio
+    indice = ler_indice(args.destino)
+    print(f"{gravadas} amostras de {args.partidas} partidas em {duracao:.1f}s ({gravadas / duracao:.0f} por segundo)")
+    print(f"{args.destino}: {indice['amostras']} amostras e {indice['acoes']} ações legais, "
+          f"{AMOSTRA.itemsize} + {ACAO.itemsize} bytes por registro")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,45 @@
+import json
+import os
+from typing import Optional, Tuple
+from constants import FONT_SIZE, SMALL_FONT_SIZE
+
+# Fonte da interface; se não estiver instalada, usa a fonte que acompanha o Pygame
+FONTE = "arial"
+# Onde fica guardado o caminho de cada fonte já procurada (a busca percorre as fontes do sistema)
+CACHE = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                     "buraco", "fontes.json")
+
+
+def caminho_fonte(nome: str = FONTE, cache: str = CACHE) -> Optional[str]:
+    """Caminho do arquivo de uma fonte do sistema (None se ela não existe), procurado só na primeira vez
+
+    BURACO_FONTE aponta direto para um arquivo .ttf e dispensa a busca. O
+    resultado da busca (inclusive "não encontrada") fica guardado em 'cache';
+    apague o arquivo para procurar de novo depois de instalar fontes.
+    """
+    if os.environ.get("BURACO_FONTE"):
+        return os.environ["BURACO_FONTE"]
+    try:
+        with open(cache, encoding="utf-8") as arquivo:
+            guardados = json.load(arquivo)
+    except (OSError, ValueError):
+        guardados = {}
+    if nome in guardados and (guardados[nome] is None or os.path.exists(guardados[nome])):
+        return guardados[nome]
+
+    import pygame.sysfont
+    guardados[nome] = pygame.sysfont.match_font(nome)
+    try:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        with open(cache, "w", encoding="utf-8") as arquivo:
+            json.dump(guardados, arquivo)
+    except OSError:
+        pass  # Sem cache (disco somente leitura): a busca se repete na próxima vez
+    return guardados[nome]
+
+
+def carregar_fontes(tamanho: int = FONT_SIZE, pequeno: int = SMALL_FONT_SIZE) -> Tuple['pygame.font.Font', 'pygame.font.Font']:
+    """Fonte normal e pequena da interface (requer pygame.font.init())"""
+    import pygame
+    caminho = caminho_fonte()
+    return pygame.font.Font(caminho, tamanho), pygame.font.Font(caminho, pequeno)
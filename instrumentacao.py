@@ -0,0 +1,250 @@
+import functools
+import importlib
+import json
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# Métodos medidos quando a instrumentação está ligada: (módulo, classe, método, rótulo).
+# Os tempos são inclusivos: o de "quadro" contém os de desenhar_mao, desenhar_agrupamentos etc.
+# Os da interface só são medidos com uma Interface, para que sem ela o Pygame nem seja importado.
+ALVOS_INTERFACE: Tuple[Tuple[str, str, str, str], ...] = (
+    ("interface", "Interface", "processar_clique", "processar_clique"),
+    ("interface", "Interface", "desenhar_monte", "monte.desenhar"),
+    ("interface", "Interface", "desenhar_mao", "desenhar_mao"),
+    ("interface", "Interface", "desenhar_agrupamentos", "desenhar_agrupamentos"),
+    ("interface", "Interface", "desenhar_botoes_acao", "desenhar_botoes_acao"),
+    ("renderizador", "Renderizador", "desenhar", "renderizador.desenhar"),
+)
+ALVOS_REGRAS: Tuple[Tuple[str, str, str, str], ...] = (
+    ("agrupamento", "Agrupamento", "adicionar_carta", "regras.adicionar_carta"),
+    ("agrupamento", "Agrupamento", "validar", "regras.validar"),
+    ("jogo", "Jogo", "verificar_fim_jogo", "regras.verificar_fim_jogo"),
+    ("legais", "GeradorAcoes", "acoes", "regras.acoes_legais"),
+    ("jogador", "Jogador", "get_pontos", "pontos.jogador"),
+    ("agrupamento", "Agrupamento", "get_pontos", "pontos.agrupamento"),
+    ("mao", "Mao", "get_pontos", "pontos.mao"),
+)
+# O quadro inteiro: além do tempo, fecha as contagens de desenho do quadro
+ALVO_QUADRO = ("interface", "Interface", "desenhar", "quadro")
+AMOSTRAS = 1000  # Últimas medições guardadas por temporizador, para os percentis
+FORMATO = 1  # Versão do formato do arquivo exportado
+
+
+def _percentil(valores: List[float], fracao: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(fracao * len(ordenados)))]
+
+
+class Temporizador:
+    """Chamadas, tempo total e maior tempo de um trecho, com as últimas amostras para os percentis"""
+    def __init__(self, amostras: int = AMOSTRAS):
+        self.chamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.amostras: Deque[float] = deque(maxlen=amostras)
+
+    def registrar(self, duracao: float) -> None:
+        self.chamadas += 1
+        self.total += duracao
+        if duracao > self.maximo:
+            self.maximo = duracao
+        self.amostras.append(duracao)
+
+    def resumo(self) -> dict:
+        """Totais e percentis (em microssegundos) das amostras guardadas"""
+        amostras = list(self.amostras)
+        return {
+            "chamadas": self.chamadas,
+            "total_ms": 1000 * self.total,
+            "media_us": 1e6 * self.total / max(self.chamadas, 1),
+            "p50_us": 1e6 * _percentil(amostras, 0.5),
+            "p99_us": 1e6 * _percentil(amostras, 0.99),
+            "max_us": 1e6 * self.maximo,
+        }
+
+
+class _Contado:
+    """Repassa tudo a um objeto do Pygame, contando as chamadas de alguns métodos
+
+    Objetos do Pygame (fontes, a tela) não aceitam atributos novos, então a
+    contagem é feita por um intermediário colocado no lugar deles enquanto a
+    instrumentação está ligada.
+    """
+    def __init__(self, objeto, metodos: Tuple[str, ...], contar: Callable[[], None]):
+        self._objeto = objeto
+        for metodo in metodos:
+            setattr(self, metodo, self._contando(getattr(objeto, metodo), contar))
+
+    @staticmethod
+    def _contando(funcao: Callable, contar: Callable[[], None]) -> Callable:
+        def contando(*args, **kwargs):
+            contar()
+            return funcao(*args, **kwargs)
+        return contando
+
+    def __getattr__(self, nome: str):
+        return getattr(self._objeto, nome)
+
+
+class Instrumentacao:
+    """Temporizadores e contadores nos pontos mais usados da interface e das regras
+
+    Ligar substitui os métodos de ALVOS_REGRAS (e, com uma Interface, os de
+    ALVOS_INTERFACE) por versões que medem o tempo de cada chamada; desligar
+    devolve os originais, de modo que desligada a instrumentação não custa
+    nada. Com uma Interface, também conta as chamadas de desenho (blit e
+    fill na tela) e as renderizações de fonte de cada quadro, e passa a
+    desenhar um painel com esses números.
+    """
+    _ligada: Optional['Instrumentacao'] = None  # Os métodos são trocados nas classes: só uma pode estar ligada
+
+    def __init__(self, amostras: int = AMOSTRAS):
+        self.amostras = amostras
+        self.temporizadores: Dict[str, Temporizador] = {}
+        self.quadros: Deque[Tuple[float, int, int]] = deque(maxlen=amostras)  # (duração, desenhos, fontes)
+        self.desenhos = 0  # Chamadas de desenho na tela desde que ligou
+        self.fontes = 0  # Renderizações de fonte desde que ligou
+        self.interface = None
+        self._originais: List[Tuple[type, str, Callable]] = []
+        self._substituidos: List[Tuple[object, str, object]] = []
+
+    @property
+    def ativa(self) -> bool:
+        return Instrumentacao._ligada is self
+
+    def ligar(self, interface=None) -> None:
+        """Começa a medir (e, com uma Interface, a contar os desenhos e mostrar o painel)"""
+        if Instrumentacao._ligada is not None:
+            if self.ativa:
+                return
+            raise RuntimeError("Outra instrumentação já está ligada")
+        Instrumentacao._ligada = self
+        alvos = ALVOS_REGRAS + (ALVOS_INTERFACE + (ALVO_QUADRO,) if interface is not None else ())
+        for modulo, classe, metodo, rotulo in alvos:
+            alvo = getattr(importlib.import_module(modulo), classe)
+            original = alvo.__dict__[metodo]
+            self._originais.append((alvo, metodo, original))
+            medido = self._quadro(original) if rotulo == ALVO_QUADRO[3] else self._medir(rotulo, original)
+            setattr(alvo, metodo, medido)
+        if interface is not None:
+            self.interface = interface
+            interface.instrumentacao = self
+            self._substituir(interface.sprites, "font", ("render",), self._contar_fonte)
+            self._substituir(interface.sprites, "small_font", ("render",), self._contar_fonte)
+            self._substituir(interface.renderizador, "screen", ("blit", "fill"), self._contar_desenho)
+
+    def desligar(self) -> None:
+        """Devolve os métodos e objetos originais; os números medidos continuam disponíveis"""
+        if not self.ativa:
+            return
+        for alvo, metodo, original in reversed(self._originais):
+            setattr(alvo, metodo, original)
+        for dono, atributo, original in reversed(self._substituidos):
+            setattr(dono, atributo, original)
+        self._originais = []
+        self._substituidos = []
+        if self.interface is not None:
+            self.interface.instrumentacao = None
+            self.interface = None
+        Instrumentacao._ligada = None
+
+    def alternar(self, interface=None) -> bool:
+        """Liga ou desliga e retorna se ficou ligada"""
+        if self.ativa:
+            self.desligar()
+        else:
+            self.ligar(interface)
+        return self.ativa
+
+    def _substituir(self, dono: object, atributo: str, metodos: Tuple[str, ...], contar: Callable[[], None]) -> None:
+        original = getattr(dono, atributo)
+        self._substituidos.append((dono, atributo, original))
+        setattr(dono, atributo, _Contado(original, metodos, contar))
+
+    def _contar_fonte(self) -> None:
+        self.fontes += 1
+
+    def _contar_desenho(self) -> None:
+        self.desenhos += 1
+
+    def _temporizador(self, rotulo: str) -> Temporizador:
+        if rotulo not in self.temporizadores:
+            self.temporizadores[rotulo] = Temporizador(self.amostras)
+        return self.temporizadores[rotulo]
+
+    def _medir(self, rotulo: str, funcao: Callable) -> Callable:
+        temporizador = self._temporizador(rotulo)
+        relogio = time.perf_counter
+
+        @functools.wraps(funcao)
+        def medido(*args, **kwargs):
+            inicio = relogio()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                temporizador.registrar(relogio() - inicio)
+        return medido
+
+    def _quadro(self, funcao: Callable) -> Callable:
+        temporizador = self._temporizador(ALVO_QUADRO[3])
+        relogio = time.perf_counter
+
+        @functools.wraps(funcao)
+        def quadro(*args, **kwargs):
+            desenhos, fontes = self.desenhos, self.fontes
+            inicio = relogio()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                duracao = relogio() - inicio
+                temporizador.registrar(duracao)
+                self.quadros.append((duracao, self.desenhos - desenhos, self.fontes - fontes))
+        return quadro
+
+    def resumo_quadros(self) -> dict:
+        """Percentis do tempo de quadro (ms) e médias de desenhos e fontes por quadro, nos últimos quadros"""
+        quadros = list(self.quadros)
+        n = max(len(quadros), 1)
+        duracoes = [q[0] for q in quadros]
+        return {
+            "quadros": len(quadros),
+            "p50_ms": 1000 * _percentil(duracoes, 0.5),
+            "p99_ms": 1000 * _percentil(duracoes, 0.99),
+            "desenhos_por_quadro": sum(q[1] for q in quadros) / n,
+            "fontes_por_quadro": sum(q[2] for q in quadros) / n,
+            "ultimo": {"ms": 1000 * quadros[-1][0], "desenhos": quadros[-1][1], "fontes": quadros[-1][2]}
+            if quadros else None,
+        }
+
+    def resumo(self) -> dict:
+        """Tudo o que foi medido, pronto para JSON"""
+        return {
+            "formato": FORMATO,
+            "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "temporizadores": {rotulo: t.resumo() for rotulo, t in sorted(self.temporizadores.items())},
+            "quadros": self.resumo_quadros(),
+            "historico_quadros": [[1000 * duracao, desenhos, fontes] for duracao, desenhos, fontes in self.quadros],
+        }
+
+    def linhas_painel(self) -> List[str]:
+        """Texto do painel: tempos de quadro, desenhos e fontes, e os trechos mais caros"""
+        quadros = self.resumo_quadros()
+        linhas = [f"quadro p50 {quadros['p50_ms']:.2f} ms  p99 {quadros['p99_ms']:.2f} ms  ({quadros['quadros']})"]
+        if quadros["ultimo"]:
+            linhas.append(f"desenhos {quadros['ultimo']['desenhos']}  fontes {quadros['ultimo']['fontes']}  "
+                          f"(média {quadros['desenhos_por_quadro']:.1f} / {quadros['fontes_por_quadro']:.1f})")
+        caros = sorted(((t.total, rotulo, t) for rotulo, t in self.temporizadores.items()
+                        if rotulo != ALVO_QUADRO[3] and t.chamadas), key=lambda x: x[0], reverse=True)
+        for _, rotulo, t in caros[:5]:
+            resumo = t.resumo()
+            linhas.append(f"{rotulo} {resumo['p50_us']:.0f}/{resumo['p99_us']:.0f} µs x{t.chamadas}")
+        return linhas
+
+    def exportar(self, caminho: str) -> None:
+        """Grava o resumo em JSON, para análise fora do jogo"""
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(self.resumo(), arquivo, indent=2, ensure_ascii=False)
+            arquivo.write("\n")
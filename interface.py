@@ -0,0 +1,305 @@
+import pygame
+from typing import List, Optional, Tuple
+from constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, CARD_WIDTH, CARD_HEIGHT, MARGIN,
+    BACKGROUND_COLOR, WHITE, BLACK, BLUE, GREEN, YELLOW
+)
+from carta import Carta
+from agrupamento import Agrupamento
+from jogador import Jogador
+from jogo import Jogo
+from sprites import CacheSuperficies
+from renderizador import Camada, Renderizador
+
+PAINEL_BORDA = 6  # Margem interna do painel da instrumentação, em pixels
+
+class Interface:
+    """Camada visual (pygame) que desenha e controla um Jogo"""
+    def __init__(self, jogo: Jogo, screen: pygame.Surface, font: pygame.font.Font, small_font: pygame.font.Font,
+                 pre_renderizar: bool = True):
+        self.jogo = jogo
+        self.screen = screen
+        self.font = font
+        self.small_font = small_font
+        # Cartas, botões e textos são compostos uma vez e reaproveitados a cada quadro
+        # Sem pre_renderizar, as cartas são compostas quando aparecem pela primeira vez
+        self.sprites = CacheSuperficies(font, small_font)
+        if pre_renderizar:
+            self.sprites.pre_renderizar()
+        # Camadas do quadro atual; o renderizador só repinta o que mudou desde o anterior
+        self.camadas: List[Camada] = []
+        self.renderizador = Renderizador(screen, BACKGROUND_COLOR)
+        self.rect_compra = pygame.Rect(MARGIN, SCREEN_HEIGHT // 2 - CARD_HEIGHT // 2, CARD_WIDTH, CARD_HEIGHT)
+        self.rect_descarte = pygame.Rect(MARGIN + CARD_WIDTH + MARGIN, SCREEN_HEIGHT // 2 - CARD_HEIGHT // 2, CARD_WIDTH, CARD_HEIGHT)
+        # Posições desenhadas no último quadro, usadas para identificar cliques
+        self.rects_mao: List[Tuple[pygame.Rect, Carta]] = []
+        self.rects_agrupamentos: List[Tuple[pygame.Rect, Agrupamento]] = []
+        self.botao_formar_agrupamento_rect: Optional[pygame.Rect] = None
+        self.botao_descartar_rect: Optional[pygame.Rect] = None
+        self.botao_adicionar_agrupamento_rect: Optional[pygame.Rect] = None
+        self.botao_desfazer_rect: Optional[pygame.Rect] = None
+        self.botao_reiniciar_rect: Optional[pygame.Rect] = None
+        # Instrumentação ligada nesta interface (ver instrumentacao.py); com ela, o painel é desenhado por cima
+        self.instrumentacao = None
+
+    def _camada(self, superficie: pygame.Surface, pos: Tuple[int, int]) -> pygame.Rect:
+        """Coloca uma superfície no quadro atual e retorna o retângulo ocupado"""
+        rect = superficie.get_rect(topleft=pos)
+        self.camadas.append((superficie, rect))
+        return rect
+
+    def desenhar_carta(self, carta: Carta, x: int, y: int, selecionada: bool = False, virada: bool = False) -> pygame.Rect:
+        """Desenha uma carta na tela e retorna o retângulo ocupado"""
+        superficie = self.sprites.verso() if virada else self.sprites.carta(carta, selecionada)
+        return self._camada(superficie, (x, y))
+
+    def desenhar_agrupamento(self, agrupamento: Agrupamento, x: int, y: int) -> pygame.Rect:
+        """Desenha um agrupamento na tela e retorna o retângulo ocupado"""
+        largura = CARD_WIDTH * min(7, len(agrupamento.cartas))
+        # Muda a cor de fundo se estiver selecionado
+        cor_fundo = GREEN if agrupamento.selecionado else WHITE
+        rect = self._camada(self.sprites.retangulo((largura, CARD_HEIGHT), cor_fundo), (x, y))
+
+        for i, carta in enumerate(agrupamento.cartas[:7]):  # Limita a mostrar 7 cartas
+            self.desenhar_carta(carta, x + i * (CARD_WIDTH - 20), y)
+
+        if len(agrupamento.cartas) > 7:
+            texto = self.sprites.texto(f"+{len(agrupamento.cartas)-7}", BLACK, pequeno=True)
+            self._camada(texto, (x + 7 * (CARD_WIDTH - 20) + 10, y + CARD_HEIGHT // 2 - 10))
+        return rect
+
+    def desenhar_mao(self, jogador: Jogador, x: int, y: int) -> None:
+        """Desenha a mão do jogador na tela"""
+        self.rects_mao = []
+
+        # Calcula a sobreposição necessária para caber todas as cartas na tela
+        num_cartas = len(jogador.mao)
+        if num_cartas == 0:
+            return
+
+        # Calcula a sobreposição entre cartas para caber na tela
+        sobreposicao = max(20, (num_cartas * (CARD_WIDTH - 20) - (SCREEN_WIDTH - x - MARGIN)) // num_cartas + 20)
+        sobreposicao = min(sobreposicao, CARD_WIDTH - 10)  # Limita a sobreposição
+
+        for i, carta in enumerate(jogador.mao):
+            selecionada = carta in jogador.selecionadas
+            rect = self.desenhar_carta(carta, x + i * (CARD_WIDTH - sobreposicao), y, selecionada)
+            self.rects_mao.append((rect, carta))
+
+    def desenhar_agrupamentos(self, jogador: Jogador, x: int, y: int) -> None:
+        """Desenha os agrupamentos do jogador na tela"""
+        self.rects_agrupamentos = []
+        for i, agrupamento in enumerate(jogador.agrupamentos):
+            rect = self.desenhar_agrupamento(agrupamento, x, y + i * (CARD_HEIGHT + MARGIN))
+            self.rects_agrupamentos.append((rect, agrupamento))
+
+    def desenhar_monte(self) -> None:
+        """Desenha o monte e o descarte na tela"""
+        monte = self.jogo.monte
+
+        # Desenha o monte de compra (acabado, a próxima compra abre um morto)
+        self._camada(self._pilha("Compra" if monte.cartas or not monte.mortos else "Morto"), self.rect_compra.topleft)
+
+        # Desenha a pilha de descarte
+        if monte.descarte:
+            self.desenhar_carta(monte.topo_descarte(), self.rect_descarte.x, self.rect_descarte.y)
+        else:
+            self._camada(self._pilha("Descarte"), self.rect_descarte.topleft)
+
+    def _pilha(self, texto: str) -> pygame.Surface:
+        """Superfície de uma pilha identificada por um texto (monte de compra ou descarte vazio)"""
+        return self.sprites.botao(texto, (CARD_WIDTH, CARD_HEIGHT), WHITE, pequeno=False, margem_topo=CARD_HEIGHT // 2 - 10)
+
+    def selecionar_carta(self, pos: Tuple[int, int]) -> bool:
+        """Seleciona/desseleciona uma carta com base na posição do clique"""
+        jogador = self.jogo.jogador_atual_obj()
+        for rect, carta in reversed(self.rects_mao):  # Verifica de trás para frente para pegar a carta no topo
+            if rect.collidepoint(pos):
+                jogador.alternar_selecao(carta)
+                return True
+        return False
+
+    def selecionar_agrupamento(self, pos: Tuple[int, int]) -> bool:
+        """Seleciona um agrupamento com base na posição do clique"""
+        jogador = self.jogo.jogador_atual_obj()
+        for rect, agrupamento in self.rects_agrupamentos:
+            if rect.collidepoint(pos):
+                jogador.selecionar_agrupamento(agrupamento)
+                return True
+
+        # Se clicou fora de qualquer agrupamento, desseleciona todos
+        jogador.selecionar_agrupamento(None)
+        return False
+
+    def processar_clique(self, pos: Tuple[int, int]) -> None:
+        """Processa um clique na tela"""
+        jogo = self.jogo
+
+        if jogo.estado == "inicio":
+            jogo.iniciar()
+            return
+
+        if jogo.estado == "fim":
+            if self.botao_reiniciar_rect and self.botao_reiniciar_rect.collidepoint(pos):
+                jogo.reiniciar()
+            return
+
+        jogador = jogo.jogador_atual_obj()
+
+        # Verifica se clicou em uma carta da mão
+        if self.selecionar_carta(pos):
+            return
+
+        # Verifica se clicou em um agrupamento
+        if self.selecionar_agrupamento(pos):
+            return
+
+        # Verifica se clicou no monte de compra
+        if self.rect_compra.collidepoint(pos):
+            jogo.comprar_do_monte()
+            return
+
+        # Verifica se clicou no descarte
+        if self.rect_descarte.collidepoint(pos) and jogo.monte.topo_descarte():
+            jogo.comprar_do_descarte()
+            return
+
+        # Verifica se clicou no botão de formar agrupamento
+        if self.botao_formar_agrupamento_rect and self.botao_formar_agrupamento_rect.collidepoint(pos):
+            jogo.formar_agrupamento_selecionado()
+            return
+
+        # Verifica se clicou no botão de adicionar ao agrupamento
+        if self.botao_adicionar_agrupamento_rect and self.botao_adicionar_agrupamento_rect.collidepoint(pos):
+            jogo.adicionar_ao_agrupamento_selecionado()
+            return
+
+        # Verifica se clicou no botão de desfazer
+        if self.botao_desfazer_rect and self.botao_desfazer_rect.collidepoint(pos):
+            jogo.desfazer_ultima()
+            return
+
+        # Verifica se clicou no botão de descartar
+        if self.botao_descartar_rect and self.botao_descartar_rect.collidepoint(pos) and jogador.selecionadas:
+            jogo.descartar_selecionada()
+            return
+
+    def desenhar(self) -> List[pygame.Rect]:
+        """Desenha toda a interface do jogo e retorna as regiões da tela que foram atualizadas"""
+        self.camadas = []
+
+        if self.jogo.estado == "inicio":
+            self.desenhar_tela_inicio()
+        elif self.jogo.estado == "jogando":
+            self.desenhar_tela_jogo()
+        elif self.jogo.estado == "fim":
+            self.desenhar_tela_fim()
+
+        if self.instrumentacao is not None:
+            self.desenhar_painel()
+
+        return self.renderizador.desenhar(self.camadas)
+
+    def desenhar_painel(self) -> None:
+        """Desenha o painel da instrumentação (tempos de quadro, desenhos e fontes) no canto superior esquerdo
+
+        O texto é renderizado com a fonte da interface, fora do cache de
+        sprites, para não entrar na contagem de fontes do quadro.
+        """
+        linhas = [self.small_font.render(linha, True, WHITE) for linha in self.instrumentacao.linhas_painel()]
+        altura_linha = self.small_font.get_linesize()
+        painel = pygame.Surface((max(l.get_width() for l in linhas) + 2 * PAINEL_BORDA,
+                                 altura_linha * len(linhas) + 2 * PAINEL_BORDA))
+        painel.fill(BLACK)
+        for i, linha in enumerate(linhas):
+            painel.blit(linha, (PAINEL_BORDA, PAINEL_BORDA + i * altura_linha))
+        self._camada(painel, (MARGIN, MARGIN + 40))
+
+    def desenhar_tela_inicio(self) -> None:
+        """Desenha a tela de início"""
+        titulo = self.sprites.texto("Buraco Simplificado", WHITE)
+        subtitulo = self.sprites.texto("Clique para começar", WHITE)
+
+        self._camada(titulo, (SCREEN_WIDTH // 2 - titulo.get_width() // 2, SCREEN_HEIGHT // 3))
+        self._camada(subtitulo, (SCREEN_WIDTH // 2 - subtitulo.get_width() // 2, SCREEN_HEIGHT // 2))
+
+    def desenhar_tela_jogo(self) -> None:
+        """Desenha a tela de jogo"""
+        # Desenha o monte e descarte
+        self.desenhar_monte()
+
+        # Desenha a mão do jogador atual
+        jogador = self.jogo.jogador_atual_obj()
+        self.desenhar_mao(jogador, MARGIN, SCREEN_HEIGHT - CARD_HEIGHT - MARGIN)
+
+        # Desenha os agrupamentos do jogador atual
+        self.desenhar_agrupamentos(jogador, SCREEN_WIDTH // 2, MARGIN)
+
+        # Desenha botões de ação
+        self.desenhar_botoes_acao()
+
+        # Desenha mensagem
+        if self.jogo.mensagem:
+            texto_msg = self.sprites.texto(self.jogo.mensagem, WHITE)
+            self._camada(texto_msg, (MARGIN, MARGIN))
+
+        # Desenha nome do jogador atual
+        texto_jogador = self.sprites.texto(f"Jogador atual: {jogador.nome}", WHITE)
+        self._camada(texto_jogador, (SCREEN_WIDTH - texto_jogador.get_width() - MARGIN, MARGIN))
+
+    def desenhar_botao(self, rect: pygame.Rect, texto: str, cor: Tuple[int, int, int]) -> None:
+        """Desenha um botão com o texto centralizado"""
+        self._camada(self.sprites.botao(texto, rect.size, cor), rect.topleft)
+
+    def desenhar_botoes_acao(self) -> None:
+        """Desenha os botões de ação"""
+        jogador = self.jogo.jogador_atual_obj()
+
+        # Posiciona os botões acima da mão do jogador
+        pos_y = SCREEN_HEIGHT - CARD_HEIGHT - MARGIN - 100
+
+        # Botão para desfazer a última ação do turno
+        self.botao_desfazer_rect = pygame.Rect(SCREEN_WIDTH - 220, pos_y - 50, 200, 40)
+        cor_botao = WHITE if self.jogo.pode_desfazer() else (200, 200, 200)
+        self.desenhar_botao(self.botao_desfazer_rect, "Desfazer", cor_botao)
+
+        # Botão para formar agrupamento
+        self.botao_formar_agrupamento_rect = pygame.Rect(SCREEN_WIDTH - 220, pos_y, 200, 40)
+        cor_botao = WHITE if len(jogador.selecionadas) >= 3 else (200, 200, 200)
+        self.desenhar_botao(self.botao_formar_agrupamento_rect, "Formar Novo Agrupamento", cor_botao)
+
+        # Botão para adicionar a agrupamento existente
+        self.botao_adicionar_agrupamento_rect = pygame.Rect(SCREEN_WIDTH - 220, pos_y + 50, 200, 40)
+        cor_botao = GREEN if jogador.agrupamento_selecionado and jogador.selecionadas else (200, 200, 200)
+        self.desenhar_botao(self.botao_adicionar_agrupamento_rect, "Adicionar ao Agrupamento", cor_botao)
+
+        # Botão para descartar
+        self.botao_descartar_rect = pygame.Rect(SCREEN_WIDTH - 220, pos_y + 100, 200, 40)
+        cor_botao = BLUE if jogador.selecionadas and jogador.comprou_carta else (200, 200, 200)
+        self.desenhar_botao(self.botao_descartar_rect, "Descartar", cor_botao)
+
+    def desenhar_tela_fim(self) -> None:
+        """Desenha a tela de fim de jogo"""
+        titulo = self.sprites.texto("Fim de Jogo!", WHITE)
+        self._camada(titulo, (SCREEN_WIDTH // 2 - titulo.get_width() // 2, MARGIN))
+
+        # Determina o vencedor
+        vencedor = self.jogo.vencedor()
+        texto = f"{vencedor.equipe.nome} venceu!" if vencedor else "Empate!"
+        texto_vencedor = self.sprites.texto(texto, YELLOW)
+        self._camada(texto_vencedor, (SCREEN_WIDTH // 2 - texto_vencedor.get_width() // 2, MARGIN * 3))
+
+        # Mostra pontuações (de cada equipe; sem parcerias, de cada jogador)
+        for i, equipe in enumerate(self.jogo.equipes):
+            texto_pontos = self.sprites.texto(f"{equipe.nome}: {equipe.get_pontos()} pontos", WHITE)
+            self._camada(texto_pontos, (SCREEN_WIDTH // 2 - texto_pontos.get_width() // 2, SCREEN_HEIGHT // 2 - 50 + i * 60))
+
+        # Botão para jogar novamente
+        self.botao_reiniciar_rect = pygame.Rect(
+            SCREEN_WIDTH // 2 - CARD_WIDTH,
+            SCREEN_HEIGHT - 100,
+            CARD_WIDTH * 2,
+            50
+        )
+        self._camada(self.sprites.botao("Jogar Novamente", self.botao_reiniciar_rect.size, WHITE, pequeno=False),
+                     self.botao_reiniciar_rect.topleft)
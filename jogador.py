@@ -1,24 +1,97 @@
-from typing import List, Optional, Tuple
-from constants import CARD_WIDTH, SCREEN_WIDTH, MARGIN
+from typing import List, Optional
 from carta import Carta
 from agrupamento import Agrupamento
+from constants import VERIFICAR_CACHE
+from mao import Mao
+from solucionador import Jogada, melhor_jogada
+
+class Equipe:
+    """Agrupamentos de uma equipe, compartilhados pelos parceiros (sem parcerias, cada jogador é uma equipe)"""
+    def __init__(self, indice: int = 0):
+        self.indice = indice
+        self.agrupamentos: List[Agrupamento] = []
+        self.pontos_agrupamentos: int = 0  # Soma de get_pontos() dos agrupamentos
+        self.membros: List['Jogador'] = []
+
+    @property
+    def nome(self) -> str:
+        return " e ".join(membro.nome for membro in self.membros)
+
+    def copiar(self) -> 'Equipe':
+        """Retorna uma cópia com os agrupamentos copiados e sem membros (quem copia os jogadores os inclui)"""
+        copia = Equipe(self.indice)
+        copia.agrupamentos = [g.copiar() for g in self.agrupamentos]
+        copia.pontos_agrupamentos = self.pontos_agrupamentos
+        return copia
+
+    def get_pontos(self) -> int:
+        """Pontos da equipe: os agrupamentos menos as cartas na mão de todos os parceiros"""
+        return self.pontos_agrupamentos - sum(membro.mao.get_pontos() for membro in self.membros)
+
+    def tem_canastra(self) -> bool:
+        """Verifica se a equipe tem pelo menos uma canastra"""
+        return any(g.eh_canastra() for g in self.agrupamentos)
+
 
 class Jogador:
-    """Classe que representa um jogador"""
-    def __init__(self, nome: str):
+    """Classe que representa um jogador
+
+    Os agrupamentos (e os seus pontos) pertencem à equipe do jogador: os
+    parceiros baixam e estendem os mesmos agrupamentos.
+    """
+    def __init__(self, nome: str, equipe: Optional[Equipe] = None):
         self.nome = nome
-        self.mao: List[Carta] = []
-        self.agrupamentos: List[Agrupamento] = []
+        self.mao: Mao = Mao()
+        self.equipe: Equipe = equipe if equipe is not None else Equipe()
+        self.equipe.membros.append(self)
         self.pontos: int = 0
         self.selecionadas: List[Carta] = []
         self.agrupamento_selecionado: Optional[Agrupamento] = None
         self.comprou_carta: bool = False  # Controla se já comprou uma carta no turno
     
+    @property
+    def agrupamentos(self) -> List[Agrupamento]:
+        """Agrupamentos da equipe do jogador"""
+        return self.equipe.agrupamentos
+    
+    @property
+    def pontos_agrupamentos(self) -> int:
+        """Soma de get_pontos() dos agrupamentos da equipe"""
+        return self.equipe.pontos_agrupamentos
+    
+    @pontos_agrupamentos.setter
+    def pontos_agrupamentos(self, pontos: int) -> None:
+        self.equipe.pontos_agrupamentos = pontos
+    
+    def copiar(self, equipe: Optional[Equipe] = None) -> 'Jogador':
+        """Retorna uma cópia independente do jogador (mão, agrupamentos e seleção)
+
+        Com 'equipe' (a cópia da equipe, já feita para um parceiro), a cópia
+        entra nela; sem, a equipe também é copiada.
+        """
+        copia = Jogador.__new__(Jogador)
+        copia.__dict__.update(self.__dict__)
+        copia.mao = self.mao.copiar()
+        copia.equipe = equipe if equipe is not None else self.equipe.copiar()
+        copia.equipe.membros.append(copia)
+        copia.selecionadas = self.selecionadas.copy()
+        copia.agrupamento_selecionado = None
+        if self.agrupamento_selecionado is not None:
+            indice = self.agrupamentos.index(self.agrupamento_selecionado)
+            copia.agrupamento_selecionado = copia.agrupamentos[indice]
+            copia.agrupamento_selecionado.selecionado = True
+        return copia
+    
     def receber_carta(self, carta: Carta) -> None:
         """Adiciona uma carta à mão do jogador"""
         self.mao.append(carta)
         self.comprou_carta = True
-    
+
+    def receber_cartas(self, cartas: List[Carta]) -> None:
+        """Adiciona várias cartas à mão do jogador (por exemplo, a pilha de descarte)"""
+        self.mao.extend(cartas)
+        self.comprou_carta = True
+
     def descartar(self, carta: Carta) -> Carta:
         """Descarta uma carta da mão do jogador"""
         if carta in self.mao:
@@ -31,88 +104,100 @@ class Jogador:
         agrupamento = Agrupamento(cartas)
         if agrupamento.validar():
             self.agrupamentos.append(agrupamento)
+            self.pontos_agrupamentos += agrupamento.get_pontos()
             for carta in cartas:
                 if carta in self.mao:
                     self.mao.remove(carta)
             return True
         return False
     
+    def estender_agrupamento(self, agrupamento: Agrupamento, carta: Carta) -> bool:
+        """Passa uma carta da mão para um agrupamento do jogador"""
+        if carta not in self.mao:
+            return False
+        antes = agrupamento.get_pontos()
+        if not agrupamento.adicionar_carta(carta):
+            return False
+        self.pontos_agrupamentos += agrupamento.get_pontos() - antes
+        self.mao.remove(carta)
+        return True
+    
     def get_pontos(self) -> int:
-        """Calcula a pontuação do jogador"""
-        pontos_agrupamentos = sum(g.get_pontos() for g in self.agrupamentos)
-        pontos_mao = sum(c.get_pontos() for c in self.mao)
-        return pontos_agrupamentos - pontos_mao
+        """Calcula a pontuação do jogador: os agrupamentos da equipe menos a própria mão"""
+        # Direto na equipe: a propriedade pontos_agrupamentos custaria uma chamada a mais neste caminho quente
+        pontos = self.equipe.pontos_agrupamentos - self.mao.get_pontos()
+        if VERIFICAR_CACHE:
+            recalculado = sum(g.get_pontos() for g in self.agrupamentos) - sum(c.get_pontos() for c in self.mao)
+            if recalculado != pontos:
+                raise RuntimeError(f"Pontos de {self.nome} desatualizados: {pontos} != {recalculado}")
+        return pontos
     
     def tem_canastra(self) -> bool:
-        """Verifica se o jogador tem pelo menos uma canastra"""
-        return any(g.eh_canastra() for g in self.agrupamentos)
+        """Verifica se a equipe do jogador tem pelo menos uma canastra"""
+        return self.equipe.tem_canastra()
     
-    def desenhar_mao(self, x: int, y: int) -> None:
-        """Desenha a mão do jogador na tela"""
-        # Calcula a sobreposição necessária para caber todas as cartas na tela
-        num_cartas = len(self.mao)
-        if num_cartas == 0:
-            return
-            
-        # Calcula a sobreposição entre cartas para caber na tela
-        sobreposicao = max(20, (num_cartas * (CARD_WIDTH - 20) - (SCREEN_WIDTH - x - MARGIN)) // num_cartas + 20)
-        sobreposicao = min(sobreposicao, CARD_WIDTH - 10)  # Limita a sobreposição
-        
-        for i, carta in enumerate(self.mao):
-            selecionada = carta in self.selecionadas
-            carta.desenhar(x + i * (CARD_WIDTH - sobreposicao), y, selecionada)
-    
-    def desenhar_agrupamentos(self, x: int, y: int) -> None:
-        """Desenha os agrupamentos do jogador na tela"""
-        for i, agrupamento in enumerate(self.agrupamentos):
-            agrupamento.desenhar(x, y + i * (CARD_HEIGHT + MARGIN))
-    
-    def selecionar_carta(self, pos: Tuple[int, int]) -> bool:
-        """Seleciona/desseleciona uma carta com base na posição do clique"""
-        for carta in reversed(self.mao):  # Verifica de trás para frente para pegar a carta no topo
-            if carta.rect.collidepoint(pos):
-                if carta in self.selecionadas:
-                    self.selecionadas.remove(carta)
-                else:
-                    self.selecionadas.append(carta)
-                return True
-        return False
+    def melhor_jogada(self, minimo_na_mao: int = 0) -> Jogada:
+        """Calcula os agrupamentos novos e extensões que mais aumentam a pontuação"""
+        return melhor_jogada(self.mao, self.agrupamentos, minimo_na_mao)
     
-    def selecionar_agrupamento(self, pos: Tuple[int, int]) -> bool:
-        """Seleciona um agrupamento com base na posição do clique"""
-        for agrupamento in self.agrupamentos:
-            if agrupamento.selecionar(pos):
-                # Desseleciona todos os outros agrupamentos
-                for g in self.agrupamentos:
-                    g.selecionado = False
-                
-                agrupamento.selecionado = True
-                self.agrupamento_selecionado = agrupamento
-                return True
-        
-        # Se clicou fora de qualquer agrupamento, desseleciona todos
+    def aplicar_jogada(self, jogada: Jogada) -> bool:
+        """Forma os agrupamentos e faz as extensões de uma jogada"""
+        for cartas in jogada.novos:
+            if not self.formar_agrupamento(cartas):
+                return False
+        for indice, cartas in jogada.extensoes:
+            agrupamento = self.agrupamentos[indice]
+            for carta in cartas:
+                if not self.estender_agrupamento(agrupamento, carta):
+                    return False
+        return True
+    
+    def alternar_selecao(self, carta: Carta) -> None:
+        """Seleciona/desseleciona uma carta da mão"""
+        if carta in self.selecionadas:
+            self.selecionadas.remove(carta)
+        elif carta in self.mao:
+            self.selecionadas.append(carta)
+    
+    def selecionar_agrupamento(self, agrupamento: Optional[Agrupamento]) -> None:
+        """Seleciona um agrupamento (ou desseleciona todos se for None)"""
         for g in self.agrupamentos:
             g.selecionado = False
-        self.agrupamento_selecionado = None
-        return False
+        
+        if agrupamento is not None:
+            agrupamento.selecionado = True
+        self.agrupamento_selecionado = agrupamento
+    
+    def limpar_selecao(self) -> None:
+        """Limpa as cartas e o agrupamento selecionados"""
+        self.selecionadas.clear()
+        self.selecionar_agrupamento(None)
+    
+    def adicionar_cartas(self, agrupamento: Agrupamento, cartas: List[Carta]) -> bool:
+        """Passa cartas da mão para um agrupamento, só se todas puderem entrar"""
+        if len(set(cartas)) != len(cartas) or not all(c in self.mao for c in cartas):
+            return False
+        
+        # Aplica as cartas no próprio agrupamento e volta atrás se alguma não entrar
+        resumo = agrupamento.salvar_resumo()
+        antes = agrupamento.get_pontos()
+        for carta in cartas:
+            if not agrupamento.adicionar_carta(carta):
+                agrupamento.restaurar_resumo(resumo)
+                return False
+        
+        self.pontos_agrupamentos += agrupamento.get_pontos() - antes
+        for carta in cartas:
+            self.mao.remove(carta)
+        return True
     
     def adicionar_carta_agrupamento(self) -> bool:
         """Tenta adicionar cartas selecionadas ao agrupamento selecionado"""
         if not self.agrupamento_selecionado or not self.selecionadas:
             return False
         
-        # Faz uma cópia para testar antes de modificar
-        agrupamento_temporario = Agrupamento(self.agrupamento_selecionado.cartas.copy())
-        
-        for carta in self.selecionadas:
-            if not agrupamento_temporario.adicionar_carta(carta):
-                return False
-        
-        # Se todas as cartas podem ser adicionadas, aplica as mudanças
-        for carta in self.selecionadas:
-            self.agrupamento_selecionado.adicionar_carta(carta)
-            if carta in self.mao:
-                self.mao.remove(carta)
+        if not self.adicionar_cartas(self.agrupamento_selecionado, self.selecionadas):
+            return False
         
         self.selecionadas.clear()
         return True
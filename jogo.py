@@ -1,53 +1,105 @@
-import pygame
+import os
 import random
-from typing import List, Optional, Tuple
-from constants import (
-    SCREEN_WIDTH, SCREEN_HEIGHT, MARGIN, 
-    BACKGROUND_COLOR, WHITE, BLACK, BLUE, GREEN, YELLOW
-)
-from jogador import Jogador
+from typing import List, Optional, Sequence
+from jogador import Equipe, Jogador
 from monte import Monte
-from carta import Carta
-from agrupamento import Agrupamento
+from acoes import (
+    Acao, Delta, RegistroAcoes, aplicar_acao,
+    COMPRAR_MONTE, COMPRAR_DESCARTE, FORMAR, ESTENDER, DESCARTAR, PASSAR, DESFAZER, SEM_AGRUPAMENTO
+)
+from carta import Carta, FACES_POR_BARALHO
+from legais import GeradorAcoes, pode_usar
+from serializacao import codificar_jogo, restaurar_jogo
+from solucionador import Jogada
+
+MIN_JOGADORES = 2
+MAX_JOGADORES = 4
+CARTAS_INICIAIS = 11  # Cartas de cada mão e de cada morto
+MORTOS = 2
+LIMITE_SEMENTE = 2 ** 64  # Sementes vão em 64 bits sem sinal no estado salvo e nos logs
 
 class Jogo:
-    """Classe principal que controla o jogo"""
-    def __init__(self):
-        self.jogadores: List[Jogador] = [Jogador("Jogador 1"), Jogador("Jogador 2")]
+    """Classe principal que controla o jogo
+
+    A partida é determinada pela semente: o mesmo valor sempre gera o mesmo
+    embaralhamento. Se houver um registro, cada ação aceita é gravada nele
+    (e um checkpoint do estado a cada tantos turnos), o que permite
+    reproduzir a partida depois.
+
+    Cada ação aceita também empilha em 'historico' um Delta com o que ela
+    mudou, e desfazer() reverte a última exatamente, sem copiar a partida.
+
+    Joga-se com 'baralhos' baralhos de 54 cartas e de 2 a 4 jogadores.
+    'equipes' dá a equipe de cada assento (por exemplo (0, 1, 0, 1) para
+    duas duplas); parceiros compartilham os agrupamentos. Sem 'equipes',
+    cada jogador joga sozinho.
+
+    Além das mãos, são separados 'mortos' montes de cartas, e cada um passa
+    a ser o monte de compra quando o anterior acaba. Com 'descarte_inteiro',
+    comprar do descarte leva a pilha inteira, o que só é permitido se a
+    carta do topo tem uso (entra num agrupamento da equipe ou forma um novo
+    com a mão); sem, leva só a carta do topo, como nas versões antigas.
+    """
+    def __init__(self, semente: Optional[int] = None, registro: Optional[RegistroAcoes] = None,
+                 nomes: Sequence[str] = ("Jogador 1", "Jogador 2"), baralhos: int = 1,
+                 equipes: Optional[Sequence[int]] = None, mortos: int = MORTOS, descarte_inteiro: bool = True):
+        if not MIN_JOGADORES <= len(nomes) <= MAX_JOGADORES:
+            raise ValueError(f"O jogo é para {MIN_JOGADORES} a {MAX_JOGADORES} jogadores, não {len(nomes)}")
+        equipes = tuple(range(len(nomes))) if equipes is None else tuple(equipes)
+        if len(equipes) != len(nomes) or sorted(set(equipes)) != list(range(len(set(equipes)))) or len(set(equipes)) < 2:
+            raise ValueError(f"Equipes inválidas: {equipes} (índices 0, 1, ... para cada um dos {len(nomes)} jogadores)")
+        if baralhos < 1:
+            raise ValueError(f"Número de baralhos inválido: {baralhos}")
+        necessarias = (len(nomes) + mortos) * CARTAS_INICIAIS + 1
+        if mortos < 0 or necessarias > FACES_POR_BARALHO * baralhos:
+            raise ValueError(f"{len(nomes)} jogadores e {mortos} mortos precisam de {necessarias} cartas; "
+                             f"{baralhos} baralho(s) têm {FACES_POR_BARALHO * baralhos}")
+        if semente is not None and not 0 <= semente < LIMITE_SEMENTE:
+            raise ValueError(f"Semente fora do intervalo [0, 2**64): {semente}")
+        self.semente: int = semente if semente is not None else random.randrange(2 ** 63)
+        self.registro = registro
+        self.baralhos = baralhos
+        self.mortos = mortos
+        self.descarte_inteiro = descarte_inteiro
+        self.equipes: List[Equipe] = [Equipe(indice) for indice in range(len(set(equipes)))]
+        self.jogadores: List[Jogador] = [Jogador(nome, self.equipes[equipe]) for nome, equipe in zip(nomes, equipes)]
         self.jogador_atual: int = 0
+        self.turno: int = 0
+        self.historico: List[Delta] = []
+        self.gerador_acoes = GeradorAcoes()
         self.monte = Monte()
         self.estado: str = "inicio"  # inicio, jogando, fim
         self.criar_baralho()
         self.distribuir_cartas()
         self.mensagem: str = ""
-        self.botao_formar_agrupamento_rect: Optional[pygame.Rect] = None
-        self.botao_descartar_rect: Optional[pygame.Rect] = None
-        self.botao_adicionar_agrupamento_rect: Optional[pygame.Rect] = None
+        if self.registro:
+            self.registro.novo_jogo(self.semente, len(self.jogadores), self.baralhos,
+                                    [j.equipe.indice for j in self.jogadores], self.mortos, self.descarte_inteiro)
+            self.registro.inicio_de_turno(self)
     
     def criar_baralho(self) -> None:
         """Cria e embaralha o baralho"""
-        baralho = []
-        
-        # Cartas normais
-        for naipe in Carta.NAIPES:
-            for valor in Carta.VALORES:
-                baralho.append(Carta(naipe, valor))
-        
-        # Curingas
-        baralho.append(Carta('', 'Curinga', True))
-        baralho.append(Carta('', 'Curinga', True))
+        # Cartas normais (códigos 0-51) e os dois curingas (52 e 53) de cada baralho, com os códigos seguintes
+        baralho = [Carta.de_codigo(codigo) for codigo in range(FACES_POR_BARALHO * self.baralhos)]
         
-        random.shuffle(baralho)
+        random.Random(self.semente).shuffle(baralho)
         self.monte.cartas = baralho
     
     def distribuir_cartas(self) -> None:
         """Distribui as cartas iniciais para os jogadores"""
-        for _ in range(11):
+        for _ in range(CARTAS_INICIAIS):
             for jogador in self.jogadores:
                 carta = self.monte.comprar_carta()
                 if carta:
                     jogador.receber_carta(carta)
         
+        # Receber as cartas iniciais não conta como compra do turno
+        for jogador in self.jogadores:
+            jogador.comprou_carta = False
+        
+        # Separa os mortos
+        self.monte.mortos = [[self.monte.comprar_carta() for _ in range(CARTAS_INICIAIS)] for _ in range(self.mortos)]
+        
         # Coloca a primeira carta no descarte
         carta_inicial = self.monte.comprar_carta()
         if carta_inicial:
@@ -57,14 +109,80 @@ class Jogo:
         """Passa a vez para o próximo jogador"""
         jogador = self.jogador_atual_obj()
         jogador.comprou_carta = False  # Reseta o flag de compra
-        jogador.selecionadas.clear()  # Limpa cartas selecionadas
-        # Desseleciona agrupamentos
-        for g in jogador.agrupamentos:
-            g.selecionado = False
-        jogador.agrupamento_selecionado = None
+        jogador.limpar_selecao()  # Limpa cartas e agrupamentos selecionados
         
         self.jogador_atual = (self.jogador_atual + 1) % len(self.jogadores)
+        self.turno += 1
         self.mensagem = f"Vez de {self.jogador_atual_nome()}"
+        if self.registro:
+            self.registro.inicio_de_turno(self)
+    
+    def _concluir(self, tipo: int, cartas: Sequence[Carta] = (), agrupamento: int = SEM_AGRUPAMENTO, **delta) -> None:
+        """Grava uma ação aceita no registro da partida (se houver) e empilha o seu Delta"""
+        acao = Acao(tipo, self.jogador_atual, tuple(c.codigo for c in cartas), agrupamento)
+        if self.registro:
+            self.registro.registrar(acao)
+        self.historico.append(Delta(acao, **delta))
+    
+    def passar_vez(self) -> None:
+        """Passa a vez sem descartar (por exemplo, quando o jogador não tem o que descartar)"""
+        self._concluir(PASSAR, comprou_carta=self.jogador_atual_obj().comprou_carta, mensagem=self.mensagem)
+        self.proximo_jogador()
+    
+    def fazer(self, acao: Acao) -> Optional[Delta]:
+        """Executa uma ação e retorna o seu Delta (None se ela não foi aceita)"""
+        if not aplicar_acao(self, acao):
+            return None
+        return self.historico[-1] if acao.tipo != DESFAZER else None
+    
+    def desfazer(self) -> Optional[Delta]:
+        """Desfaz a última ação da partida e retorna o seu Delta (None se não há o que desfazer)
+
+        Com um registro, só as ações do turno atual podem ser desfeitas (o
+        checkpoint do turno seguinte já pode ter sido gravado).
+        """
+        if not self.historico:
+            return None
+        delta = self.historico[-1]
+        acao = delta.acao
+        if self.registro:
+            if acao.tipo in (DESCARTAR, PASSAR):
+                return None
+            self.registro.registrar(Acao(DESFAZER, self.jogador_atual))
+        self.historico.pop()
+        
+        jogador = self.jogadores[acao.jogador]
+        cartas = [Carta(c) for c in acao.cartas]
+        if acao.tipo in (DESCARTAR, PASSAR):
+            self.jogador_atual = acao.jogador
+            self.turno -= 1
+        
+        if acao.tipo == COMPRAR_MONTE:
+            jogador.mao.remove(delta.comprada)
+            self.monte.cartas.append(delta.comprada)
+            if delta.morto:
+                self.monte.fechar_morto()
+        elif acao.tipo == COMPRAR_DESCARTE:
+            for carta in reversed(delta.pilha):
+                jogador.mao.remove(carta)
+            self.monte.descarte.extend(delta.pilha)
+        elif acao.tipo == DESCARTAR:
+            self.monte.descarte.pop()
+        elif acao.tipo == FORMAR:
+            agrupamento = jogador.agrupamentos.pop()
+            if jogador.agrupamento_selecionado is agrupamento:
+                jogador.selecionar_agrupamento(None)
+        elif acao.tipo == ESTENDER:
+            jogador.agrupamentos[acao.agrupamento].restaurar_resumo(delta.resumo)
+        
+        # Devolve as cartas que saíram da mão aos lugares que ocupavam
+        for ordem, carta in zip(delta.ordens, cartas):
+            jogador.mao.recolocar(carta, ordem)
+        if acao.tipo in (FORMAR, ESTENDER):
+            jogador.pontos_agrupamentos = delta.pontos_agrupamentos
+        jogador.comprou_carta = delta.comprou_carta
+        self.mensagem = delta.mensagem
+        return delta
     
     def jogador_atual_nome(self) -> str:
         """Retorna o nome do jogador atual"""
@@ -76,238 +194,252 @@ class Jogo:
     
     def verificar_fim_jogo(self) -> bool:
         """Verifica se o jogo terminou"""
-        jogador = self.jogador_atual_obj()
-        return len(jogador.mao) == 0 and jogador.tem_canastra()
+        # Algum jogador ficou sem cartas tendo pelo menos uma canastra
+        if any(len(j.mao) == 0 and j.tem_canastra() for j in self.jogadores):
+            return True
+        
+        # O monte e os mortos acabaram e o jogador da vez ainda precisa comprar
+        return self.monte.vazio() and not self.jogador_atual_obj().comprou_carta
     
-    def comprar_do_monte(self) -> None:
+    def comprar_do_monte(self) -> bool:
         """Ação de comprar do monte"""
         jogador = self.jogador_atual_obj()
+        mensagem = self.mensagem
+        if jogador.comprou_carta:
+            self.mensagem = "Você já comprou uma carta neste turno!"
+            return False
+        
+        # Quando o monte acaba, o próximo morto toma o lugar dele
+        morto = self.monte.abrir_morto()
         carta = self.monte.comprar_carta()
         if carta:
             jogador.receber_carta(carta)
-            self.mensagem = f"{jogador.nome} comprou do monte"
-        else:
-            self.mensagem = "Monte vazio!"
+            self._concluir(COMPRAR_MONTE, comprada=carta, morto=morto, mensagem=mensagem)
+            self.mensagem = f"{jogador.nome} comprou do monte" + (" (morto aberto)" if morto else "")
+            return True
+        self.mensagem = "Monte vazio!"
+        return False
     
-    def comprar_do_descarte(self) -> None:
-        """Ação de comprar do descarte"""
+    def pode_comprar_descarte(self) -> bool:
+        """Verifica se o jogador atual pode comprar do descarte (com o descarte inteiro, se o topo tem uso)"""
+        topo = self.monte.topo_descarte()
+        if topo is None:
+            return False
+        if not self.descarte_inteiro:
+            return True
         jogador = self.jogador_atual_obj()
-        carta = self.monte.comprar_descarte()
-        if carta:
-            jogador.receber_carta(carta)
-            self.mensagem = f"{jogador.nome} comprou do descarte"
-        else:
+        return pode_usar(topo, jogador.mao, jogador.agrupamentos)
+    
+    def cartas_do_descarte(self) -> List[Carta]:
+        """Cartas que uma compra do descarte poria na mão (a pilha inteira ou só o topo)"""
+        if self.descarte_inteiro or not self.monte.descarte:
+            return self.monte.descarte.copy()
+        return [self.monte.descarte[-1]]
+    
+    def comprar_do_descarte(self) -> bool:
+        """Ação de comprar do descarte (a pilha inteira, com descarte_inteiro)"""
+        jogador = self.jogador_atual_obj()
+        mensagem = self.mensagem
+        if jogador.comprou_carta:
+            self.mensagem = "Você já comprou uma carta neste turno!"
+            return False
+        if not self.monte.descarte:
             self.mensagem = "Descarte vazio!"
+            return False
+        if not self.pode_comprar_descarte():
+            self.mensagem = "A carta do topo do descarte não tem uso na sua mão!"
+            return False
+        
+        if self.descarte_inteiro:
+            # A pilha sai do monte de uma vez; só a mão precisa indexar carta por carta
+            pilha = self.monte.pegar_descarte()
+            jogador.receber_cartas(pilha)
+        else:
+            pilha = [self.monte.comprar_descarte()]
+            jogador.receber_carta(pilha[0])
+        self._concluir(COMPRAR_DESCARTE, pilha=tuple(pilha), mensagem=mensagem)
+        self.mensagem = f"{jogador.nome} comprou do descarte" + (f" ({len(pilha)} cartas)" if len(pilha) > 1 else "")
+        return True
     
-    def descartar_carta(self, carta: Carta) -> None:
+    def descartar_carta(self, carta: Carta) -> bool:
         """Ação de descartar uma carta"""
         jogador = self.jogador_atual_obj()
         
         # Verifica se o jogador já comprou uma carta neste turno
         if not jogador.comprou_carta:
             self.mensagem = "Você deve comprar uma carta antes de descartar!"
-            return
+            return False
         
+        if carta not in jogador.mao:
+            return False
+        ordem = jogador.mao.ordem(carta)
+        mensagem = self.mensagem
         carta_descartada = jogador.descartar(carta)
         if carta_descartada:
             self.monte.adicionar_descarte(carta_descartada)
+            self._concluir(DESCARTAR, (carta_descartada,), ordens=(ordem,), comprou_carta=True, mensagem=mensagem)
             self.mensagem = f"{jogador.nome} descartou {carta_descartada}"
             self.proximo_jogador()
+            return True
+        return False
     
-    def processar_clique(self, pos: Tuple[int, int]) -> None:
-        """Processa um clique na tela"""
-        if self.estado != "jogando":
-            return
-        
+    def iniciar(self) -> None:
+        """Sai da tela de início e começa a partida"""
+        self.estado = "jogando"
+        self.mensagem = f"Vez de {self.jogador_atual_nome()}"
+    
+    def formar_agrupamento(self, cartas: List[Carta]) -> bool:
+        """Ação de formar um novo agrupamento com cartas da mão do jogador atual"""
         jogador = self.jogador_atual_obj()
-        
-        # Verifica se clicou em uma carta da mão
-        if jogador.selecionar_carta(pos):
-            return
-        
-        # Verifica se clicou em um agrupamento
-        if jogador.selecionar_agrupamento(pos):
-            return
-        
-        # Verifica se clicou no monte de compra
-        if self.monte.rect_compra.collidepoint(pos):
-            self.comprar_do_monte()
-            return
-        
-        # Verifica se clicou no descarte
-        if self.monte.rect_descarte.collidepoint(pos) and self.monte.topo_descarte():
-            self.comprar_do_descarte()
-            return
-        
-        # Verifica se clicou no botão de formar agrupamento
-        if self.botao_formar_agrupamento_rect and self.botao_formar_agrupamento_rect.collidepoint(pos):
-            if jogador.tentar_formar_agrupamento():
-                self.mensagem = f"{jogador.nome} formou um agrupamento!"
-            else:
-                self.mensagem = "Agrupamento inválido!"
-            return
-        
-        # Verifica se clicou no botão de adicionar ao agrupamento
-        if self.botao_adicionar_agrupamento_rect and self.botao_adicionar_agrupamento_rect.collidepoint(pos):
-            if jogador.adicionar_carta_agrupamento():
-                self.mensagem = f"{jogador.nome} adicionou cartas ao agrupamento!"
-            else:
-                self.mensagem = "Não foi possível adicionar cartas ao agrupamento!"
-            return
-        
-        # Verifica se clicou no botão de descartar
-        if self.botao_descartar_rect and self.botao_descartar_rect.collidepoint(pos) and jogador.selecionadas:
-            carta = jogador.selecionadas[0]  # Descarta a primeira carta selecionada
-            self.descartar_carta(carta)
-            jogador.selecionadas.clear()
-            return
+        if len(set(cartas)) != len(cartas) or not all(c in jogador.mao for c in cartas):
+            return False
+        ordens = tuple(jogador.mao.ordem(c) for c in cartas)
+        pontos = jogador.pontos_agrupamentos
+        if jogador.formar_agrupamento(cartas):
+            self._concluir(FORMAR, cartas, ordens=ordens, comprou_carta=jogador.comprou_carta,
+                           pontos_agrupamentos=pontos, mensagem=self.mensagem)
+            return True
+        return False
     
-    def desenhar(self) -> None:
-        """Desenha toda a interface do jogo"""
-        screen.fill(BACKGROUND_COLOR)
-        
-        if self.estado == "inicio":
-            self.desenhar_tela_inicio()
-        elif self.estado == "jogando":
-            self.desenhar_tela_jogo()
-        elif self.estado == "fim":
-            self.desenhar_tela_fim()
-        
-        pygame.display.flip()
+    def estender_agrupamento(self, indice: int, cartas: List[Carta]) -> bool:
+        """Ação de adicionar cartas da mão a um agrupamento do jogador atual (todas ou nenhuma)"""
+        jogador = self.jogador_atual_obj()
+        if not 0 <= indice < len(jogador.agrupamentos):
+            return False
+        agrupamento = jogador.agrupamentos[indice]
+        if len(set(cartas)) != len(cartas) or not all(c in jogador.mao for c in cartas):
+            return False
+        ordens = tuple(jogador.mao.ordem(c) for c in cartas)
+        pontos = jogador.pontos_agrupamentos
+        resumo = agrupamento.salvar_resumo()
+        if jogador.adicionar_cartas(agrupamento, cartas):
+            self._concluir(ESTENDER, cartas, indice, ordens=ordens, comprou_carta=jogador.comprou_carta,
+                           pontos_agrupamentos=pontos, resumo=resumo, mensagem=self.mensagem)
+            return True
+        return False
     
-    def desenhar_tela_inicio(self) -> None:
-        """Desenha a tela de início"""
-        titulo = font.render("Buraco Simplificado", True, WHITE)
-        subtitulo = font.render("Clique para começar", True, WHITE)
-        
-        screen.blit(titulo, (SCREEN_WIDTH // 2 - titulo.get_width() // 2, SCREEN_HEIGHT // 3))
-        screen.blit(subtitulo, (SCREEN_WIDTH // 2 - subtitulo.get_width() // 2, SCREEN_HEIGHT // 2))
+    def aplicar_jogada(self, jogada: Jogada) -> bool:
+        """Forma os agrupamentos e faz as extensões de uma jogada do jogador atual"""
+        for cartas in jogada.novos:
+            if not self.formar_agrupamento(cartas):
+                return False
+        for indice, cartas in jogada.extensoes:
+            if not self.estender_agrupamento(indice, cartas):
+                return False
+        return True
     
-    def desenhar_tela_jogo(self) -> None:
-        """Desenha a tela de jogo"""
-        # Desenha o monte e descarte
-        self.monte.desenhar()
-        
-        # Desenha a mão do jogador atual
+    def formar_agrupamento_selecionado(self) -> bool:
+        """Ação de formar um novo agrupamento com as cartas selecionadas"""
         jogador = self.jogador_atual_obj()
-        jogador.desenhar_mao(MARGIN, SCREEN_HEIGHT - CARD_HEIGHT - MARGIN)
-        
-        # Desenha os agrupamentos do jogador atual
-        jogador.desenhar_agrupamentos(SCREEN_WIDTH // 2, MARGIN)
-        
-        # Desenha botões de ação
-        self.desenhar_botoes_acao()
-        
-        # Desenha mensagem
-        if self.mensagem:
-            texto_msg = font.render(self.mensagem, True, WHITE)
-            screen.blit(texto_msg, (MARGIN, MARGIN))
-        
-        # Desenha nome do jogador atual
-        texto_jogador = font.render(f"Jogador atual: {jogador.nome}", True, WHITE)
-        screen.blit(texto_jogador, (SCREEN_WIDTH - texto_jogador.get_width() - MARGIN, MARGIN))
+        if len(jogador.selecionadas) >= 3 and self.formar_agrupamento(jogador.selecionadas.copy()):
+            jogador.selecionadas.clear()
+            self.mensagem = f"{jogador.nome} formou um agrupamento!"
+            return True
+        self.mensagem = "Agrupamento inválido!"
+        return False
     
-    def desenhar_botoes_acao(self) -> None:
-        """Desenha os botões de ação"""
+    def adicionar_ao_agrupamento_selecionado(self) -> bool:
+        """Ação de adicionar as cartas selecionadas ao agrupamento selecionado"""
         jogador = self.jogador_atual_obj()
-        
-        # Posiciona os botões acima da mão do jogador
-        pos_y = SCREEN_HEIGHT - CARD_HEIGHT - MARGIN - 100
-        
-        # Botão para formar agrupamento
-        self.botao_formar_agrupamento_rect = pygame.Rect(
-            SCREEN_WIDTH - 220,
-            pos_y,
-            200,
-            40
-        )
-        cor_botao = WHITE if len(jogador.selecionadas) >= 3 else (200, 200, 200)
-        pygame.draw.rect(screen, cor_botao, self.botao_formar_agrupamento_rect)
-        pygame.draw.rect(screen, BLACK, self.botao_formar_agrupamento_rect, 2)
-        texto_agrupar = small_font.render("Formar Novo Agrupamento", True, BLACK)
-        screen.blit(texto_agrupar, (
-            self.botao_formar_agrupamento_rect.x + (200 - texto_agrupar.get_width()) // 2,
-            self.botao_formar_agrupamento_rect.y + 10
-        ))
-        
-        # Botão para adicionar a agrupamento existente
-        self.botao_adicionar_agrupamento_rect = pygame.Rect(
-            SCREEN_WIDTH - 220,
-            pos_y + 50,
-            200,
-            40
-        )
-        cor_botao = GREEN if jogador.agrupamento_selecionado and jogador.selecionadas else (200, 200, 200)
-        pygame.draw.rect(screen, cor_botao, self.botao_adicionar_agrupamento_rect)
-        pygame.draw.rect(screen, BLACK, self.botao_adicionar_agrupamento_rect, 2)
-        texto_adicionar = small_font.render("Adicionar ao Agrupamento", True, BLACK)
-        screen.blit(texto_adicionar, (
-            self.botao_adicionar_agrupamento_rect.x + (200 - texto_adicionar.get_width()) // 2,
-            self.botao_adicionar_agrupamento_rect.y + 10
-        ))
-        
-        # Botão para descartar
-        self.botao_descartar_rect = pygame.Rect(
-            SCREEN_WIDTH - 220,
-            pos_y + 100,
-            200,
-            40
-        )
-        cor_botao = BLUE if jogador.selecionadas and jogador.comprou_carta else (200, 200, 200)
-        pygame.draw.rect(screen, cor_botao, self.botao_descartar_rect)
-        pygame.draw.rect(screen, BLACK, self.botao_descartar_rect, 2)
-        texto_descartar = small_font.render("Descartar", True, BLACK)
-        screen.blit(texto_descartar, (
-            self.botao_descartar_rect.x + (200 - texto_descartar.get_width()) // 2,
-            self.botao_descartar_rect.y + 10
-        ))
-    
-    def desenhar_tela_fim(self) -> None:
-        """Desenha a tela de fim de jogo"""
-        titulo = font.render("Fim de Jogo!", True, WHITE)
-        screen.blit(titulo, (SCREEN_WIDTH // 2 - titulo.get_width() // 2, MARGIN))
-        
-        # Calcula pontuações
-        pontos_jogador1 = self.jogadores[0].get_pontos()
-        pontos_jogador2 = self.jogadores[1].get_pontos()
-        
-        # Determina o vencedor
-        if pontos_jogador1 > pontos_jogador2:
-            vencedor = f"{self.jogadores[0].nome} venceu!"
-        elif pontos_jogador2 > pontos_jogador1:
-            vencedor = f"{self.jogadores[1].nome} venceu!"
-        else:
-            vencedor = "Empate!"
-        
-        texto_vencedor = font.render(vencedor, True, YELLOW)
-        screen.blit(texto_vencedor, (SCREEN_WIDTH // 2 - texto_vencedor.get_width() // 2, MARGIN * 3))
-        
-        # Mostra pontuações
-        texto_pontos1 = font.render(f"{self.jogadores[0].nome}: {pontos_jogador1} pontos", True, WHITE)
-        texto_pontos2 = font.render(f"{self.jogadores[1].nome}: {pontos_jogador2} pontos", True, WHITE)
-        
-        screen.blit(texto_pontos1, (SCREEN_WIDTH // 2 - texto_pontos1.get_width() // 2, SCREEN_HEIGHT // 2 - 50))
-        screen.blit(texto_pontos2, (SCREEN_WIDTH // 2 - texto_pontos2.get_width() // 2, SCREEN_HEIGHT // 2 + 10))
-        
-        # Botão para jogar novamente
-        botao_reiniciar_rect = pygame.Rect(
-            SCREEN_WIDTH // 2 - CARD_WIDTH,
-            SCREEN_HEIGHT - 100,
-            CARD_WIDTH * 2,
-            50
-        )
-        pygame.draw.rect(screen, WHITE, botao_reiniciar_rect)
-        pygame.draw.rect(screen, BLACK, botao_reiniciar_rect, 2)
-        texto_reiniciar = font.render("Jogar Novamente", True, BLACK)
-        screen.blit(texto_reiniciar, (
-            SCREEN_WIDTH // 2 - texto_reiniciar.get_width() // 2,
-            SCREEN_HEIGHT - 90
-        ))
-        
-        return botao_reiniciar_rect
+        if jogador.agrupamento_selecionado in jogador.agrupamentos and jogador.selecionadas:
+            indice = jogador.agrupamentos.index(jogador.agrupamento_selecionado)
+            if self.estender_agrupamento(indice, jogador.selecionadas.copy()):
+                jogador.selecionadas.clear()
+                self.mensagem = f"{jogador.nome} adicionou cartas ao agrupamento!"
+                return True
+        self.mensagem = "Não foi possível adicionar cartas ao agrupamento!"
+        return False
+    
+    def acoes_legais(self) -> List[Acao]:
+        """Lista as ações legais do jogador atual (ver GeradorAcoes)
+
+        Agrupamentos novos e extensões são guardados entre chamadas e só são
+        refeitos para a parte da mão e os agrupamentos que mudaram.
+        """
+        return self.gerador_acoes.acoes(self)
+    
+    def pode_desfazer(self) -> bool:
+        """Verifica se o jogador atual pode desfazer a última ação (só as do próprio turno)"""
+        if not self.historico:
+            return False
+        acao = self.historico[-1].acao
+        return acao.jogador == self.jogador_atual and acao.tipo not in (DESCARTAR, PASSAR)
+    
+    def desfazer_ultima(self) -> bool:
+        """Ação de desfazer a última ação do turno do jogador atual"""
+        if not self.pode_desfazer() or self.desfazer() is None:
+            self.mensagem = "Nada para desfazer neste turno!"
+            return False
+        self.jogador_atual_obj().limpar_selecao()
+        self.mensagem = "Ação desfeita"
+        return True
+    
+    def descartar_selecionada(self) -> None:
+        """Ação de descartar a primeira carta selecionada"""
+        jogador = self.jogador_atual_obj()
+        if not jogador.selecionadas:
+            return
+        carta = jogador.selecionadas[0]  # Descarta a primeira carta selecionada
+        self.descartar_carta(carta)
+        jogador.selecionadas.clear()
+    
+    def pontos_equipes(self) -> List[int]:
+        """Pontos de cada equipe (sem parcerias, os de cada jogador)"""
+        return [equipe.get_pontos() for equipe in self.equipes]
+    
+    def vencedor(self) -> Optional[Jogador]:
+        """Retorna o jogador da equipe com mais pontos (o primeiro dela, com parceiros; None em caso de empate)"""
+        pontos = self.pontos_equipes()
+        melhor = max(pontos)
+        if pontos.count(melhor) > 1:
+            return None
+        return self.equipes[pontos.index(melhor)].membros[0]
+    
+    def copiar(self) -> 'Jogo':
+        """Retorna uma cópia independente da partida, bem mais barata que copy.deepcopy
+
+        As cartas são compartilhadas (são imutáveis); monte, mãos e
+        agrupamentos são copiados.
+        """
+        copia = Jogo.__new__(Jogo)
+        copia.__dict__.update(self.__dict__)
+        copia.equipes = [equipe.copiar() for equipe in self.equipes]
+        copia.jogadores = [j.copiar(copia.equipes[j.equipe.indice]) for j in self.jogadores]
+        copia.monte = self.monte.copiar()
+        copia.historico = self.historico.copy()  # Os Deltas são imutáveis e se referem a índices
+        copia.registro = None  # Jogadas exploradas na cópia não vão para o registro
+        copia.gerador_acoes = GeradorAcoes()  # O cache se refere às mãos e agrupamentos originais
+        return copia
+    
+    def para_bytes(self) -> bytes:
+        """Codifica o estado completo da partida num formato binário compacto"""
+        return codificar_jogo(self)
+    
+    @classmethod
+    def de_bytes(cls, dados: bytes) -> 'Jogo':
+        """Recria uma partida a partir de bytes gerados por para_bytes"""
+        jogo = cls.__new__(cls)
+        restaurar_jogo(jogo, dados)
+        return jogo
+    
+    def salvar(self, caminho: str) -> None:
+        """Salva a partida em disco (substitui o arquivo de uma vez, sem deixá-lo pela metade)"""
+        temporario = caminho + ".tmp"
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(self.para_bytes())
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho)
+    
+    @classmethod
+    def carregar(cls, caminho: str) -> 'Jogo':
+        """Carrega uma partida salva com salvar"""
+        with open(caminho, "rb") as arquivo:
+            return cls.de_bytes(arquivo.read())
     
     def reiniciar(self) -> None:
         """Reinicia o jogo"""
-        self.__init__()
-        self.estado = "jogando"
-        self.mensagem = f"Vez de {self.jogador_atual_nome()}"
\ No newline at end of file
+        self.__init__(registro=self.registro, nomes=[j.nome for j in self.jogadores], baralhos=self.baralhos,
+                      equipes=[j.equipe.indice for j in self.jogadores], mortos=self.mortos,
+                      descarte_inteiro=self.descarte_inteiro)
+        self.iniciar()
@@ -0,0 +1,251 @@
+from itertools import product
+from typing import Dict, List, Sequence, Tuple
+from acoes import Acao, COMPRAR_MONTE, COMPRAR_DESCARTE, FORMAR, ESTENDER, DESCARTAR, PASSAR
+from agrupamento import Agrupamento
+from carta import Carta, NUM_VALORES
+from mao import Mao
+
+
+def _divisoes(quantidade: int, curingas: Sequence[Carta], dois: Sequence[Carta]) -> List[Tuple[Carta, ...]]:
+    """Formas de usar 'quantidade' cartas especiais: j curingas e quantidade - j '2's
+
+    Cartas especiais do mesmo tipo são intercambiáveis num agrupamento novo,
+    então cada divisão usa as de menor código.
+    """
+    divisoes = []
+    for j in range(min(quantidade, len(curingas)) + 1):
+        if quantidade - j <= len(dois):
+            divisoes.append(tuple(curingas[:j]) + tuple(dois[:quantidade - j]))
+    return divisoes
+
+
+def trincas(mao: Mao, valor: int, jogador: int) -> List[Acao]:
+    """Agrupamentos novos da mão cujas cartas normais têm todas o valor dado
+
+    Cópias da mesma face (com vários baralhos) entram por quantidade, a
+    partir da primeira da mão.
+    """
+    faces = [mao.por_face[f] for f in range(valor, 4 * NUM_VALORES, NUM_VALORES) if f in mao.por_face]
+    if not faces:
+        return []
+    curingas = sorted(mao.curingas, key=lambda c: c.codigo)
+    dois = sorted(mao.dois, key=lambda c: c.codigo)
+    acoes = []
+    for quantidades in product(*(range(len(cartas) + 1) for cartas in faces)):
+        naturais = tuple(c for cartas, n in zip(faces, quantidades) for c in cartas[:n])
+        if not naturais:
+            continue
+        for especiais in range(max(0, 3 - len(naturais)), len(curingas) + len(dois) + 1):
+            for extras in _divisoes(especiais, curingas, dois):
+                acoes.append(Acao(FORMAR, jogador, tuple(c.codigo for c in naturais + extras)))
+    return acoes
+
+
+def sequencias(mao: Mao, naipe: int, jogador: int) -> List[Acao]:
+    """Agrupamentos novos da mão com pelo menos duas cartas normais do naipe dado
+
+    Cada sequência vai da menor à maior carta normal e usa todas as cartas
+    normais do naipe entre elas (como o solucionador); os curingas cobrem os
+    buracos e, havendo mais, estendem a sequência.
+    """
+    mascara = mao.mascaras[naipe]
+    valores = [v for v in range(NUM_VALORES) if mascara >> v & 1]
+    if len(valores) < 2:
+        return []
+    curingas = sorted(mao.curingas, key=lambda c: c.codigo)
+    dois = sorted(mao.dois, key=lambda c: c.codigo)
+    base = naipe * NUM_VALORES
+    acoes = []
+    for i, menor in enumerate(valores):
+        for k in range(i + 1, len(valores)):
+            maior = valores[k]
+            naturais = tuple(mao.por_face[base + v][0] for v in valores[i:k + 1])
+            buracos = maior - menor + 1 - len(naturais)
+            minimo = max(buracos, 3 - len(naturais))
+            maximo = min(len(curingas) + len(dois), NUM_VALORES - len(naturais))
+            for especiais in range(minimo, maximo + 1):
+                for extras in _divisoes(especiais, curingas, dois):
+                    acoes.append(Acao(FORMAR, jogador, tuple(c.codigo for c in naturais + extras)))
+    return acoes
+
+
+def _cabe(carta: Carta, agrupamento: Agrupamento) -> bool:
+    """Mesmo teste de Agrupamento.adicionar_carta, sem alterar o agrupamento"""
+    if agrupamento.codigos >> carta.codigo & 1:
+        return False
+    return (agrupamento.eh_trinca() and carta.pode_adicionar_trinca(agrupamento)) or \
+        (agrupamento.eh_sequencia() and carta.pode_adicionar_sequencia(agrupamento))
+
+
+def extensoes(mao: Mao, agrupamento: Agrupamento, indice: int, jogador: int) -> List[Acao]:
+    """Cartas da mão que podem entrar, uma de cada vez, no agrupamento dado
+
+    Os candidatos vêm dos índices da mão (o valor da trinca; as pontas e as
+    posições de curingas da sequência) e passam pelos mesmos testes de
+    pode_adicionar_trinca/pode_adicionar_sequencia. Entre curingas do mesmo
+    tipo só o de menor código é listado. Extensões com várias cartas são
+    sequências destas ações.
+    """
+    candidatas: List[Carta] = []
+    if agrupamento.eh_trinca():
+        for face in range(agrupamento.min_valor, 4 * NUM_VALORES, NUM_VALORES):
+            candidatas += mao.por_face.get(face, ())
+    if agrupamento.eh_sequencia():
+        base = (agrupamento.naipes.bit_length() - 1) * NUM_VALORES
+        valores = [agrupamento.inicio - 1, agrupamento.fim + 1]
+        valores += [v for v in range(agrupamento.inicio, agrupamento.fim + 1) if agrupamento.slots[v].especial]
+        for valor in valores:
+            if 0 <= valor < NUM_VALORES:
+                candidatas += mao.por_face.get(base + valor, ())
+    for especiais in (mao.curingas, mao.dois):
+        livres = [c for c in especiais if not agrupamento.codigos >> c.codigo & 1]
+        if livres:
+            candidatas.append(min(livres, key=lambda c: c.codigo))
+
+    acoes = []
+    vistas = set()
+    for carta in candidatas:
+        if carta.codigo not in vistas and _cabe(carta, agrupamento):
+            vistas.add(carta.codigo)
+            acoes.append(Acao(ESTENDER, jogador, (carta.codigo,), indice))
+    return acoes
+
+
+def pode_usar(carta: Carta, mao: Mao, agrupamentos: Sequence[Agrupamento]) -> bool:
+    """Verifica se a carta, somada à mão, entra num dos agrupamentos ou forma um agrupamento novo
+
+    É o teste para pegar a pilha de descarte: a carta do topo precisa ter
+    uso. Agrupamentos novos com a carta só precisam de três cartas, então
+    bastam os índices da mão (os especiais, as cartas do mesmo valor e as
+    máscaras do naipe numa janela de três valores em volta dela).
+    """
+    if any(_cabe(carta, agrupamento) for agrupamento in agrupamentos):
+        return True
+    especiais = len(mao.curingas) + len(mao.dois)
+    if carta.especial:
+        # Precisa de uma carta normal da mão e de uma terceira: outro especial, outra
+        # carta do mesmo valor ou uma do mesmo naipe a até dois valores de distância
+        if not mao.por_face:
+            return False
+        if especiais:
+            return True
+        por_valor = [0] * NUM_VALORES
+        for face, cartas in mao.por_face.items():
+            por_valor[face % NUM_VALORES] += len(cartas)
+        return max(por_valor) >= 2 or any(m & (m >> 1 | m >> 2) for m in mao.mascaras)
+    if especiais >= 2:
+        return True
+    # Trinca: outras cartas do mesmo valor, em qualquer naipe
+    faces = range(carta.valor_idx, 4 * NUM_VALORES, NUM_VALORES)
+    mesmo_valor = sum(len(mao.por_face.get(face, ())) for face in faces)
+    if 1 + mesmo_valor + especiais >= 3:
+        return True
+    # Sequência: uma janela de três valores do naipe com a carta e os especiais que faltam
+    mascara = mao.mascaras[carta.naipe_idx] | 1 << carta.valor_idx
+    valor = carta.valor_idx
+    for inicio in range(max(0, valor - 2), min(valor, NUM_VALORES - 3) + 1):
+        if bin(mascara >> inicio & 0b111).count("1") + especiais >= 3:
+            return True
+    return False
+
+
+def compras(jogo) -> List[Acao]:
+    """Compras possíveis do jogador da vez (nenhuma se ele já comprou)"""
+    indice = jogo.jogador_atual
+    acoes = []
+    if not jogo.jogadores[indice].comprou_carta:
+        if not jogo.monte.vazio():
+            acoes.append(Acao(COMPRAR_MONTE, indice))
+        if jogo.pode_comprar_descarte():
+            acoes.append(Acao(COMPRAR_DESCARTE, indice))
+    return acoes
+
+
+def descartes(jogo) -> List[Acao]:
+    """Descartes possíveis do jogador da vez (só depois da compra)"""
+    indice = jogo.jogador_atual
+    jogador = jogo.jogadores[indice]
+    if not jogador.comprou_carta:
+        return []
+    # Cópias da mesma carta (vários baralhos) dão o mesmo descarte
+    faces: Dict[int, Carta] = {}
+    for carta in jogador.mao:
+        faces.setdefault(carta.face, carta)
+    return [Acao(DESCARTAR, indice, (carta.codigo,)) for carta in faces.values()]
+
+
+class GeradorAcoes:
+    """Lista as ações legais do jogador da vez, reaproveitando o que não mudou
+
+    Os agrupamentos novos possíveis são guardados por valor (trincas) e por
+    naipe (sequências) e só são refeitos quando a versão correspondente da
+    mão (ou a das cartas especiais) muda; as extensões de cada agrupamento,
+    quando ele ou a parte da mão que pode entrar nele muda. Assim, depois de
+    uma compra ou de um agrupamento formado no meio do turno, só uma pequena
+    parte das ações é gerada de novo.
+    """
+    def __init__(self):
+        self._mao: Dict[int, Mao] = {}  # Mão a que o cache de cada jogador se refere
+        self._trincas: Dict[int, List[Tuple[tuple, List[Acao]]]] = {}
+        self._sequencias: Dict[int, List[Tuple[tuple, List[Acao]]]] = {}
+        self._extensoes: Dict[int, List[Tuple[Agrupamento, tuple, List[Acao]]]] = {}
+
+    def _cache(self, jogador: int, mao: Mao) -> None:
+        """Descarta o cache do jogador se a mão dele foi trocada por outro objeto"""
+        if self._mao.get(jogador) is not mao:
+            self._mao[jogador] = mao
+            self._trincas[jogador] = [((-1,), []) for _ in range(NUM_VALORES)]
+            self._sequencias[jogador] = [((-1,), []) for _ in range(4)]
+            self._extensoes[jogador] = []
+
+    def agrupamentos_novos(self, jogador: int, mao: Mao) -> List[Acao]:
+        """Ações FORMAR possíveis com a mão do jogador"""
+        self._cache(jogador, mao)
+        acoes = []
+        guardadas = self._trincas[jogador]
+        for valor in range(NUM_VALORES):
+            chave = (mao.versoes_valor[valor], mao.versao_especiais)
+            if guardadas[valor][0] != chave:
+                guardadas[valor] = (chave, trincas(mao, valor, jogador))
+            acoes += guardadas[valor][1]
+        guardadas = self._sequencias[jogador]
+        for naipe in range(4):
+            chave = (mao.versoes_naipe[naipe], mao.versao_especiais)
+            if guardadas[naipe][0] != chave:
+                guardadas[naipe] = (chave, sequencias(mao, naipe, jogador))
+            acoes += guardadas[naipe][1]
+        return acoes
+
+    def extensoes(self, jogador: int, mao: Mao, agrupamentos: Sequence[Agrupamento]) -> List[Acao]:
+        """Ações ESTENDER possíveis nos agrupamentos do jogador"""
+        self._cache(jogador, mao)
+        guardadas = self._extensoes[jogador]
+        del guardadas[len(agrupamentos):]
+        acoes = []
+        for indice, agrupamento in enumerate(agrupamentos):
+            # A trinca depende das cartas do seu valor; a sequência, das do seu naipe
+            chave = (agrupamento.versao, mao.versao_especiais,
+                     mao.versoes_valor[agrupamento.min_valor] if agrupamento.eh_trinca() else -1,
+                     mao.versoes_naipe[agrupamento.naipes.bit_length() - 1] if agrupamento.eh_sequencia() else -1)
+            if indice == len(guardadas):
+                guardadas.append((agrupamento, chave, extensoes(mao, agrupamento, indice, jogador)))
+            elif guardadas[indice][0] is not agrupamento or guardadas[indice][1] != chave:
+                guardadas[indice] = (agrupamento, chave, extensoes(mao, agrupamento, indice, jogador))
+            acoes += guardadas[indice][2]
+        return acoes
+
+    def acoes(self, jogo) -> List[Acao]:
+        """Todas as ações legais do jogador da vez: compras, agrupamentos novos, extensões, descartes ou passar"""
+        if jogo.estado == "fim":
+            return []
+        indice = jogo.jogador_atual
+        jogador = jogo.jogadores[indice]
+        acoes = compras(jogo)
+        pode_comprar = bool(acoes)
+        acoes += self.agrupamentos_novos(indice, jogador.mao)
+        acoes += self.extensoes(indice, jogador.mao, jogador.agrupamentos)
+        fim_de_turno = descartes(jogo)
+        if not pode_comprar and not fim_de_turno:
+            # Sem compra nem descarte possível, o jogador só pode passar a vez
+            fim_de_turno.append(Acao(PASSAR, indice))
+        return acoes + fim_de_turno
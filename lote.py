@@ -0,0 +1,147 @@
+from typing import Iterable, Sequence, Tuple
+import numpy as np
+from agrupamento import TRINCA, SEQUENCIA
+from carta import Carta, ESPECIAL, FACE_CURINGA, FACES_POR_BARALHO, NUM_VALORES, PONTOS, codificar
+
+# Avaliação de muitas mãos e agrupamentos de uma vez, com NumPy. Cada grupo de
+# cartas vira uma linha de uma matriz de contagens com uma coluna por face
+# (codigo % FACES_POR_BARALHO): com vários baralhos uma face pode aparecer mais
+# de uma vez. Os resultados são os mesmos de Mao.get_pontos,
+# Agrupamento.get_pontos/tipo e Jogador.get_pontos para as mesmas cartas.
+
+PONTOS_FACE = np.array(PONTOS, dtype=np.int32)
+ESPECIAIS = np.array(ESPECIAL, dtype=bool)  # Curingas e '2's
+NAIPES = 4
+CANASTRA = 7  # Cartas de uma canastra
+BONUS_CANASTRA_SUJA = 100  # Canastra com curinga ou '2'
+BONUS_CANASTRA_LIMPA = 200
+SEM_SEQUENCIA = 1 << 8  # Especiais "necessários" quando o naipe não tem carta normal
+
+
+def contagens_de_codigos(codigos: Sequence[int], comprimentos: Sequence[int]) -> np.ndarray:
+    """Matriz de contagens a partir dos códigos de todos os grupos em sequência e do tamanho de cada grupo"""
+    codigos = np.asarray(codigos, dtype=np.int64)
+    comprimentos = np.asarray(comprimentos, dtype=np.int64)
+    linhas = np.repeat(np.arange(len(comprimentos)), comprimentos)
+    contagens = np.bincount(linhas * FACES_POR_BARALHO + codigos % FACES_POR_BARALHO,
+                            minlength=len(comprimentos) * FACES_POR_BARALHO)
+    return contagens.reshape(len(comprimentos), FACES_POR_BARALHO).astype(np.uint8)
+
+
+def contagens(grupos: Iterable[Iterable[Carta]]) -> np.ndarray:
+    """Matriz de contagens (uma linha por grupo de cartas, uma coluna por face)"""
+    codigos = codificar(())
+    comprimentos = []
+    for grupo in grupos:
+        antes = len(codigos)
+        codigos.extend(carta.codigo for carta in grupo)
+        comprimentos.append(len(codigos) - antes)
+    return contagens_de_codigos(np.frombuffer(codigos, dtype=np.uint16), comprimentos)
+
+
+def de_jogadores(jogadores: Sequence['Jogador']) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Mãos, agrupamentos e o índice do jogador dono de cada agrupamento, prontos para pontos_jogadores"""
+    maos = contagens(jogador.mao for jogador in jogadores)
+    agrupamentos = contagens(g.cartas for jogador in jogadores for g in jogador.agrupamentos)
+    donos = np.repeat(np.arange(len(jogadores)), [len(jogador.agrupamentos) for jogador in jogadores])
+    return maos, agrupamentos, donos
+
+
+def pontos_cartas(contagens: np.ndarray) -> np.ndarray:
+    """Soma dos pontos das cartas de cada linha (o que uma mão desconta do jogador)"""
+    return contagens @ PONTOS_FACE
+
+
+def curingas(contagens: np.ndarray) -> np.ndarray:
+    """Curingas e '2's de cada linha"""
+    return contagens[:, ESPECIAIS].sum(axis=1, dtype=np.int32)
+
+
+def _naturais(contagens: np.ndarray) -> np.ndarray:
+    """Contagens das cartas normais (nem curinga nem '2'), com eixos (linha, naipe, valor)"""
+    naturais = contagens[:, :FACE_CURINGA].reshape(-1, NAIPES, NUM_VALORES).astype(np.int32)
+    naturais[:, :, 1] = 0
+    return naturais
+
+
+def classificar(contagens: np.ndarray) -> np.ndarray:
+    """Tipo de cada linha como agrupamento (bits TRINCA e SEQUENCIA), igual a Agrupamento.tipo"""
+    naturais = _naturais(contagens)
+    por_valor = naturais.sum(axis=1)
+    presentes = por_valor > 0
+    quantidade = por_valor.sum(axis=1)
+    total = contagens.sum(axis=1, dtype=np.int32)
+    tem_naturais = quantidade > 0
+
+    trinca = tem_naturais & (presentes.sum(axis=1) == 1)
+
+    um_naipe = (naturais.sum(axis=2) > 0).sum(axis=1) == 1
+    repetida = (naturais > 1).any(axis=(1, 2))
+    menor = presentes.argmax(axis=1)
+    maior = NUM_VALORES - 1 - presentes[:, ::-1].argmax(axis=1)
+    buracos = maior - menor + 1 - quantidade
+    sequencia = (tem_naturais & um_naipe & ~repetida & (buracos <= curingas(contagens))
+                 & (total <= NUM_VALORES))
+
+    return (trinca * TRINCA | sequencia * SEQUENCIA).astype(np.uint8)
+
+
+def validos(contagens: np.ndarray) -> np.ndarray:
+    """Linhas que formam um agrupamento válido (Agrupamento.validar)"""
+    return (contagens.sum(axis=1, dtype=np.int32) >= 3) & (classificar(contagens) != 0)
+
+
+def canastras(contagens: np.ndarray) -> np.ndarray:
+    """Linhas que formam uma canastra (Agrupamento.eh_canastra)"""
+    return (contagens.sum(axis=1, dtype=np.int32) >= CANASTRA) & (classificar(contagens) != 0)
+
+
+def pontos_agrupamentos(contagens: np.ndarray) -> np.ndarray:
+    """Pontos de cada linha como agrupamento, com o bônus de canastra (Agrupamento.get_pontos)"""
+    total = contagens.sum(axis=1, dtype=np.int32)
+    tipo = classificar(contagens)
+    bonus = np.where(curingas(contagens) > 0, BONUS_CANASTRA_SUJA, BONUS_CANASTRA_LIMPA)
+    pontos = pontos_cartas(contagens) + np.where(total >= CANASTRA, bonus, 0)
+    return np.where((total >= 3) & (tipo != 0), pontos, 0).astype(np.int32)
+
+
+def pontos_jogadores(maos: np.ndarray, agrupamentos: np.ndarray, donos: np.ndarray) -> np.ndarray:
+    """Pontuação de cada jogador: agrupamentos (pelo índice do dono) menos a mão (Jogador.get_pontos)"""
+    por_dono = np.bincount(donos, weights=pontos_agrupamentos(agrupamentos), minlength=len(maos))
+    return por_dono.astype(np.int32) - pontos_cartas(maos)
+
+
+def trincas_formaveis(contagens: np.ndarray) -> np.ndarray:
+    """Valores (colunas) com que cada mão forma uma trinca válida, usando curingas e '2's se precisar"""
+    por_valor = _naturais(contagens).sum(axis=1)
+    return (por_valor > 0) & (por_valor + curingas(contagens)[:, None] >= 3)
+
+
+def _especiais_necessarios() -> np.ndarray:
+    """Para cada máscara de valores normais de um naipe, quantos especiais uma sequência com elas exige
+
+    É o menor valor, entre as janelas de valores com alguma carta normal, dos
+    especiais que cobrem os buracos e completam as três cartas.
+    """
+    mascaras = np.arange(1 << NUM_VALORES)
+    bits = (mascaras[:, None] >> np.arange(NUM_VALORES)) & 1
+    acumulado = np.concatenate([np.zeros((len(mascaras), 1), dtype=np.int64), bits.cumsum(axis=1)], axis=1)
+    necessarios = np.full(len(mascaras), SEM_SEQUENCIA)
+    for largura in range(1, NUM_VALORES + 1):
+        naturais = acumulado[:, largura:] - acumulado[:, :-largura]
+        faltam = np.where(naturais > 0, np.maximum(largura - naturais, 3 - naturais), SEM_SEQUENCIA)
+        necessarios = np.minimum(necessarios, faltam.min(axis=1))
+    return necessarios.astype(np.int16)
+
+
+ESPECIAIS_NECESSARIOS = _especiais_necessarios()
+BITS_VALORES = 1 << np.arange(NUM_VALORES, dtype=np.int32)
+
+
+def sequencias_formaveis(contagens: np.ndarray) -> np.ndarray:
+    """Naipes (colunas) em que cada mão forma uma sequência válida, usando curingas e '2's se precisar
+
+    Uma carta normal com dois especiais conta (também é uma trinca).
+    """
+    mascaras = (_naturais(contagens) > 0) @ BITS_VALORES
+    return ESPECIAIS_NECESSARIOS[mascaras] <= curingas(contagens)[:, None]
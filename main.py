@@ -1,59 +1,261 @@
-import pygame
+import time
+INICIO = time.perf_counter()  # Antes das importações, para medir quanto elas custam
+
+import argparse
+import os
+import random
 import sys
-from jogo import Jogo
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from acoes import RegistroAcoes
+from estrategias import Estrategia, carregar_estrategia
+from fontes import carregar_fontes
+from jogo import Jogo, LIMITE_SEMENTE
+from instrumentacao import Instrumentacao
+
+if TYPE_CHECKING:
+    import pygame
+
+# Tempo máximo bloqueado esperando eventos (ms), para poder relatar estatísticas
+ESPERA_MAXIMA = 1000
+# Eventos que obrigam a repintar a tela inteira (janela exposta ou restaurada), pelos nomes no pygame:
+# o pygame só é importado quando a interface abre, para 'import main' continuar barato e sem efeitos
+EVENTOS_EXPOSICAO = ("VIDEOEXPOSE", "WINDOWEXPOSED", "WINDOWRESTORED")
+# Assento do oponente controlado pelo computador
+ASSENTO_OPONENTE = 1
+# Tecla que liga e desliga a instrumentação e o seu painel
+TECLA_INSTRUMENTACAO = "K_F3"
+
+
+class EstatisticasLaco:
+    """Mede o custo do laço principal: CPU usada, quadros desenhados e tempo de desenho"""
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.inicio_cpu = time.process_time()
+        self.iteracoes: int = 0
+        self.quadros: int = 0  # Chamadas a Interface.desenhar
+        self.quadros_pintados: int = 0  # Quadros que atualizaram alguma região da tela
+        self.tempo_desenho: float = 0.0
+        self.maior_quadro: float = 0.0
+
+    def registrar_quadro(self, duracao: float, pintou: bool) -> None:
+        """Soma um quadro desenhado"""
+        self.quadros += 1
+        self.quadros_pintados += pintou
+        self.tempo_desenho += duracao
+        self.maior_quadro = max(self.maior_quadro, duracao)
+
+    def resumo(self) -> dict:
+        """Totais e médias desde o início"""
+        decorrido = max(time.perf_counter() - self.inicio, 1e-9)
+        cpu = time.process_time() - self.inicio_cpu
+        return {
+            "segundos": decorrido,
+            "cpu_percentual": 100 * cpu / decorrido,
+            "iteracoes": self.iteracoes,
+            "quadros": self.quadros,
+            "quadros_pintados": self.quadros_pintados,
+            "quadros_por_segundo": self.quadros / decorrido,
+            "ms_por_quadro": 1000 * self.tempo_desenho / max(self.quadros, 1),
+            "ms_maior_quadro": 1000 * self.maior_quadro,
+        }
+
+    def formatar(self) -> str:
+        r = self.resumo()
+        return (f"{r['segundos']:.1f}s, CPU {r['cpu_percentual']:.1f}%, {r['iteracoes']} iterações, "
+                f"{r['quadros']} quadros ({r['quadros_pintados']} pintados, {r['quadros_por_segundo']:.1f}/s), "
+                f"{r['ms_por_quadro']:.2f} ms/quadro (máx. {r['ms_maior_quadro']:.2f} ms)")
+
+
+class MedicaoInicio:
+    """Tempo de cada etapa da inicialização, do começo da importação de main até o primeiro quadro"""
+    def __init__(self, inicio: float = INICIO):
+        self.inicio = inicio
+        self.anterior = inicio
+        self.etapas: List[Tuple[str, float]] = []
+
+    def marcar(self, etapa: str) -> None:
+        """Encerra uma etapa, que durou desde a marca anterior"""
+        agora = time.perf_counter()
+        self.etapas.append((etapa, agora - self.anterior))
+        self.anterior = agora
+
+    def resumo(self) -> dict:
+        """Duração de cada etapa e o total, em milissegundos"""
+        resumo = {f"{etapa}_ms": 1000 * duracao for etapa, duracao in self.etapas}
+        resumo["total_ms"] = 1000 * (self.anterior - self.inicio)
+        return resumo
+
+    def formatar(self) -> str:
+        etapas = ", ".join(f"{etapa} {1000 * duracao:.1f} ms" for etapa, duracao in self.etapas)
+        return f"Início: {etapas}; primeiro quadro em {1000 * (self.anterior - self.inicio):.1f} ms"
+
+
+def abrir_janela() -> 'pygame.Surface':
+    """Abre a janela do jogo; só o vídeo e as fontes do Pygame são inicializados (sem áudio nem joystick)"""
+    import pygame
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Buraco")
+    return screen
+
 
-# Inicialização do Pygame
-pygame.init()
+def criar_oponente(nome: str, semente: Optional[int], tempo: float, processos: Optional[int]) -> Estrategia:
+    """Cria a estratégia do oponente controlado pelo computador"""
+    rng = random.Random(semente)
+    if nome == "mcts":
+        from mcts import EstrategiaMCTS
+        return EstrategiaMCTS(rng, tempo=tempo, processos=processos)
+    return carregar_estrategia(nome)(rng)
 
-# Constantes
-SCREEN_WIDTH = 1200
-SCREEN_HEIGHT = 800
 
-# Configuração da tela
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Buraco")
-font = pygame.font.SysFont('Arial', 24)
-small_font = pygame.font.SysFont('Arial', 18)
+def jogar_turno_oponente(jogo: Jogo, oponente: Estrategia) -> None:
+    """Joga o turno do computador e encerra a partida se ela acabou"""
+    oponente.jogar_turno(jogo)
+    if jogo.verificar_fim_jogo():
+        jogo.estado = "fim"
+    elif jogo.jogador_atual == ASSENTO_OPONENTE:
+        # A estratégia não conseguiu descartar: passa a vez para não travar a partida
+        jogo.passar_vez()
 
-def main():
+
+def main(argv: Optional[List[str]] = None):
     """Função principal do jogo"""
+    parser = argparse.ArgumentParser(description="Buraco Simplificado")
+    parser.add_argument("--continuo", action="store_true",
+                        help="redesenha a cada iteração em vez de dormir até chegar um evento")
+    parser.add_argument("--fps", type=int, default=30, help="limite de quadros por segundo (0 = sem limite no modo por eventos)")
+    parser.add_argument("--estatisticas", action="store_true", help="mostra CPU e tempos de quadro periodicamente")
+    parser.add_argument("--semente", type=int, help="semente do embaralhamento (reproduz uma partida)")
+    parser.add_argument("--registro", help="acrescenta as ações das partidas neste log (ver reproducao.py)")
+    parser.add_argument("--oponente", default="humano",
+                        help="quem joga como Jogador 2: humano, gulosa, mcts ou outra estratégia (modulo:Classe)")
+    parser.add_argument("--tempo-ia", type=float, default=0.2, help="segundos de busca por decisão do oponente mcts")
+    parser.add_argument("--processos-ia", type=int, default=os.cpu_count(),
+                        help="processos de busca do oponente mcts (padrão: todos os núcleos)")
+    parser.add_argument("--instrumentacao", action="store_true",
+                        help="começa com a instrumentação e o painel ligados (F3 liga e desliga durante o jogo)")
+    parser.add_argument("--perfil", help="grava o que a instrumentação mediu neste arquivo JSON ao sair")
+    parser.add_argument("--medir-inicio", action="store_true",
+                        help="mostra quanto cada etapa da inicialização levou e sai depois do primeiro quadro")
+    args = parser.parse_args(argv)
+    if args.semente is not None and not 0 <= args.semente < LIMITE_SEMENTE:
+        parser.error("a semente deve estar entre 0 e 2**64 - 1")
+
+    import pygame
+    from interface import Interface
+    eventos_exposicao = tuple(getattr(pygame, nome) for nome in EVENTOS_EXPOSICAO)
+    tecla_instrumentacao = getattr(pygame, TECLA_INSTRUMENTACAO)
+
+    medicao = MedicaoInicio()
+    medicao.marcar("importação")
+    screen = abrir_janela()
+    medicao.marcar("janela")
+    font, small_font = carregar_fontes()
+    medicao.marcar("fontes")
     clock = pygame.time.Clock()
-    jogo = Jogo()
-    botao_reiniciar = None
-    
+    registro = RegistroAcoes.abrir(args.registro) if args.registro else None
+    oponente = None
+    nomes = ["Jogador 1", "Jogador 2"]
+    if args.oponente != "humano":
+        oponente = criar_oponente(args.oponente, args.semente, args.tempo_ia, args.processos_ia)
+        nomes[ASSENTO_OPONENTE] = f"Computador ({args.oponente})"
+    jogo = Jogo(args.semente, registro, nomes)
+    # As cartas são pré-compostas depois do primeiro quadro, com a janela já mostrando o jogo
+    interface = Interface(jogo, screen, font, small_font, pre_renderizar=False)
+    instrumentacao = Instrumentacao()
+    if args.instrumentacao:
+        instrumentacao.ligar(interface)
+    estatisticas = EstatisticasLaco()
+    intervalo_quadros = 1.0 / args.fps if args.fps > 0 else 0.0
+    ultimo_quadro = -intervalo_quadros
+    ultimo_relatorio = time.perf_counter()
+    pendente = True  # Há mudanças que ainda não foram desenhadas
+    primeiro_quadro = True
+    medicao.marcar("jogo e interface")
+
+    if not args.continuo:
+        # O movimento do mouse não muda nada na tela; não precisa acordar o laço
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
+
     running = True
     while running:
-        for event in pygame.event.get():
+        if oponente and not pendente and jogo.estado == "jogando" and jogo.jogador_atual == ASSENTO_OPONENTE:
+            # A vez do computador começa depois que a jogada anterior foi desenhada
+            jogar_turno_oponente(jogo, oponente)
+            pendente = True
+
+        if args.continuo:
+            eventos = pygame.event.get()
+            pendente = True
+        else:
+            # Dorme até chegar um evento (ou até poder desenhar o quadro pendente)
+            espera = ESPERA_MAXIMA
+            if pendente:
+                espera = max(1, int(1000 * (ultimo_quadro + intervalo_quadros - time.perf_counter())))
+            eventos = [pygame.event.wait(espera)] + pygame.event.get()
+
+        for event in eventos:
             if event.type == pygame.QUIT:
                 running = False
-            
+
             if event.type == pygame.MOUSEBUTTONDOWN:
-                pos = pygame.mouse.get_pos()
-                
-                if jogo.estado == "inicio":
-                    jogo.estado = "jogando"
-                    jogo.mensagem = f"Vez de {jogo.jogador_atual_nome()}"
-                
-                elif jogo.estado == "jogando":
-                    jogo.processar_clique(pos)
-                    
-                    # Verifica se o jogo terminou
-                    if jogo.verificar_fim_jogo():
-                        jogo.estado = "fim"
-                
-                elif jogo.estado == "fim":
-                    if botao_reiniciar and botao_reiniciar.collidepoint(pos):
-                        jogo.reiniciar()
-        
-        jogo.desenhar()
-        
-        if jogo.estado == "fim":
-            botao_reiniciar = jogo.desenhar_tela_fim()
-        
-        clock.tick(30)
-    
+                if oponente and jogo.estado == "jogando" and jogo.jogador_atual == ASSENTO_OPONENTE:
+                    continue  # Cliques durante a vez do computador são ignorados
+                interface.processar_clique(event.pos)
+
+                # Verifica se o jogo terminou
+                if jogo.estado == "jogando" and jogo.verificar_fim_jogo():
+                    jogo.estado = "fim"
+                pendente = True
+
+            if event.type in eventos_exposicao:
+                interface.renderizador.invalidar()
+                pendente = True
+
+            if event.type == pygame.KEYDOWN and event.key == tecla_instrumentacao:
+                instrumentacao.alternar(interface)
+                pendente = True
+
+            if event.type == pygame.NOEVENT and instrumentacao.ativa:
+                pendente = True  # Atualiza o painel mesmo sem eventos
+
+        agora = time.perf_counter()
+        if running and pendente and agora - ultimo_quadro >= intervalo_quadros:
+            rects = interface.desenhar()
+            estatisticas.registrar_quadro(time.perf_counter() - agora, bool(rects))
+            ultimo_quadro = agora
+            pendente = False
+            if primeiro_quadro:
+                primeiro_quadro = False
+                medicao.marcar("primeiro quadro")
+                if args.estatisticas or args.medir_inicio:
+                    print(medicao.formatar())
+                if args.medir_inicio:
+                    running = False
+                else:
+                    interface.sprites.pre_renderizar()
+
+        estatisticas.iteracoes += 1
+        if args.estatisticas and agora - ultimo_relatorio >= ESPERA_MAXIMA / 1000:
+            print(estatisticas.formatar())
+            ultimo_relatorio = agora
+
+        if args.continuo:
+            clock.tick(args.fps)
+
+    if args.estatisticas:
+        print(estatisticas.formatar())
+    instrumentacao.desligar()
+    if args.perfil:
+        instrumentacao.exportar(args.perfil)
+    if registro:
+        registro.fechar()
+    if oponente and hasattr(oponente, "fechar"):
+        oponente.fechar()
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(sys.argv[1:])
@@ -0,0 +1,174 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+from carta import Carta, NUM_VALORES
+from constants import VERIFICAR_CACHE
+
+class Mao:
+    """Cartas na mão de um jogador
+
+    Funciona como uma lista de cartas (na ordem em que chegaram), mas mantém
+    o total de pontos atualizado a cada carta que entra ou sai, de modo que
+    a pontuação do jogador não precisa percorrer a mão. 'versao' muda a cada
+    alteração e pode ser usada para invalidar resultados guardados.
+
+    A ordem é guardada como uma chave crescente por carta (ordem(carta)):
+    comprar, descartar, testar se uma carta está na mão e devolver uma carta
+    à posição que ocupava (recolocar, usado ao desfazer) não dependem do
+    tamanho da mão nem do número de baralhos. A lista em ordem só é refeita
+    quando alguém percorre a mão depois de uma saída.
+
+    A mão também é indexada: cartas normais por face (cópias da mesma face,
+    com vários baralhos, continuam distintas pelo código), máscaras dos
+    valores presentes em cada naipe, curingas e '2's à parte, com versões por
+    valor, por naipe e dos especiais, para que quem guarda resultados
+    derivados só da parte da mão que mudou possa reaproveitar o resto.
+    """
+    def __init__(self, cartas: Iterable[Carta] = ()):
+        self._ordem: Dict[Carta, int] = {}  # Chave de ordem de cada carta na mão
+        self._lista: Optional[List[Carta]] = []  # Cartas em ordem (None se precisa ser refeita)
+        self._proxima: int = 0  # Chave da próxima carta que chegar
+        self.pontos: int = 0  # Soma dos pontos das cartas na mão
+        self.versao: int = 0
+
+        # Índices
+        self.por_face: Dict[int, List[Carta]] = {}  # Cartas normais por face
+        self.mascaras: List[int] = [0, 0, 0, 0]  # Bits dos valores normais presentes em cada naipe
+        self.curingas: List[Carta] = []
+        self.dois: List[Carta] = []
+        self.versoes_valor: List[int] = [0] * NUM_VALORES
+        self.versoes_naipe: List[int] = [0, 0, 0, 0]
+        self.versao_especiais: int = 0
+
+        for carta in cartas:
+            self.append(carta)
+
+    def _entrou(self, carta: Carta) -> None:
+        """Atualiza o total e os índices com uma carta que entrou na mão"""
+        self.pontos += carta.pontos
+        self.versao += 1
+        if carta.especial:
+            (self.curingas if carta.curinga else self.dois).append(carta)
+            self.versao_especiais += 1
+            return
+        self.por_face.setdefault(carta.face, []).append(carta)
+        self.mascaras[carta.naipe_idx] |= 1 << carta.valor_idx
+        self.versoes_valor[carta.valor_idx] += 1
+        self.versoes_naipe[carta.naipe_idx] += 1
+
+    def _saiu(self, carta: Carta) -> None:
+        """Atualiza o total e os índices com uma carta que saiu da mão"""
+        self.pontos -= carta.pontos
+        self.versao += 1
+        if carta.especial:
+            (self.curingas if carta.curinga else self.dois).remove(carta)
+            self.versao_especiais += 1
+            return
+        mesma_face = self.por_face[carta.face]
+        mesma_face.remove(carta)
+        if not mesma_face:
+            del self.por_face[carta.face]
+            self.mascaras[carta.naipe_idx] &= ~(1 << carta.valor_idx)
+        self.versoes_valor[carta.valor_idx] += 1
+        self.versoes_naipe[carta.naipe_idx] += 1
+
+    def _em_ordem(self) -> List[Carta]:
+        """Cartas na ordem da mão (refeita, se preciso, pelas chaves de ordem)"""
+        if self._lista is None:
+            self._lista = sorted(self._ordem, key=self._ordem.__getitem__)
+        return self._lista
+
+    def __str__(self) -> str:
+        return f"Mão: {self._em_ordem()}"
+
+    def __repr__(self) -> str:
+        return repr(self._em_ordem())
+
+    def __len__(self) -> int:
+        return len(self._ordem)
+
+    def __iter__(self) -> Iterator[Carta]:
+        return iter(self._em_ordem())
+
+    def __getitem__(self, indice):
+        return self._em_ordem()[indice]
+
+    def __contains__(self, carta: Carta) -> bool:
+        return carta in self._ordem
+
+    def append(self, carta: Carta) -> None:
+        """Adiciona uma carta ao fim da mão"""
+        self._ordem[carta] = self._proxima
+        self._proxima += 1
+        if self._lista is not None:
+            self._lista.append(carta)
+        self._entrou(carta)
+
+    def extend(self, cartas: Iterable[Carta]) -> None:
+        """Adiciona várias cartas ao fim da mão, na ordem dada"""
+        for carta in cartas:
+            self.append(carta)
+
+    def remove(self, carta: Carta) -> None:
+        """Remove uma carta da mão (ValueError se ela não estiver na mão)"""
+        if self._ordem.pop(carta, None) is None:
+            raise ValueError(f"{carta} não está na mão")
+        if self._lista is not None and self._lista[-1] is carta:
+            self._lista.pop()
+        else:
+            self._lista = None
+        self._saiu(carta)
+
+    def ordem(self, carta: Carta) -> int:
+        """Chave de ordem da carta na mão, para devolvê-la ao mesmo lugar com recolocar (KeyError se não está)"""
+        return self._ordem[carta]
+
+    def recolocar(self, carta: Carta, ordem: int) -> None:
+        """Devolve uma carta que saiu da mão ao lugar que ela ocupava (a chave dada por ordem())"""
+        self._ordem[carta] = ordem
+        self._proxima = max(self._proxima, ordem + 1)
+        self._lista = None
+        self._entrou(carta)
+
+    def index(self, carta: Carta) -> int:
+        """Posição da carta na mão (ValueError se ela não estiver na mão)"""
+        return self._em_ordem().index(carta)
+
+    def inserir(self, indice: int, carta: Carta) -> None:
+        """Coloca uma carta numa posição da mão (renumera as chaves de ordem: proporcional ao tamanho da mão)"""
+        cartas = self._em_ordem().copy()
+        cartas.insert(indice, carta)
+        self._ordem = {c: i for i, c in enumerate(cartas)}
+        self._proxima = len(cartas)
+        self._lista = cartas
+        self._entrou(carta)
+
+    def pop(self) -> Carta:
+        """Remove e retorna a última carta da mão"""
+        carta = self._em_ordem()[-1]
+        self.remove(carta)
+        return carta
+
+    def copiar(self) -> 'Mao':
+        """Retorna uma cópia independente da mão"""
+        copia = Mao.__new__(Mao)
+        copia.__dict__.update(self.__dict__)
+        copia._ordem = self._ordem.copy()
+        copia._lista = self._lista.copy() if self._lista is not None else None
+        copia.por_face = {face: cartas.copy() for face, cartas in self.por_face.items()}
+        copia.mascaras = self.mascaras.copy()
+        copia.curingas = self.curingas.copy()
+        copia.dois = self.dois.copy()
+        copia.versoes_valor = self.versoes_valor.copy()
+        copia.versoes_naipe = self.versoes_naipe.copy()
+        return copia
+
+    def copy(self) -> List[Carta]:
+        """Retorna as cartas numa lista independente"""
+        return self._em_ordem().copy()
+
+    def get_pontos(self) -> int:
+        """Retorna a soma dos pontos das cartas na mão"""
+        if VERIFICAR_CACHE:
+            recalculado = sum(c.pontos for c in self._ordem)
+            if recalculado != self.pontos:
+                raise RuntimeError(f"Pontos da mão desatualizados: {self.pontos} != {recalculado}")
+        return self.pontos
@@ -0,0 +1,329 @@
+import math
+import os
+import random
+import time
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+from acoes import Acao, FORMAR, ESTENDER, PASSAR
+from carta import Carta
+from estrategias import Estrategia, EstrategiaGulosa
+from jogo import Jogo
+from legais import compras, descartes
+from mao import Mao
+
+# Um lance é uma sequência de ações que a busca trata como uma única escolha:
+# uma compra, um conjunto de agrupamentos (vazio para não baixar nada) ou um descarte
+Lance = Tuple[Acao, ...]
+
+# Fases do turno, na ordem em que a árvore as decide
+COMPRA = 0
+BAIXAR = 1
+DESCARTE = 2
+
+# Diferença de pontos que vale cerca de 73% de chance de vitória na avaliação
+ESCALA_PONTOS = 100.0
+# Folga para juntar os resultados dos processos dentro do tempo
+MARGEM_PROCESSOS = 0.02
+
+
+class _No:
+    """Nó da árvore de busca, compartilhado entre as determinizações"""
+    __slots__ = ('filhos', 'visitas', 'valor', 'disponivel')
+
+    def __init__(self):
+        self.filhos: Dict[Lance, '_No'] = {}
+        self.visitas: int = 0
+        self.valor: float = 0.0  # Soma das avaliações, do ponto de vista do jogador que busca
+        self.disponivel: int = 0  # Iterações em que o lance deste nó era possível
+
+
+def _lance_da_jogada(indice: int, jogada) -> Lance:
+    """Converte uma Jogada do solucionador nas ações FORMAR/ESTENDER equivalentes"""
+    acoes = [Acao(FORMAR, indice, tuple(c.codigo for c in cartas)) for cartas in jogada.novos]
+    acoes += [Acao(ESTENDER, indice, tuple(c.codigo for c in cartas), alvo) for alvo, cartas in jogada.extensoes]
+    return tuple(acoes)
+
+
+class _Busca:
+    """Uma busca MCTS determinizada a partir do estado de um jogo
+
+    A árvore cobre as decisões do turno do jogador que busca (compra,
+    agrupamentos a baixar e descarte). A cada iteração as cartas que ele
+    não vê (mão do adversário, mortos e ordem do monte) são sorteadas de novo, e os
+    lances impossíveis naquele sorteio são ignorados na seleção (contagem
+    de disponibilidade, como no MCTS de conjuntos de informação). Depois do
+    turno, a partida segue com uma estratégia gulosa por alguns turnos e o
+    placar é avaliado. Todas as jogadas são feitas numa única cópia do jogo
+    e desfeitas ao fim da iteração (Jogo.fazer/desfazer).
+    """
+    def __init__(self, jogo: Jogo, rng: random.Random, horizonte: int, exploracao: float):
+        self.jogo = jogo.copiar()
+        self.indice = jogo.jogador_atual
+        self.rng = rng
+        self.horizonte = horizonte
+        self.exploracao = exploracao
+        self.raiz = _No()
+        self.fase_raiz = COMPRA if not jogo.jogadores[self.indice].comprou_carta else BAIXAR
+        self.jogadas: Dict[tuple, List[Lance]] = {}  # Lances de BAIXAR por mão e agrupamentos
+        self.iteracoes = 0
+
+        # Cartas que o jogador não vê
+        self.ocultas = [c for j, jogador in enumerate(self.jogo.jogadores) if j != self.indice for c in jogador.mao]
+        self.ocultas += self.jogo.monte.cartas
+        for morto in self.jogo.monte.mortos:
+            self.ocultas += morto
+
+    def _determinizar(self) -> None:
+        """Sorteia as cartas ocultas entre as mãos dos adversários, os mortos e o monte"""
+        cartas = self.ocultas.copy()
+        self.rng.shuffle(cartas)
+        inicio = 0
+        for j, jogador in enumerate(self.jogo.jogadores):
+            if j != self.indice:
+                quantidade = len(jogador.mao)
+                jogador.mao = Mao(cartas[inicio:inicio + quantidade])
+                inicio += quantidade
+        mortos = []
+        for morto in self.jogo.monte.mortos:
+            mortos.append(cartas[inicio:inicio + len(morto)])
+            inicio += len(morto)
+        self.jogo.monte.mortos = mortos
+        self.jogo.monte.cartas = cartas[inicio:]
+
+    def _baixar(self) -> List[Lance]:
+        """Não baixar nada, a melhor jogada do solucionador e, se possível, bater"""
+        jogador = self.jogo.jogadores[self.indice]
+        chave = (tuple(c.codigo for c in jogador.mao), tuple(g.codigos for g in jogador.agrupamentos))
+        if chave not in self.jogadas:
+            lances = [()]
+            jogada = jogador.melhor_jogada(minimo_na_mao=1)
+            if jogada.novos or jogada.extensoes:
+                lances.append(_lance_da_jogada(self.indice, jogada))
+            batida = jogador.melhor_jogada()
+            if (batida.novos or batida.extensoes) and EstrategiaGulosa._bate(jogador, batida):
+                lances.append(_lance_da_jogada(self.indice, batida))
+            self.jogadas[chave] = lances
+        return self.jogadas[chave]
+
+    def _lances(self, fase: int) -> List[Lance]:
+        if fase == COMPRA:
+            return [(acao,) for acao in compras(self.jogo)]
+        if fase == BAIXAR:
+            return self._baixar()
+        fim_de_turno = descartes(self.jogo)
+        return [(acao,) for acao in fim_de_turno] or [(Acao(PASSAR, self.indice),)]
+
+    def _selecionar(self, no: _No, lances: List[Lance]) -> Tuple[Lance, bool]:
+        """Escolhe um lance ainda não tentado ou, se não houver, o de maior UCB; retorna (lance, novo)"""
+        novos = [lance for lance in lances if lance not in no.filhos]
+        for lance in lances:
+            if lance in no.filhos:
+                no.filhos[lance].disponivel += 1
+        if novos:
+            return self.rng.choice(novos), True
+
+        def ucb(lance: Lance) -> float:
+            filho = no.filhos[lance]
+            return filho.valor / filho.visitas + self.exploracao * math.sqrt(math.log(filho.disponivel) / filho.visitas)
+        return max(lances, key=ucb), False
+
+    def _simular(self) -> float:
+        """Joga alguns turnos com uma versão rápida da estratégia gulosa e avalia o placar
+
+        Em cada turno simulado o jogador compra do monte, baixa a melhor
+        jogada que deixa uma carta na mão e descarta a carta de mais pontos:
+        uma única chamada ao solucionador por turno.
+        """
+        jogo = self.jogo
+        for _ in range(self.horizonte):
+            if jogo.verificar_fim_jogo():
+                break
+            jogador = jogo.jogador_atual_obj()
+            if not jogo.comprar_do_monte():
+                jogo.comprar_do_descarte()
+            jogo.aplicar_jogada(jogador.melhor_jogada(minimo_na_mao=1))
+            if jogador.mao:
+                jogo.descartar_carta(max(jogador.mao, key=lambda c: c.pontos))
+            else:
+                jogo.passar_vez()
+        return self._avaliar()
+
+    def _avaliar(self) -> float:
+        """Chance estimada de vitória do jogador que busca, pela diferença de pontos da sua equipe"""
+        pontos = self.jogo.pontos_equipes()
+        equipe = self.jogo.jogadores[self.indice].equipe.indice
+        diferenca = pontos[equipe] - max(p for e, p in enumerate(pontos) if e != equipe)
+        if self.jogo.verificar_fim_jogo():
+            return 1.0 if diferenca > 0 else 0.0 if diferenca < 0 else 0.5
+        return 1.0 / (1.0 + math.exp(-diferenca / ESCALA_PONTOS))
+
+    def iterar(self) -> None:
+        """Uma iteração: determiniza, desce pela árvore, expande um nó, simula e propaga"""
+        jogo = self.jogo
+        base = len(jogo.historico)
+        self._determinizar()
+
+        caminho = [self.raiz]
+        no = self.raiz
+        fase = self.fase_raiz
+        while fase <= DESCARTE and not jogo.verificar_fim_jogo():
+            lances = self._lances(fase)
+            if not lances:
+                break
+            lance, novo = self._selecionar(no, lances)
+            for acao in lance:
+                if jogo.fazer(acao) is None:
+                    raise RuntimeError(f"Lance recusado na busca: {acao}")
+            if novo:
+                no.filhos[lance] = _No()
+                no.filhos[lance].disponivel = 1
+            no = no.filhos[lance]
+            caminho.append(no)
+            fase += 1
+            if novo:
+                break
+
+        # Termina o turno do jogador que busca, se a expansão parou no meio dele,
+        # como a estratégia gulosa: baixa a melhor jogada e descarta a carta de mais pontos
+        while fase <= DESCARTE and not jogo.verificar_fim_jogo():
+            lances = self._lances(fase)
+            if fase == COMPRA:
+                lance = self.rng.choice(lances) if lances else ()
+            elif fase == BAIXAR:
+                lance = lances[-1]
+            else:
+                lance = max(lances, key=lambda l: Carta(l[0].cartas[0]).pontos if l[0].cartas else 0)
+            for acao in lance:
+                jogo.fazer(acao)
+            fase += 1
+
+        valor = self._simular()
+        for no in caminho:
+            no.visitas += 1
+            no.valor += valor
+
+        while len(jogo.historico) > base:
+            jogo.desfazer()
+        self.iteracoes += 1
+
+    def estatisticas(self) -> Dict[Tuple[Lance, ...], Tuple[int, float]]:
+        """Visitas e valor dos dois primeiros níveis da árvore, por caminho de lances"""
+        resultado = {}
+        for lance, filho in self.raiz.filhos.items():
+            resultado[(lance,)] = (filho.visitas, filho.valor)
+            for neto_lance, neto in filho.filhos.items():
+                resultado[(lance, neto_lance)] = (neto.visitas, neto.valor)
+        return resultado
+
+
+def buscar(jogo: Jogo, semente: int, prazo: float, iteracoes: Optional[int] = None, horizonte: int = 4,
+           exploracao: float = 0.7) -> Tuple[Dict[Tuple[Lance, ...], Tuple[int, float]], int]:
+    """Roda uma busca até o prazo (time.monotonic) ou o número de iterações; retorna (estatísticas, iterações)"""
+    busca = _Busca(jogo, random.Random(semente), horizonte, exploracao)
+    busca.iterar()  # Pelo menos uma iteração, mesmo com o prazo esgotado
+    while (iteracoes is None or busca.iteracoes < iteracoes) and time.monotonic() < prazo:
+        busca.iterar()
+    return busca.estatisticas(), busca.iteracoes
+
+
+def _buscar_em_processo(args: tuple) -> Tuple[Dict[Tuple[Lance, ...], Tuple[int, float]], int]:
+    """Busca num processo do pool, a partir do estado em bytes"""
+    estado, semente, prazo, iteracoes, horizonte, exploracao = args
+    return buscar(Jogo.de_bytes(estado), semente, prazo, iteracoes, horizonte, exploracao)
+
+
+class EstrategiaMCTS(Estrategia):
+    """Busca em árvore Monte Carlo determinizada, com limite de tempo por decisão
+
+    O turno tem duas decisões: a compra e, já com a carta comprada na mão,
+    os agrupamentos a baixar junto com o descarte. Cada uma é escolhida por
+    uma busca de até 'tempo' segundos. Com 'processos' > 1, cada processo
+    faz uma busca independente a partir da mesma posição (paralelismo na
+    raiz) e as visitas são somadas antes de escolher.
+    """
+    nome = "mcts"
+
+    def __init__(self, rng: random.Random = None, tempo: float = 0.2, processos: int = 1,
+                 iteracoes: Optional[int] = None, horizonte: int = 4, exploracao: float = 0.7):
+        super().__init__(rng)
+        self.tempo = tempo
+        self.processos = processos or os.cpu_count() or 1
+        self.iteracoes = iteracoes  # Limite de iterações por busca (e por processo), além do tempo
+        self.horizonte = horizonte  # Turnos simulados depois do turno decidido
+        self.exploracao = exploracao
+        self.total_iteracoes = 0
+        self._pool: Optional[Pool] = None
+
+    def __getstate__(self):
+        # O pool não vai junto quando a estratégia é copiada para outro processo
+        estado = self.__dict__.copy()
+        estado['_pool'] = None
+        return estado
+
+    def fechar(self) -> None:
+        """Encerra os processos de busca"""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def _estatisticas(self, jogo: Jogo) -> Dict[Tuple[Lance, ...], Tuple[int, float]]:
+        """Soma as estatísticas das buscas (uma por processo) a partir da posição atual"""
+        if self.processos > 1 and self._pool is None:
+            self._pool = Pool(self.processos)
+        prazo = time.monotonic() + self.tempo
+        if self.processos == 1:
+            estatisticas, iteracoes = buscar(jogo, self.rng.randrange(2 ** 63), prazo, self.iteracoes,
+                                             self.horizonte, self.exploracao)
+            self.total_iteracoes += iteracoes
+            return estatisticas
+
+        estado = jogo.para_bytes()
+        args = [(estado, self.rng.randrange(2 ** 63), prazo - MARGEM_PROCESSOS, self.iteracoes, self.horizonte,
+                 self.exploracao) for _ in range(self.processos)]
+        total: Dict[Tuple[Lance, ...], Tuple[int, float]] = {}
+        for estatisticas, iteracoes in self._pool.map(_buscar_em_processo, args):
+            self.total_iteracoes += iteracoes
+            for caminho, (visitas, valor) in estatisticas.items():
+                anteriores = total.get(caminho, (0, 0.0))
+                total[caminho] = (anteriores[0] + visitas, anteriores[1] + valor)
+        return total
+
+    @staticmethod
+    def _mais_visitado(estatisticas: Dict[Tuple[Lance, ...], Tuple[int, float]],
+                       prefixo: Tuple[Lance, ...]) -> Optional[Lance]:
+        """Lance mais visitado logo abaixo do caminho 'prefixo' (desempate pelo valor médio)"""
+        candidatos = [(visitas, valor / visitas, caminho[-1]) for caminho, (visitas, valor) in estatisticas.items()
+                      if len(caminho) == len(prefixo) + 1 and caminho[:-1] == prefixo and visitas]
+        if not candidatos:
+            return None
+        return max(candidatos, key=lambda c: (c[0], c[1]))[2]
+
+    def _executar(self, jogo: Jogo, lance: Lance) -> None:
+        for acao in lance:
+            jogo.fazer(acao)
+
+    def jogar_turno(self, jogo: Jogo) -> None:
+        jogador = jogo.jogador_atual_obj()
+        if not jogador.comprou_carta:
+            compra = self._mais_visitado(self._estatisticas(jogo), ())
+            if compra is None:
+                return
+            self._executar(jogo, compra)
+            if jogo.verificar_fim_jogo():
+                return
+
+        estatisticas = self._estatisticas(jogo)
+        baixar = self._mais_visitado(estatisticas, ())
+        if baixar is None:
+            return
+        self._executar(jogo, baixar)
+        if jogo.verificar_fim_jogo():
+            return
+        descarte = self._mais_visitado(estatisticas, (baixar,))
+        if descarte is None:
+            # O lance escolhido nunca chegou ao descarte na busca: descarta a carta de mais pontos
+            descartaveis = descartes(jogo)
+            if not descartaveis:
+                return
+            descarte = (max(descartaveis, key=lambda a: Carta(a.cartas[0]).pontos),)
+        self._executar(jogo, descarte)
@@ -0,0 +1,72 @@
+import pygame
+from typing import List, Set, Tuple
+
+# Uma camada é uma superfície desenhada numa posição da tela
+Camada = Tuple[pygame.Surface, pygame.Rect]
+
+
+class Renderizador:
+    """Desenha um quadro atualizando só as regiões da tela que mudaram
+
+    A cada quadro a interface monta a lista de camadas (na ordem de desenho)
+    e o renderizador a compara com a do quadro anterior: as camadas que
+    apareceram, sumiram ou mudaram de superfície marcam suas regiões como
+    sujas. Só essas regiões são repintadas (fundo e camadas que as tocam,
+    recortadas pela região) e enviadas com pygame.display.update. Um quadro
+    sem mudanças não desenha nada.
+    """
+    def __init__(self, screen: pygame.Surface, cor_fundo: Tuple[int, int, int]):
+        self.screen = screen
+        self.cor_fundo = cor_fundo
+        # Mantém as superfícies do quadro anterior vivas, para que id() identifique cada uma
+        self._anteriores: List[Camada] = []
+        self._assinaturas: Set[tuple] = set()
+        self._completo = True
+
+    def invalidar(self) -> None:
+        """Força o próximo quadro a redesenhar a tela inteira"""
+        self._completo = True
+
+    @staticmethod
+    def _assinatura(camada: Camada) -> tuple:
+        superficie, rect = camada
+        return id(superficie), rect.x, rect.y, rect.w, rect.h
+
+    def desenhar(self, camadas: List[Camada]) -> List[pygame.Rect]:
+        """Desenha as camadas e retorna as regiões atualizadas na tela"""
+        assinaturas = {self._assinatura(c) for c in camadas}
+        area_tela = self.screen.get_rect()
+
+        if self._completo:
+            sujas = [area_tela]
+        else:
+            # Uma camada que troca de superfície no mesmo lugar suja a região uma vez só
+            regioes = {assinatura[1:] for assinatura in assinaturas ^ self._assinaturas}
+            sujas = [pygame.Rect(regiao).clip(area_tela) for regiao in regioes]
+            sujas = [r for r in sujas if r.w and r.h]
+            # Se quase tudo mudou, é mais barato redesenhar a tela inteira
+            if sum(r.w * r.h for r in sujas) * 2 >= area_tela.w * area_tela.h:
+                sujas = [area_tela]
+
+        self._anteriores = camadas
+        self._assinaturas = assinaturas
+        self._completo = False
+        if not sujas:
+            return []
+
+        if sujas[0] is area_tela:
+            self.screen.fill(self.cor_fundo)
+            for superficie, rect in camadas:
+                self.screen.blit(superficie, rect)
+            pygame.display.flip()
+            return sujas
+
+        for suja in sujas:
+            self.screen.set_clip(suja)
+            self.screen.fill(self.cor_fundo)
+            for superficie, rect in camadas:
+                if rect.colliderect(suja):
+                    self.screen.blit(superficie, rect)
+        self.screen.set_clip(None)
+        pygame.display.update(sujas)
+        return sujas
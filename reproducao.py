@@ -0,0 +1,184 @@
+import argparse
+import sys
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+from acoes import (
+    CHECKPOINT, DESCARTAR, NOVO_JOGO, PASSAR, Acao, aplicar_acao, decodificar_acao, decodificar_checkpoint,
+    decodificar_novo_jogo, ler_registros
+)
+from jogo import Jogo
+
+class ResumoPartida(NamedTuple):
+    """Resultado da reprodução de uma partida do log"""
+    indice: int
+    semente: int
+    turnos: int
+    acoes: int
+    pontos: Tuple[int, ...]
+    vencedor: Optional[int]
+
+
+class ErroReproducao(ValueError):
+    """O log não corresponde ao que a reprodução da partida produz"""
+
+
+def _novo_jogo(conteudo: bytes) -> Jogo:
+    novo = decodificar_novo_jogo(conteudo)
+    jogo = Jogo(novo.semente, nomes=[f"Jogador {i + 1}" for i in range(novo.num_jogadores)], baralhos=novo.baralhos,
+                equipes=novo.equipes, mortos=novo.mortos, descarte_inteiro=novo.descarte_inteiro)
+    jogo.iniciar()
+    return jogo
+
+
+def _estado_das_regras(dados: bytes) -> bytes:
+    # A mensagem e a tela atual (início, jogo, fim) não fazem parte das regras;
+    # a mensagem muda até com ações recusadas, que não vão para o log
+    jogo = Jogo.de_bytes(dados)
+    jogo.mensagem = ""
+    jogo.estado = "jogando"
+    return jogo.para_bytes()
+
+
+def _resumo(indice: int, jogo: Jogo, acoes: int) -> ResumoPartida:
+    vencedor = jogo.vencedor()
+    return ResumoPartida(indice, jogo.semente, jogo.turno, acoes, tuple(j.equipe.get_pontos() for j in jogo.jogadores),
+                         jogo.jogadores.index(vencedor) if vencedor else None)
+
+
+def _aplicar(jogo: Jogo, acao: Acao, indice: int) -> None:
+    if not aplicar_acao(jogo, acao):
+        raise ErroReproducao(f"Partida {indice}, turno {jogo.turno}: ação recusada na reprodução: {acao}")
+
+
+def reproduzir(arquivo: BinaryIO, verificar: bool = False) -> Iterator[ResumoPartida]:
+    """Reproduz, sem interface, todas as partidas de um log, uma de cada vez
+
+    Com 'verificar', compara o estado reproduzido com cada checkpoint do log.
+    """
+    jogo: Optional[Jogo] = None
+    indice = -1
+    acoes = 0
+    for tipo, conteudo in ler_registros(arquivo):
+        if tipo == NOVO_JOGO:
+            if jogo is not None:
+                yield _resumo(indice, jogo, acoes)
+            indice += 1
+            acoes = 0
+            jogo = _novo_jogo(conteudo)
+        elif jogo is None:
+            raise ErroReproducao("O log não começa com o início de uma partida")
+        elif tipo == CHECKPOINT:
+            if verificar:
+                turno, estado = decodificar_checkpoint(conteudo)
+                if turno != jogo.turno or _estado_das_regras(estado) != _estado_das_regras(jogo.para_bytes()):
+                    raise ErroReproducao(f"Partida {indice}, turno {turno}: estado reproduzido difere do checkpoint")
+        else:
+            _aplicar(jogo, decodificar_acao(tipo, conteudo), indice)
+            acoes += 1
+    if jogo is not None:
+        yield _resumo(indice, jogo, acoes)
+
+
+def estado_no_turno(arquivo: BinaryIO, partida: int, turno: int) -> Jogo:
+    """Retorna o estado da partida 'partida' do log no início do turno 'turno'
+
+    Os registros das outras partidas são apenas pulados. Dentro da partida,
+    só as ações posteriores ao último checkpoint antes do turno são
+    reproduzidas, a partir do estado guardado nele.
+    """
+    indice = -1
+    inicio: Optional[bytes] = None  # Registro NOVO_JOGO da partida
+    checkpoint: Optional[bytes] = None  # Estado do último checkpoint até o turno pedido
+    pendentes: List[Tuple[int, bytes]] = []  # Ações depois desse checkpoint
+    for tipo, conteudo in ler_registros(arquivo):
+        if tipo == NOVO_JOGO:
+            indice += 1
+            if indice > partida:
+                break
+            if indice == partida:
+                inicio = conteudo
+            continue
+        if indice != partida:
+            continue
+        if tipo == CHECKPOINT:
+            turno_checkpoint, estado = decodificar_checkpoint(conteudo)
+            if turno_checkpoint > turno:
+                break
+            checkpoint = estado
+            pendentes.clear()
+        else:
+            pendentes.append((tipo, conteudo))
+
+    if inicio is None:
+        raise ErroReproducao(f"O log tem apenas {indice + 1} partidas")
+    if checkpoint is None:
+        jogo = _novo_jogo(inicio)
+    else:
+        jogo = Jogo.de_bytes(checkpoint)
+        if jogo.estado == "inicio":  # O checkpoint do turno 0 é gravado antes da tela de início
+            jogo.iniciar()
+    for tipo, conteudo in pendentes:
+        if jogo.turno >= turno:
+            break
+        _aplicar(jogo, decodificar_acao(tipo, conteudo), partida)
+    if jogo.turno != turno:
+        raise ErroReproducao(f"A partida {partida} terminou no turno {jogo.turno}")
+    return jogo
+
+
+def listar_acoes(arquivo: BinaryIO, partida: int) -> Iterator[Tuple[int, Acao]]:
+    """Percorre as ações (turno, ação) de uma partida do log"""
+    indice = -1
+    turno = 0
+    for tipo, conteudo in ler_registros(arquivo):
+        if tipo == NOVO_JOGO:
+            indice += 1
+            if indice > partida:
+                return
+        elif indice == partida:
+            if tipo == CHECKPOINT:
+                turno = decodificar_checkpoint(conteudo)[0]
+                continue
+            acao = decodificar_acao(tipo, conteudo)
+            yield turno, acao
+            if acao.tipo in (DESCARTAR, PASSAR):  # Terminam o turno
+                turno += 1
+
+
+def _mostrar_estado(jogo: Jogo) -> None:
+    print(f"Semente {jogo.semente}, turno {jogo.turno}, vez de {jogo.jogador_atual_nome()}")
+    mortos = f", mortos: {[len(morto) for morto in jogo.monte.mortos]}" if jogo.monte.mortos else ""
+    print(f"  Monte: {len(jogo.monte.cartas)} cartas{mortos}, descarte: {jogo.monte.descarte}")
+    for jogador in jogo.jogadores:
+        print(f"  {jogador.nome} ({jogador.get_pontos()} pontos): mão {list(jogador.mao)}")
+        for i, agrupamento in enumerate(jogador.agrupamentos):
+            print(f"    #{i} {agrupamento.cartas}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Reproduz logs de partidas pela linha de comando"""
+    parser = argparse.ArgumentParser(description="Reproduz partidas gravadas num log de ações")
+    parser.add_argument("log", help="arquivo de log (RegistroAcoes)")
+    parser.add_argument("--partida", type=int, help="mostra só esta partida (índice a partir de 0)")
+    parser.add_argument("--turno", type=int, help="com --partida, mostra o estado no início deste turno")
+    parser.add_argument("--acoes", action="store_true", help="com --partida, lista as ações da partida")
+    parser.add_argument("--verificar", action="store_true", help="confere o estado reproduzido com os checkpoints")
+    args = parser.parse_args(argv)
+
+    with open(args.log, "rb", buffering=1 << 20) as arquivo:
+        if args.partida is not None and args.turno is not None:
+            _mostrar_estado(estado_no_turno(arquivo, args.partida, args.turno))
+            return
+        if args.partida is not None and args.acoes:
+            for turno, acao in listar_acoes(arquivo, args.partida):
+                print(f"{turno:4d} {acao}")
+            return
+
+        for resumo in reproduzir(arquivo, args.verificar):
+            if args.partida is None or resumo.indice == args.partida:
+                vencedor = f"jogador {resumo.vencedor + 1}" if resumo.vencedor is not None else "empate"
+                print(f"Partida {resumo.indice}: semente {resumo.semente}, {resumo.turnos} turnos, "
+                      f"{resumo.acoes} ações, pontos {resumo.pontos}, {vencedor}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
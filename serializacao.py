@@ -0,0 +1,181 @@
+import struct
+import sys
+from array import array
+from typing import List, Optional
+from carta import Carta, codificar, decodificar
+from agrupamento import Agrupamento
+from jogador import Equipe, Jogador
+from legais import GeradorAcoes
+from mao import Mao
+from monte import Monte
+
+# Formato binário do estado de uma partida (little-endian):
+#   cabeçalho: MAGICO, versão (B), estado (B), jogador atual (B), nº de jogadores (B),
+#   turno (I), semente (Q), baralhos (B), mortos (B) e descarte inteiro (B)
+#   textos: tamanho (H) + UTF-8
+#   listas de cartas: quantidade (H) + códigos (H cada)
+#   monte, descarte, os mortos ainda fechados (quantidade (B) e as cartas de
+#   cada um) e mensagem; depois, para cada jogador: nome, comprou_carta
+#   (B), equipe (B) e mão; por fim, para cada equipe, os agrupamentos
+#   (quantidade (H) e, para cada um, as cartas na ordem de inclusão, o início
+#   da sequência (b) e as cartas pelas posições, se for sequência, já que a
+#   posição dos curingas depende da ordem das jogadas)
+# As versões 2 (um baralho, sem equipes: os agrupamentos vêm junto de cada
+# jogador, sem o byte da equipe) e 3 (sem mortos e sem o descarte inteiro)
+# ainda são lidas.
+MAGICO = b'BUR'
+VERSAO = 4
+ESTADOS = ["inicio", "jogando", "fim"]
+
+_CABECALHO = struct.Struct('<3sBBBBIQ')
+_BARALHOS = struct.Struct('<B')  # Depois do cabeçalho, desde a versão 3
+_REGRAS = struct.Struct('<BB')  # Depois dos baralhos, desde a versão 4: mortos e descarte inteiro
+_TAMANHO = struct.Struct('<H')
+_BYTE = struct.Struct('<B')
+_INICIO = struct.Struct('<b')
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+
+def _codigos_em_bytes(cartas) -> bytes:
+    codigos = codificar(cartas)
+    if _BIG_ENDIAN:
+        codigos.byteswap()
+    return codigos.tobytes()
+
+
+def _escrever_cartas(partes: List[bytes], cartas) -> None:
+    codigos = _codigos_em_bytes(cartas)
+    partes.append(_TAMANHO.pack(len(codigos) // 2))
+    partes.append(codigos)
+
+
+def _escrever_texto(partes: List[bytes], texto: str) -> None:
+    dados = texto.encode('utf-8')
+    partes.append(_TAMANHO.pack(len(dados)))
+    partes.append(dados)
+
+
+class _Leitor:
+    """Lê os campos do formato binário em sequência"""
+    def __init__(self, dados: bytes):
+        self.dados = memoryview(dados)
+        self.pos = 0
+
+    def ler(self, formato: struct.Struct) -> tuple:
+        valores = formato.unpack_from(self.dados, self.pos)
+        self.pos += formato.size
+        return valores
+
+    def tamanho(self) -> int:
+        return self.ler(_TAMANHO)[0]
+
+    def cartas(self, quantidade: Optional[int] = None) -> List[Carta]:
+        """Lê uma lista de cartas (com a quantidade antes, se ela não for dada)"""
+        if quantidade is None:
+            quantidade = self.tamanho()
+        codigos = array('H')
+        codigos.frombytes(self.dados[self.pos:self.pos + 2 * quantidade])
+        if _BIG_ENDIAN:
+            codigos.byteswap()
+        self.pos += 2 * quantidade
+        return decodificar(codigos)
+
+    def texto(self) -> str:
+        tamanho = self.tamanho()
+        texto = bytes(self.dados[self.pos:self.pos + tamanho]).decode('utf-8')
+        self.pos += tamanho
+        return texto
+
+
+def codificar_jogo(jogo) -> bytes:
+    """Codifica o estado completo de uma partida em bytes"""
+    partes: List[bytes] = [_CABECALHO.pack(MAGICO, VERSAO, ESTADOS.index(jogo.estado),
+                                           jogo.jogador_atual, len(jogo.jogadores), jogo.turno, jogo.semente),
+                                   _BARALHOS.pack(jogo.baralhos), _REGRAS.pack(jogo.mortos, jogo.descarte_inteiro)]
+    _escrever_cartas(partes, jogo.monte.cartas)
+    _escrever_cartas(partes, jogo.monte.descarte)
+    partes.append(_BYTE.pack(len(jogo.monte.mortos)))
+    for morto in jogo.monte.mortos:
+        _escrever_cartas(partes, morto)
+    _escrever_texto(partes, jogo.mensagem)
+
+    for jogador in jogo.jogadores:
+        _escrever_texto(partes, jogador.nome)
+        partes.append(_BYTE.pack(jogador.comprou_carta))
+        partes.append(_BYTE.pack(jogador.equipe.indice))
+        _escrever_cartas(partes, jogador.mao)
+    for equipe in jogo.equipes:
+        partes.append(_TAMANHO.pack(len(equipe.agrupamentos)))
+        for agrupamento in equipe.agrupamentos:
+            _escrever_cartas(partes, agrupamento._cartas)
+            sequencia = agrupamento.eh_sequencia()
+            partes.append(_INICIO.pack(agrupamento.inicio if sequencia else -1))
+            if sequencia:
+                partes.append(_codigos_em_bytes(agrupamento.cartas))
+    return b''.join(partes)
+
+
+def _ler_agrupamento(leitor: _Leitor) -> Agrupamento:
+    agrupamento = Agrupamento(leitor.cartas())
+    inicio = leitor.ler(_INICIO)[0]
+    if inicio >= 0:
+        # Restaura as posições exatamente como estavam (inclusive dos curingas)
+        quantidade = len(agrupamento)
+        agrupamento.slots = [None] * len(agrupamento.slots)
+        agrupamento.slots[inicio:inicio + quantidade] = leitor.cartas(quantidade)
+        agrupamento.inicio = inicio
+        agrupamento.fim = inicio + quantidade - 1
+    return agrupamento
+
+
+def _ler_agrupamentos(leitor: _Leitor, equipe: Equipe) -> None:
+    for _ in range(leitor.tamanho()):
+        agrupamento = _ler_agrupamento(leitor)
+        equipe.agrupamentos.append(agrupamento)
+        equipe.pontos_agrupamentos += agrupamento.get_pontos()
+
+
+def restaurar_jogo(jogo, dados: bytes) -> None:
+    """Preenche 'jogo' (de qualquer estado anterior) a partir de bytes de codificar_jogo"""
+    leitor = _Leitor(dados)
+    magico, versao, estado, jogador_atual, num_jogadores, turno, semente = leitor.ler(_CABECALHO)
+    if magico != MAGICO or versao not in (2, 3, VERSAO):
+        raise ValueError("Dados não são um estado de jogo compatível")
+    jogo.baralhos = leitor.ler(_BARALHOS)[0] if versao >= 3 else 1
+    jogo.mortos, descarte_inteiro = leitor.ler(_REGRAS) if versao >= 4 else (0, False)
+    jogo.descarte_inteiro = bool(descarte_inteiro)
+
+    jogo.estado = ESTADOS[estado]
+    jogo.jogador_atual = jogador_atual
+    jogo.turno = turno
+    jogo.semente = semente
+    jogo.registro = None
+    jogo.historico = []
+    jogo.gerador_acoes = GeradorAcoes()
+    jogo.monte = Monte()
+    jogo.monte.cartas = leitor.cartas()
+    jogo.monte.descarte = leitor.cartas()
+    if versao >= 4:
+        jogo.monte.mortos = [leitor.cartas() for _ in range(leitor.ler(_BYTE)[0])]
+    jogo.mensagem = leitor.texto()
+
+    jogo.jogadores = []
+    jogo.equipes = []
+    for indice in range(num_jogadores):
+        nome = leitor.texto()
+        comprou_carta = bool(leitor.ler(_BYTE)[0])
+        equipe = leitor.ler(_BYTE)[0] if versao >= 3 else indice
+        while len(jogo.equipes) <= equipe:
+            jogo.equipes.append(Equipe(len(jogo.equipes)))
+        jogador = Jogador(nome, jogo.equipes[equipe])
+        jogador.comprou_carta = comprou_carta
+        jogador.mao = Mao(leitor.cartas())
+        if versao < 3:
+            _ler_agrupamentos(leitor, jogador.equipe)
+        jogo.jogadores.append(jogador)
+    if versao >= 3:
+        for equipe in jogo.equipes:
+            _ler_agrupamentos(leitor, equipe)
+
+    if leitor.pos != len(leitor.dados):
+        raise ValueError("Bytes sobrando depois do estado do jogo")
@@ -0,0 +1,438 @@
+import argparse
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from acoes import Acao, NOMES, DESFAZER, PASSAR, SEM_AGRUPAMENTO, aplicar_acao
+from carta import FACES_POR_BARALHO
+from estrategias import ESTRATEGIAS, ESTRATEGIAS_EXTERNAS, Estrategia, carregar_estrategia
+from jogo import Jogo, LIMITE_SEMENTE
+from legais import compras, descartes
+from transmissao import Assinante, Transmissao
+
+# Protocolo: um objeto JSON por linha, nos dois sentidos. Do cliente:
+#   {"tipo": "entrar", "mesa": "m1", "nome": "Ana", "semente": 7, "oponente": "gulosa"}
+#   {"tipo": "acao", "acao": "descartar", "cartas": [12], "agrupamento": 0}
+#   {"tipo": "estado"} e {"tipo": "sair"}
+#   {"tipo": "assistir", "mesa": "m1", "assento": 0}: feed de deltas (ver transmissao.py), como
+#   espectador ou, com "assento", com a própria mão; {"tipo": "parar"} cancela o feed
+# Do servidor: "entrou", "estado" (visão da mesa para o assento do cliente), "erro" e o feed.
+# As cartas são sempre os códigos de Carta; "acao" usa os nomes de acoes.NOMES.
+TIPOS_ACAO = {nome: tipo for tipo, nome in NOMES.items()}
+ASSENTOS = 2
+
+# Limites por conexão e por servidor, para a memória não crescer sem controle
+TAMANHO_MAXIMO_LINHA = 4096
+MENSAGENS_PENDENTES = 64  # Mensagens na fila de envio de um cliente; acima disso ele é desconectado
+MAXIMO_MESAS = 10000
+ESPERA_FECHAMENTO = 5.0  # Segundos para enviar as últimas mensagens de quem sai
+FILA_CONEXOES = 1024  # Conexões aguardando accept; milhares de espectadores chegam de uma vez
+# Um turno do MCTS leva cerca de 0,4 s de CPU (duas buscas de 0,2 s), e os turnos dos oponentes dividem o
+# GIL: com N mesas de MCTS jogando ao mesmo tempo, cada turno demora perto de N x 0,4 s
+MAXIMO_MESAS_MCTS = 4
+
+
+def _codigos(cartas) -> List[int]:
+    return [c.codigo for c in cartas]
+
+
+def estado_da_mesa(jogo: Jogo, assento: Optional[int]) -> dict:
+    """Visão da partida para um assento: a própria mão e só o tamanho da dos outros"""
+    visao = {
+        "tipo": "estado",
+        "estado": jogo.estado,
+        "turno": jogo.turno,
+        "jogador_atual": jogo.jogador_atual,
+        "mensagem": jogo.mensagem,
+        "monte": len(jogo.monte.cartas),
+        "mortos": len(jogo.monte.mortos),  # Mortos ainda fechados (viram o monte quando ele acaba)
+        "descarte": _codigos(jogo.monte.descarte),
+        "jogadores": [{
+            "nome": jogador.nome,
+            "cartas_na_mao": len(jogador.mao),
+            "agrupamentos": [_codigos(g.cartas) for g in jogador.agrupamentos],
+            "pontos_agrupamentos": jogador.pontos_agrupamentos,
+        } for jogador in jogo.jogadores],
+    }
+    if assento is not None:
+        jogador = jogo.jogadores[assento]
+        visao["assento"] = assento
+        visao["mao"] = _codigos(jogador.mao)
+        visao["comprou_carta"] = jogador.comprou_carta
+    if jogo.estado == "fim":
+        visao["pontos"] = [j.get_pontos() for j in jogo.jogadores]
+        vencedor = jogo.vencedor()
+        visao["vencedor"] = jogo.jogadores.index(vencedor) if vencedor else None
+    return visao
+
+
+def codificar_mensagem(mensagem: dict) -> bytes:
+    return json.dumps(mensagem, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class Conexao:
+    """Um cliente conectado: fila de envio limitada e o assento que ocupa"""
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.fila: asyncio.Queue = asyncio.Queue(MENSAGENS_PENDENTES)
+        self.mesa: Optional['Mesa'] = None
+        self.assento: Optional[int] = None
+        self.assinante: Optional[Assinante] = None
+        self.assistindo: Optional['Mesa'] = None
+        self.fechada = False
+
+    def enviar(self, mensagem: bytes) -> None:
+        """Põe uma mensagem na fila; um cliente que não acompanha é desconectado"""
+        if self.fechada:
+            return
+        try:
+            self.fila.put_nowait(mensagem)
+        except asyncio.QueueFull:
+            self.fechar()
+
+    def fechar(self) -> None:
+        if not self.fechada:
+            self.fechada = True
+            self.writer.close()
+
+    def terminar(self) -> None:
+        """Fecha a conexão depois de enviar o que já está na fila"""
+        try:
+            self.fila.put_nowait(None)
+        except asyncio.QueueFull:
+            self.fechar()
+
+    async def escrever(self) -> None:
+        """Tarefa que esvazia a fila de envio respeitando o ritmo do cliente"""
+        try:
+            while not self.fechada:
+                mensagem = await self.fila.get()
+                if mensagem is None:
+                    break
+                self.writer.write(mensagem)
+                await self.writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.fechar()
+
+
+class Mesa:
+    """Uma partida hospedada no servidor, com a sua trava e os clientes sentados
+
+    Todas as mudanças no jogo acontecem com a trava adquirida, inclusive o
+    turno de um oponente automático (que roda fora do laço de eventos), de
+    modo que as ações de uma mesa são aplicadas uma de cada vez e na ordem.
+    """
+    def __init__(self, nome: str, semente: Optional[int] = None, oponente: Optional[Estrategia] = None):
+        self.nome = nome
+        self.jogo = Jogo(semente)
+        self.transmissao = Transmissao(nome, self.jogo)
+        self.trava = asyncio.Lock()
+        self.assentos: List[Optional[Conexao]] = [None] * ASSENTOS
+        self.oponente = oponente  # Estratégia que joga no último assento
+        self.assento_oponente = ASSENTOS - 1 if oponente else None
+
+    def livre(self) -> Optional[int]:
+        """Primeiro assento livre para um cliente (None se a mesa está cheia)"""
+        for assento, conexao in enumerate(self.assentos):
+            if conexao is None and assento != self.assento_oponente:
+                return assento
+        return None
+
+    def vazia(self) -> bool:
+        return all(conexao is None for conexao in self.assentos)
+
+    def completa(self) -> bool:
+        return all(conexao is not None or assento == self.assento_oponente
+                   for assento, conexao in enumerate(self.assentos))
+
+    def transmitir(self) -> None:
+        """Envia a cada cliente sentado a visão atual da mesa e as mudanças ao feed"""
+        for assento, conexao in enumerate(self.assentos):
+            if conexao is not None:
+                conexao.enviar(codificar_mensagem(estado_da_mesa(self.jogo, assento)))
+        self.transmissao.publicar()
+
+    def validar(self, acao: Acao) -> Optional[str]:
+        """Restrições do servidor além das regras do Jogo; retorna o erro, se houver"""
+        jogo = self.jogo
+        if jogo.estado != "jogando":
+            return "A partida não está em andamento"
+        if acao.jogador != jogo.jogador_atual:
+            return "Não é a sua vez"
+        if acao.tipo == PASSAR and (compras(jogo) or descartes(jogo)):
+            return "Só é possível passar a vez sem compra nem descarte possível"
+        if acao.tipo == DESFAZER and not jogo.pode_desfazer():
+            return "Nada para desfazer neste turno"
+        return None
+
+    def aplicar(self, acao: Acao) -> Optional[str]:
+        """Aplica uma ação de um cliente (com a trava adquirida); retorna o erro, se houver"""
+        erro = self.validar(acao)
+        if erro:
+            return erro
+        jogo = self.jogo
+        jogador = jogo.jogador_atual
+        if not aplicar_acao(jogo, acao):
+            return jogo.mensagem or "Ação inválida"
+        self._depois_da_acao(jogador)
+        return None
+
+    def _depois_da_acao(self, jogador: int) -> None:
+        jogo = self.jogo
+        if jogo.verificar_fim_jogo():
+            jogo.estado = "fim"
+        if jogo.jogador_atual != jogador:
+            # Só as ações do turno atual podem ser desfeitas: o histórico não cresce com a partida
+            jogo.historico.clear()
+
+    def jogar_oponente(self) -> None:
+        """Joga o turno do oponente automático (com a trava adquirida, fora do laço de eventos)"""
+        jogo = self.jogo
+        self.oponente.jogar_turno(jogo)
+        if jogo.jogador_atual == self.assento_oponente and not jogo.verificar_fim_jogo():
+            jogo.passar_vez()
+        self._depois_da_acao(self.assento_oponente)
+
+    def vez_do_oponente(self) -> bool:
+        return self.oponente is not None and self.jogo.estado == "jogando" and \
+            self.jogo.jogador_atual == self.assento_oponente
+
+
+class Servidor:
+    """Servidor asyncio de várias mesas, com o protocolo de linhas JSON descrito acima"""
+    def __init__(self, maximo_mesas: int = MAXIMO_MESAS, threads_oponentes: Optional[int] = None,
+                 maximo_mesas_mcts: int = MAXIMO_MESAS_MCTS):
+        self.mesas: Dict[str, Mesa] = {}
+        self.maximo_mesas = maximo_mesas
+        self.maximo_mesas_mcts = maximo_mesas_mcts
+        self.conexoes: Dict[Conexao, asyncio.Task] = {}  # Conexões abertas e as tarefas que as atendem
+        self.acoes = 0  # Ações aceitas desde o início
+        self._servidor: Optional[asyncio.AbstractServer] = None
+        # Turnos dos oponentes automáticos rodam aqui para não travar o laço de eventos; com várias
+        # threads, um turno rápido (gulosa) não espera na fila atrás dos turnos de MCTS de outras mesas
+        # (None: o padrão do ThreadPoolExecutor, min(32, núcleos + 4))
+        self._executor = ThreadPoolExecutor(threads_oponentes)
+
+    async def iniciar(self, host: str = "127.0.0.1", porta: int = 8765) -> int:
+        """Começa a aceitar conexões; retorna a porta (útil com porta 0)"""
+        self._servidor = await asyncio.start_server(self._atender, host, porta, limit=TAMANHO_MAXIMO_LINHA,
+                                                  backlog=FILA_CONEXOES)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def encerrar(self) -> None:
+        """Para de aceitar conexões e desconecta os clientes"""
+        if self._servidor is not None:
+            self._servidor.close()
+        tarefas = list(self.conexoes.values())
+        for conexao in list(self.conexoes):
+            conexao.fechar()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        if self._servidor is not None:
+            await self._servidor.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    def mesas_mcts(self) -> int:
+        return sum(1 for mesa in self.mesas.values() if mesa.oponente is not None and mesa.oponente.nome == "mcts")
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conexao = Conexao(writer)
+        escritor = asyncio.create_task(conexao.escrever())
+        self.conexoes[conexao] = asyncio.current_task()
+        try:
+            while not conexao.fechada:
+                try:
+                    linha = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    conexao.enviar(codificar_mensagem({"tipo": "erro", "mensagem": "Linha longa demais"}))
+                    break
+                if not linha:
+                    break
+                try:
+                    mensagem = json.loads(linha)
+                except json.JSONDecodeError:
+                    mensagem = None
+                if not isinstance(mensagem, dict):
+                    conexao.enviar(codificar_mensagem({"tipo": "erro", "mensagem": "JSON inválido"}))
+                    continue
+                await self._processar(conexao, mensagem)
+        except ConnectionError:
+            pass
+        finally:
+            del self.conexoes[conexao]
+            self._parar_de_assistir(conexao)
+            await self._sair(conexao)
+            conexao.terminar()
+            try:
+                await asyncio.wait_for(escritor, ESPERA_FECHAMENTO)
+            except asyncio.TimeoutError:
+                conexao.fechar()
+
+    async def _processar(self, conexao: Conexao, mensagem: dict) -> None:
+        tipo = mensagem.get("tipo")
+        if tipo == "entrar":
+            erro = await self._entrar(conexao, mensagem)
+        elif tipo == "acao":
+            erro = await self._acao(conexao, mensagem)
+        elif tipo == "estado":
+            erro = await self._estado(conexao)
+        elif tipo == "sair":
+            await self._sair(conexao)
+            erro = None
+        elif tipo == "assistir":
+            erro = await self._assistir(conexao, mensagem)
+        elif tipo == "parar":
+            self._parar_de_assistir(conexao)
+            erro = None
+        else:
+            erro = f"Tipo de mensagem desconhecido: {tipo}"
+        if erro:
+            conexao.enviar(codificar_mensagem({"tipo": "erro", "mensagem": erro}))
+
+    async def _entrar(self, conexao: Conexao, mensagem: dict) -> Optional[str]:
+        if conexao.mesa is not None:
+            return "Já está numa mesa"
+        nome = str(mensagem.get("mesa", ""))[:64]
+        if not nome:
+            return "Mesa sem nome"
+        # Se a mesa for removida (todos saíram) enquanto se espera a trava, procura ou cria outra
+        while True:
+            mesa = self.mesas.get(nome)
+            if mesa is None:
+                if len(self.mesas) >= self.maximo_mesas:
+                    return "Servidor cheio"
+                oponente = None
+                if mensagem.get("oponente"):
+                    nome_oponente = str(mensagem["oponente"])[:64]
+                    # Só estratégias registradas: 'modulo:Classe' importaria qualquer código a pedido do cliente
+                    if nome_oponente not in ESTRATEGIAS and nome_oponente not in ESTRATEGIAS_EXTERNAS:
+                        return f"Oponente desconhecido: {nome_oponente}"
+                    if nome_oponente == "mcts" and self.mesas_mcts() >= self.maximo_mesas_mcts:
+                        return "Limite de mesas contra o MCTS atingido"
+                    try:
+                        oponente = carregar_estrategia(nome_oponente)()
+                    except (ValueError, ImportError, AttributeError, TypeError):
+                        return f"Oponente desconhecido: {nome_oponente}"
+                semente = mensagem.get("semente")
+                if not isinstance(semente, int) or not 0 <= semente < LIMITE_SEMENTE:
+                    semente = None
+                mesa = self.mesas[nome] = Mesa(nome, semente, oponente)
+
+            async with mesa.trava:
+                if self.mesas.get(nome) is not mesa:
+                    continue
+                assento = mesa.livre()
+                if assento is None:
+                    return "Mesa cheia"
+                mesa.assentos[assento] = conexao
+                conexao.mesa, conexao.assento = mesa, assento
+                mesa.jogo.jogadores[assento].nome = str(mensagem.get("nome") or f"Jogador {assento + 1}")[:32]
+                conexao.enviar(codificar_mensagem({"tipo": "entrou", "mesa": nome, "assento": assento}))
+                if mesa.completa() and mesa.jogo.estado == "inicio":
+                    mesa.jogo.iniciar()
+                mesa.transmitir()
+                return None
+
+    async def _acao(self, conexao: Conexao, mensagem: dict) -> Optional[str]:
+        mesa = conexao.mesa
+        if mesa is None:
+            return "Entre numa mesa primeiro"
+        tipo = TIPOS_ACAO.get(mensagem.get("acao"))
+        cartas = mensagem.get("cartas", [])
+        agrupamento = mensagem.get("agrupamento", SEM_AGRUPAMENTO)
+        if tipo is None or not isinstance(cartas, list) or len(cartas) > FACES_POR_BARALHO or \
+                not all(isinstance(c, int) and 0 <= c < FACES_POR_BARALHO for c in cartas) or \
+                not isinstance(agrupamento, int) or not 0 <= agrupamento <= SEM_AGRUPAMENTO:
+            return "Ação malformada"
+
+        async with mesa.trava:
+            erro = mesa.aplicar(Acao(tipo, conexao.assento, tuple(cartas), agrupamento))
+            if erro:
+                return erro
+            self.acoes += 1
+            mesa.transmitir()
+            while mesa.vez_do_oponente():
+                await asyncio.get_running_loop().run_in_executor(self._executor, mesa.jogar_oponente)
+                mesa.transmitir()
+        return None
+
+    async def _estado(self, conexao: Conexao) -> Optional[str]:
+        mesa = conexao.mesa
+        if mesa is None:
+            return "Entre numa mesa primeiro"
+        # Com a trava: o turno do oponente automático muda o jogo em outra thread
+        async with mesa.trava:
+            if conexao.mesa is mesa:
+                conexao.enviar(codificar_mensagem(estado_da_mesa(mesa.jogo, conexao.assento)))
+        return None
+
+    async def _assistir(self, conexao: Conexao, mensagem: dict) -> Optional[str]:
+        mesa = self.mesas.get(str(mensagem.get("mesa", "")))
+        if mesa is None:
+            return "Mesa inexistente"
+        # O quadro inicial lê o jogo inteiro, então só entre as ações (e os turnos do oponente)
+        async with mesa.trava:
+            if self.mesas.get(mesa.nome) is not mesa:
+                return "Mesa inexistente"
+            assento = mensagem.get("assento")
+            if assento is not None and (conexao.mesa is not mesa or conexao.assento != assento):
+                return "Só é possível assistir com a mão do próprio assento"
+            self._parar_de_assistir(conexao)
+            conexao.assinante = Assinante(conexao.writer)
+            conexao.assistindo = mesa
+            mesa.transmissao.assinar(conexao.assinante, assento)
+        return None
+
+    def _parar_de_assistir(self, conexao: Conexao) -> None:
+        if conexao.assinante is not None:
+            conexao.assistindo.transmissao.cancelar(conexao.assinante)
+            conexao.assinante = conexao.assistindo = None
+
+    async def _sair(self, conexao: Conexao) -> None:
+        mesa = conexao.mesa
+        if mesa is None:
+            return
+        async with mesa.trava:
+            mesa.assentos[conexao.assento] = None
+            nome = mesa.jogo.jogadores[conexao.assento].nome
+            # O feed com a mão do assento não pode seguir com quem já saiu dele
+            if conexao.assistindo is mesa and conexao.assinante.audiencia is not None and \
+                    conexao.assinante.audiencia.assento == conexao.assento:
+                self._parar_de_assistir(conexao)
+            conexao.mesa = conexao.assento = None
+            if mesa.vazia():
+                self.mesas.pop(mesa.nome, None)
+                mesa.transmissao.encerrar()
+            else:
+                mesa.jogo.mensagem = f"{nome} saiu da mesa"
+                mesa.transmitir()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Roda o servidor de mesas pela linha de comando"""
+    parser = argparse.ArgumentParser(description="Servidor de mesas de Buraco (linhas JSON sobre TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--maximo-mesas", type=int, default=MAXIMO_MESAS)
+    parser.add_argument("--threads-oponentes", type=int, default=None,
+                        help="threads para os turnos dos oponentes automáticos (padrão: núcleos + 4, até 32)")
+    parser.add_argument("--maximo-mesas-mcts", type=int, default=MAXIMO_MESAS_MCTS,
+                        help="mesas contra o MCTS ao mesmo tempo (cada turno dele leva ~0,4 s de CPU)")
+    args = parser.parse_args(argv)
+
+    async def rodar():
+        servidor = Servidor(args.maximo_mesas, args.threads_oponentes, args.maximo_mesas_mcts)
+        porta = await servidor.iniciar(args.host, args.porta)
+        print(f"Servidor em {args.host}:{porta}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(rodar())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
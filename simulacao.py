@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from acoes import RegistroAcoes
+from jogo import Jogo, MORTOS
+from estrategias import carregar_estrategia
+
+class ResultadoPartida(NamedTuple):
+    """Resultado de uma partida simulada"""
+    semente: int
+    estrategias: Tuple[str, ...]  # Estratégia de cada assento, na ordem de jogo
+    pontos: Tuple[int, ...]
+    vencedor: Optional[int]  # Assento do vencedor (None em caso de empate)
+    turnos: int
+    canastras: Tuple[int, ...]  # Canastras da equipe de cada assento
+    equipes: Tuple[int, ...] = ()  # Equipe de cada assento (vazio: cada um sozinho)
+
+
+class Estatisticas:
+    """Totais agregados por estratégia, que podem ser somados entre processos"""
+    def __init__(self):
+        self.partidas: int = 0
+        self.turnos: int = 0
+        self.por_estrategia: Dict[str, Dict[str, int]] = {}
+
+    def _totais(self, nome: str) -> Dict[str, int]:
+        if nome not in self.por_estrategia:
+            self.por_estrategia[nome] = {"partidas": 0, "vitorias": 0, "empates": 0, "pontos": 0, "canastras": 0}
+        return self.por_estrategia[nome]
+
+    def registrar(self, resultado: ResultadoPartida) -> None:
+        """Soma o resultado de uma partida"""
+        self.partidas += 1
+        self.turnos += resultado.turnos
+        equipes = resultado.equipes or tuple(range(len(resultado.estrategias)))
+        for assento, nome in enumerate(resultado.estrategias):
+            totais = self._totais(nome)
+            totais["partidas"] += 1
+            totais["pontos"] += resultado.pontos[assento]
+            totais["canastras"] += resultado.canastras[assento]
+            if resultado.vencedor is None:
+                totais["empates"] += 1
+            elif equipes[resultado.vencedor] == equipes[assento]:
+                totais["vitorias"] += 1
+
+    def combinar(self, outra: 'Estatisticas') -> None:
+        """Soma as estatísticas de outro lote"""
+        self.partidas += outra.partidas
+        self.turnos += outra.turnos
+        for nome, totais_outra in outra.por_estrategia.items():
+            totais = self._totais(nome)
+            for campo, valor in totais_outra.items():
+                totais[campo] += valor
+
+    def resumo(self) -> dict:
+        """Médias por estratégia (taxa de vitória, pontos e canastras por partida)"""
+        estrategias = {}
+        for nome, totais in self.por_estrategia.items():
+            n = max(totais["partidas"], 1)
+            estrategias[nome] = {
+                "partidas": totais["partidas"],
+                "taxa_vitoria": totais["vitorias"] / n,
+                "taxa_empate": totais["empates"] / n,
+                "pontos_medios": totais["pontos"] / n,
+                "canastras_por_partida": totais["canastras"] / n,
+            }
+        return {
+            "partidas": self.partidas,
+            "turnos_medios": self.turnos / max(self.partidas, 1),
+            "estrategias": estrategias,
+        }
+
+
+LIMITE_SEMENTE_GERAL = 2 ** 32  # Com o índice da partida nos 32 bits de baixo, a semente da partida cabe em 64
+
+
+def semente_da_partida(semente: int, indice: int) -> int:
+    """Semente independente da partida 'indice' de uma simulação"""
+    return semente * 2 ** 32 + indice
+
+
+def validar_semente(semente: int) -> None:
+    """ValueError se a semente geral não pode gerar sementes de partida de 64 bits sem sinal"""
+    if not 0 <= semente < LIMITE_SEMENTE_GERAL:
+        raise ValueError(f"A semente geral deve estar entre 0 e 2**32 - 1, não {semente}")
+
+
+def jogar_partida(nomes: Sequence[str], semente: int, max_turnos: int = 1000,
+                  registro: Optional[RegistroAcoes] = None, baralhos: int = 1,
+                  equipes: Optional[Sequence[int]] = None, mortos: int = MORTOS,
+                  descarte_inteiro: bool = True) -> ResultadoPartida:
+    """Joga uma partida completa entre estratégias, sem interface (gravando as ações em 'registro', se houver)
+
+    Os pontos e as canastras de cada assento são os da sua equipe.
+    """
+    estrategias = [carregar_estrategia(nome)(random.Random(semente * len(nomes) + i)) for i, nome in enumerate(nomes)]
+
+    jogo = Jogo(semente, registro, [f"Jogador {i + 1}" for i in range(len(nomes))], baralhos, equipes, mortos,
+                descarte_inteiro)
+    jogo.iniciar()
+    turnos = 0
+    while turnos < max_turnos and not jogo.verificar_fim_jogo():
+        atual = jogo.jogador_atual
+        estrategias[atual].jogar_turno(jogo)
+        turnos += 1
+        # Se a estratégia não conseguiu descartar, passa a vez para não travar a partida
+        if jogo.jogador_atual == atual and not jogo.verificar_fim_jogo():
+            jogo.passar_vez()
+    jogo.estado = "fim"
+
+    vencedor = jogo.vencedor()
+    return ResultadoPartida(
+        semente=semente,
+        estrategias=tuple(nomes),
+        pontos=tuple(j.equipe.get_pontos() for j in jogo.jogadores),
+        vencedor=jogo.jogadores.index(vencedor) if vencedor else None,
+        turnos=turnos,
+        canastras=tuple(sum(1 for g in j.agrupamentos if g.eh_canastra()) for j in jogo.jogadores),
+        equipes=tuple(j.equipe.indice for j in jogo.jogadores),
+    )
+
+
+def assentos_da_partida(nomes: Sequence[str], indice: int, alternar: bool) -> List[str]:
+    """Ordem das estratégias na partida 'indice' (gira a cada partida se alternar)"""
+    if not alternar:
+        return list(nomes)
+    deslocamento = indice % len(nomes)
+    return list(nomes[deslocamento:]) + list(nomes[:deslocamento])
+
+
+def _jogar_lote(args: tuple) -> Estatisticas:
+    """Joga um lote de partidas dentro de um processo"""
+    nomes, semente, inicio, fim, max_turnos, alternar, caminho_registro, regras = args
+    estatisticas = Estatisticas()
+    registro = RegistroAcoes.abrir(caminho_registro) if caminho_registro else None
+    try:
+        for indice in range(inicio, fim):
+            estatisticas.registrar(jogar_partida(assentos_da_partida(nomes, indice, alternar),
+                                                 semente_da_partida(semente, indice), max_turnos, registro, *regras))
+    finally:
+        if registro:
+            registro.fechar()
+    return estatisticas
+
+
+def simular(nomes: Sequence[str], partidas: int, processos: Optional[int] = None, semente: int = 0,
+            max_turnos: int = 1000, alternar: bool = True, tamanho_lote: Optional[int] = None,
+            caminho_registro: Optional[str] = None, baralhos: int = 1,
+            equipes: Optional[Sequence[int]] = None, mortos: int = MORTOS,
+            descarte_inteiro: bool = True) -> Estatisticas:
+    """Joga 'partidas' partidas em paralelo e retorna as estatísticas agregadas
+
+    As estratégias ocupam os assentos na ordem dada (girando a cada partida,
+    se 'alternar'); 'baralhos', 'equipes', 'mortos' e 'descarte_inteiro'
+    são as regras da partida, como em Jogo.
+
+    Cada partida tem a sua própria semente, derivada da semente geral e do
+    índice da partida, então o resultado não depende do número de processos.
+    Com 'caminho_registro', as ações de todas as partidas são gravadas nesse
+    log (nesse caso as partidas são jogadas num único processo, em ordem).
+    """
+    validar_semente(semente)
+    processos = 1 if caminho_registro else processos or os.cpu_count() or 1
+    tamanho_lote = tamanho_lote or max(1, min(1000, partidas // (processos * 8)))
+    regras = (baralhos, equipes, mortos, descarte_inteiro)
+    lotes = [(tuple(nomes), semente, inicio, min(inicio + tamanho_lote, partidas), max_turnos, alternar, caminho_registro,
+              regras) for inicio in range(0, partidas, tamanho_lote)]
+
+    total = Estatisticas()
+    if processos == 1:
+        for lote in lotes:
+            total.combinar(_jogar_lote(lote))
+        return total
+
+    with Pool(processos) as pool:
+        for estatisticas in pool.imap_unordered(_jogar_lote, lotes):
+            total.combinar(estatisticas)
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Roda a simulação pela linha de comando"""
+    parser = argparse.ArgumentParser(description="Simula partidas de Buraco entre estratégias automáticas")
+    parser.add_argument("-n", "--partidas", type=int, default=1000, help="número de partidas")
+    parser.add_argument("-j", "--processos", type=int, default=None, help="processos (padrão: todos os núcleos)")
+    parser.add_argument("-s", "--semente", type=int, default=0, help="semente geral da simulação")
+    parser.add_argument("-e", "--estrategias", nargs="+", default=["gulosa", "aleatoria"],
+                        help="estratégias de 2 a 4 jogadores (nome registrado ou modulo:Classe)")
+    parser.add_argument("-b", "--baralhos", type=int, default=1, help="baralhos de 54 cartas")
+    parser.add_argument("--parcerias", action="store_true",
+                        help="com 4 jogadores, joga em duplas (assentos 1 e 3 contra 2 e 4)")
+    parser.add_argument("-m", "--mortos", type=int, default=MORTOS, help="mortos separados na distribuição")
+    parser.add_argument("--descarte-topo", action="store_true",
+                        help="comprar do descarte leva só a carta do topo (em vez da pilha inteira)")
+    parser.add_argument("--max-turnos", type=int, default=1000, help="limite de turnos por partida")
+    parser.add_argument("--sem-alternar", action="store_true", help="não alterna quem começa a cada partida")
+    parser.add_argument("--registro", help="grava as ações das partidas neste log (ver reproducao.py)")
+    parser.add_argument("--json", action="store_true", help="imprime o resumo em JSON")
+    args = parser.parse_args(argv)
+    if not 2 <= len(args.estrategias) <= 4:
+        parser.error("informe de 2 a 4 estratégias")
+    if args.parcerias and len(args.estrategias) != 4:
+        parser.error("--parcerias exige 4 estratégias")
+    equipes = (0, 1, 0, 1) if args.parcerias else None
+    try:
+        validar_semente(args.semente)
+        Jogo(0, nomes=args.estrategias, baralhos=args.baralhos, equipes=equipes, mortos=args.mortos)
+    except ValueError as erro:
+        parser.error(str(erro))
+
+    inicio = time.perf_counter()
+    estatisticas = simular(args.estrategias, args.partidas, args.processos, args.semente,
+                           args.max_turnos, not args.sem_alternar, caminho_registro=args.registro,
+                           baralhos=args.baralhos, equipes=equipes, mortos=args.mortos,
+                           descarte_inteiro=not args.descarte_topo)
+    duracao = time.perf_counter() - inicio
+
+    resumo = estatisticas.resumo()
+    resumo["segundos"] = duracao
+    resumo["partidas_por_minuto"] = args.partidas / duracao * 60 if duracao else 0
+    if args.json:
+        print(json.dumps(resumo, indent=2, ensure_ascii=False))
+        return
+
+    print(f"{resumo['partidas']} partidas em {duracao:.1f}s ({resumo['partidas_por_minuto']:.0f} por minuto)")
+    print(f"Turnos por partida: {resumo['turnos_medios']:.1f}")
+    for nome, dados in resumo["estrategias"].items():
+        print(f"  {nome}: vitórias {dados['taxa_vitoria']:.1%}, empates {dados['taxa_empate']:.1%}, "
+              f"pontos médios {dados['pontos_medios']:.1f}, canastras/partida {dados['canastras_por_partida']:.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
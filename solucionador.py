@@ -0,0 +1,221 @@
+from itertools import combinations
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from carta import Carta, NUM_VALORES
+from agrupamento import Agrupamento
+
+# Valor usado para combinações que não respeitam as restrições
+_INVALIDO = -10 ** 9
+
+
+class Jogada(NamedTuple):
+    """Melhor conjunto de agrupamentos novos e extensões para uma mão"""
+    ganho: int  # Quanto a pontuação do jogador aumenta ao aplicar a jogada
+    novos: List[List[Carta]]  # Cartas de cada agrupamento novo
+    extensoes: List[Tuple[int, List[Carta]]]  # (índice do agrupamento, cartas na ordem de inclusão)
+
+
+def _bonus(tamanho: int, sujo: bool) -> int:
+    """Bônus de canastra de um agrupamento válido"""
+    if tamanho < 7:
+        return 0
+    return 100 if sujo else 200
+
+
+def _pontos_novo(naturais: Sequence[Carta], curingas: Sequence[Carta]) -> int:
+    """Pontos de um agrupamento novo (válido por construção)"""
+    pontos = sum(c.pontos for c in naturais) + sum(c.pontos for c in curingas)
+    return pontos + _bonus(len(naturais) + len(curingas), bool(curingas))
+
+
+class _Busca:
+    """Busca em profundidade com memória sobre as cartas normais da mão
+
+    As cartas normais são decididas em ordem crescente de valor: a menor carta
+    restante fica na mão, entra num agrupamento existente, começa uma trinca
+    ou começa uma sequência da qual ela é a menor carta normal. Curingas e
+    '2's são tratados como contagens: cada agrupamento novo escolhe quantos
+    usa ao ser formado e, no final, os que sobraram podem entrar nos
+    agrupamentos existentes. Agrupamentos novos não voltam a ser estendidos,
+    por isso não fazem parte da chave da memória.
+    """
+    def __init__(self, mao: Sequence[Carta], agrupamentos: Sequence[Agrupamento], minimo_na_mao: int):
+        self.naturais = tuple(sorted((c for c in mao if not c.especial),
+                                     key=lambda c: (c.valor_idx, c.naipe_idx, c.codigo)))
+        # Curingas verdadeiros primeiro: eles não podem entrar em trincas existentes
+        self.curingas = tuple([c for c in mao if c.curinga] + [c for c in mao if c.especial and not c.curinga])
+        self.agrupamentos = tuple(agrupamentos)
+        self.minimo = minimo_na_mao
+        self.memoria: Dict[tuple, Tuple[int, tuple]] = {}
+
+    def resolver(self) -> Tuple[int, tuple]:
+        return self._melhor(self.naturais, 0, self.agrupamentos, 0)
+
+    def _melhor(self, restantes: tuple, usados: int, existentes: tuple, mantidas: int) -> Tuple[int, tuple]:
+        """Retorna (valor, passos) da melhor jogada para o estado dado
+
+        O valor soma os pontos dos agrupamentos novos e a variação dos
+        existentes, descontando as cartas que ficam na mão.
+        """
+        chave = (restantes, usados, tuple(g.codigos for g in existentes), mantidas)
+        if chave in self.memoria:
+            return self.memoria[chave]
+
+        if restantes:
+            resultado = self._decidir_natural(restantes, usados, existentes, mantidas)
+        elif usados < len(self.curingas):
+            resultado = self._decidir_curinga(usados, existentes, mantidas)
+        else:
+            resultado = (0, ()) if mantidas >= self.minimo else (_INVALIDO, ())
+
+        self.memoria[chave] = resultado
+        return resultado
+
+    def _estender(self, existentes: tuple, indice: int, cartas: Sequence[Carta]) -> Optional[Tuple[int, tuple]]:
+        """Aplica cartas a uma cópia do agrupamento; retorna (variação dos pontos do agrupamento, novos existentes)"""
+        original = existentes[indice]
+        copia = original.copiar()
+        for carta in cartas:
+            if not copia.adicionar_carta(carta):
+                return None
+        return copia.get_pontos() - original.get_pontos(), existentes[:indice] + (copia,) + existentes[indice + 1:]
+
+    def _decidir_curinga(self, usados: int, existentes: tuple, mantidas: int) -> Tuple[int, tuple]:
+        curinga = self.curingas[usados]
+
+        # Mantém na mão
+        valor, passos = self._melhor((), usados + 1, existentes, min(mantidas + 1, self.minimo))
+        melhor = (valor - curinga.pontos, passos)
+
+        # Entra em algum agrupamento existente
+        for i in range(len(existentes)):
+            estendido = self._estender(existentes, i, (curinga,))
+            if estendido is None:
+                continue
+            valor, passos = self._melhor((), usados + 1, estendido[1], mantidas)
+            if valor + estendido[0] > melhor[0]:
+                melhor = (valor + estendido[0], (('ext', i, (curinga,)),) + passos)
+        return melhor
+
+    def _decidir_natural(self, restantes: tuple, usados: int, existentes: tuple, mantidas: int) -> Tuple[int, tuple]:
+        carta = restantes[0]
+        resto = restantes[1:]
+        livres = len(self.curingas) - usados
+
+        # Mantém na mão
+        valor, passos = self._melhor(resto, usados, existentes, min(mantidas + 1, self.minimo))
+        melhor = (valor - carta.pontos, passos)
+
+        def considerar(valor_passo: int, passo: tuple, novo_resto: tuple, novos_usados: int, novos_existentes: tuple) -> None:
+            nonlocal melhor
+            valor, passos = self._melhor(novo_resto, novos_usados, novos_existentes, mantidas)
+            if valor + valor_passo > melhor[0]:
+                melhor = (valor + valor_passo, (passo,) + passos)
+
+        def formar(naturais: Sequence[Carta], necessarios: int, maximo: int, novo_resto: tuple) -> None:
+            # Tenta todas as quantidades de curingas, do mínimo necessário ao máximo que cabe
+            for num_curingas in range(necessarios, min(livres, maximo) + 1):
+                curingas = self.curingas[usados:usados + num_curingas]
+                considerar(_pontos_novo(naturais, curingas), ('novo', tuple(naturais) + curingas),
+                           novo_resto, usados + num_curingas, existentes)
+
+        # Entra num agrupamento existente (direto ou descendo uma sequência)
+        for i, agrupamento in enumerate(existentes):
+            cadeia = [carta]
+            if agrupamento.eh_sequencia() and carta.valor_idx < agrupamento.inicio - 1:
+                cadeia = self._cadeia(resto, carta, agrupamento.inicio - 1)
+                if cadeia is None:
+                    continue
+            elif not carta.pode_adicionar_trinca(agrupamento) and not carta.pode_adicionar_sequencia(agrupamento):
+                continue
+            estendido = self._estender(existentes, i, cadeia)
+            if estendido is None:
+                continue
+            novo_resto = tuple(c for c in resto if c not in cadeia)
+            considerar(estendido[0], ('ext', i, tuple(cadeia)), novo_resto, usados, estendido[1])
+
+        # Começa uma trinca com outras cartas do mesmo valor (a trinca não tem limite de tamanho)
+        mesmo_valor = []
+        for c in resto:
+            if c.valor_idx != carta.valor_idx:
+                break
+            mesmo_valor.append(c)
+        vistos = set()
+        for tamanho in range(len(mesmo_valor) + 1):
+            for outras in combinations(mesmo_valor, tamanho):
+                faces = tuple(c.face for c in outras)
+                if faces in vistos:
+                    continue
+                vistos.add(faces)
+                necessarios = max(0, 3 - len(outras) - 1)
+                if necessarios <= livres:
+                    novo_resto = tuple(c for c in resto if c not in outras)
+                    formar((carta,) + outras, necessarios, livres, novo_resto)
+
+        # Começa uma sequência em que esta é a menor carta normal (com ao menos
+        # duas cartas normais; com uma só ela já foi considerada como trinca)
+        por_valor: Dict[int, Carta] = {}
+        for c in resto:
+            if c.naipe_idx == carta.naipe_idx and c.valor_idx > carta.valor_idx and c.valor_idx not in por_valor:
+                por_valor[c.valor_idx] = c
+        naturais = [carta]
+        buracos = 0
+        for topo in range(carta.valor_idx + 1, NUM_VALORES):
+            if topo not in por_valor:
+                buracos += 1
+                if buracos > livres:
+                    break
+                continue
+            naturais.append(por_valor[topo])
+            necessarios = buracos + max(0, 3 - (topo - carta.valor_idx + 1))
+            if necessarios <= livres:
+                novo_resto = tuple(c for c in resto if c not in naturais)
+                formar(naturais, necessarios, NUM_VALORES - (topo - carta.valor_idx + 1) + buracos, novo_resto)
+
+        return melhor
+
+    @staticmethod
+    def _cadeia(resto: tuple, carta: Carta, ate: int) -> Optional[List[Carta]]:
+        """Cartas do mesmo naipe de carta.valor_idx até 'ate', em ordem decrescente"""
+        encontradas = {carta.valor_idx: carta}
+        for c in resto:
+            if c.naipe_idx == carta.naipe_idx and carta.valor_idx < c.valor_idx <= ate:
+                encontradas.setdefault(c.valor_idx, c)
+        if len(encontradas) != ate - carta.valor_idx + 1:
+            return None
+        return [encontradas[v] for v in range(ate, carta.valor_idx - 1, -1)]
+
+
+def melhor_jogada(mao: Sequence[Carta], agrupamentos: Sequence[Agrupamento], minimo_na_mao: int = 0) -> Jogada:
+    """Calcula o conjunto de agrupamentos novos e extensões de maior pontuação
+
+    A pontuação segue Agrupamento.get_pontos e Jogador.get_pontos: cada carta
+    que sai da mão deixa de descontar seus pontos e passa a somá-los no
+    agrupamento, além dos bônus de canastra. 'minimo_na_mao' reserva cartas
+    na mão (por exemplo, 1 para ainda poder descartar no fim do turno).
+
+    As extensões consideradas são as aceitas por Agrupamento.adicionar_carta,
+    aplicadas na ordem devolvida; nas sequências novas, cartas normais entre a
+    menor e a maior carta escolhidas sempre entram no agrupamento.
+    """
+    if len(mao) < minimo_na_mao:
+        return Jogada(0, [], [])
+    busca = _Busca(mao, agrupamentos, minimo_na_mao)
+    ganho, passos = busca.resolver()
+    # Os ramos que mantêm cartas na mão descontam os seus pontos do sentinela, então ele chega alterado
+    if ganho <= _INVALIDO // 2:
+        return Jogada(0, [], [])
+
+    # O valor da busca desconta as cartas que ficam na mão; o ganho é
+    # relativo à pontuação atual, que já descontava a mão inteira
+    ganho += sum(c.pontos for c in mao)
+
+    novos: List[List[Carta]] = []
+    extensoes: List[Tuple[int, List[Carta]]] = []
+    for passo in passos:
+        if passo[0] == 'novo':
+            novos.append(list(passo[1]))
+        elif extensoes and extensoes[-1][0] == passo[1]:
+            extensoes[-1][1].extend(passo[2])
+        else:
+            extensoes.append((passo[1], list(passo[2])))
+    return Jogada(ganho, novos, extensoes)
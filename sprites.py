@@ -0,0 +1,102 @@
+import pygame
+from collections import OrderedDict
+from typing import Hashable, Tuple
+from constants import CARD_WIDTH, CARD_HEIGHT, WHITE, BLACK, BLUE
+from carta import Carta, FACES_POR_BARALHO
+
+class CacheSuperficies:
+    """Superfícies pré-renderizadas usadas pela interface
+
+    Cada carta (por face e estado de seleção), o verso, os botões e os textos
+    são compostos uma única vez e depois apenas copiados para a tela com
+    blit. Os textos e botões, que podem variar (mensagens, pontuações), ficam
+    num cache LRU limitado a 'limite' superfícies.
+    """
+    def __init__(self, font: pygame.font.Font, small_font: pygame.font.Font, limite: int = 256):
+        self.font = font
+        self.small_font = small_font
+        self.limite = limite
+        self._cartas: dict = {}  # (face, selecionada) -> superfície
+        self._verso: pygame.Surface = None
+        self._lru: 'OrderedDict[Hashable, pygame.Surface]' = OrderedDict()
+
+    @staticmethod
+    def _preparar(superficie: pygame.Surface, alfa: bool = False) -> pygame.Surface:
+        """Converte a superfície para o formato da tela, se ela já existir"""
+        if pygame.display.get_surface() is None:
+            return superficie
+        return superficie.convert_alpha() if alfa else superficie.convert()
+
+    def pre_renderizar(self) -> None:
+        """Compõe antecipadamente todas as faces de carta e o verso"""
+        for face in range(FACES_POR_BARALHO):
+            for selecionada in (False, True):
+                self.carta(Carta(face), selecionada)
+        self.verso()
+
+    def carta(self, carta: Carta, selecionada: bool = False) -> pygame.Surface:
+        """Superfície de uma carta virada para cima"""
+        chave = (carta.face, selecionada)
+        superficie = self._cartas.get(chave)
+        if superficie is None:
+            superficie = pygame.Surface((CARD_WIDTH, CARD_HEIGHT))
+            superficie.fill(WHITE)
+            pygame.draw.rect(superficie, BLUE if selecionada else BLACK, superficie.get_rect(), 2)
+            texto = self.font.render(str(carta), True, carta.get_cor())
+            superficie.blit(texto, texto.get_rect(center=(CARD_WIDTH // 2, CARD_HEIGHT // 2)))
+            superficie = self._cartas[chave] = self._preparar(superficie)
+        return superficie
+
+    def verso(self) -> pygame.Surface:
+        """Superfície de uma carta virada para baixo"""
+        if self._verso is None:
+            superficie = pygame.Surface((CARD_WIDTH, CARD_HEIGHT))
+            superficie.fill(BLUE)
+            self._verso = self._preparar(superficie)
+        return self._verso
+
+    def _buscar(self, chave: Hashable) -> pygame.Surface:
+        superficie = self._lru.get(chave)
+        if superficie is not None:
+            self._lru.move_to_end(chave)
+        return superficie
+
+    def _guardar(self, chave: Hashable, superficie: pygame.Surface) -> pygame.Surface:
+        self._lru[chave] = superficie
+        if len(self._lru) > self.limite:
+            self._lru.popitem(last=False)
+        return superficie
+
+    def texto(self, texto: str, cor: Tuple[int, int, int], pequeno: bool = False) -> pygame.Surface:
+        """Superfície de um texto renderizado com a fonte normal ou a pequena"""
+        chave = ('texto', texto, cor, pequeno)
+        superficie = self._buscar(chave)
+        if superficie is None:
+            fonte = self.small_font if pequeno else self.font
+            superficie = self._guardar(chave, self._preparar(fonte.render(texto, True, cor), alfa=True))
+        return superficie
+
+    def retangulo(self, tamanho: Tuple[int, int], cor: Tuple[int, int, int]) -> pygame.Surface:
+        """Superfície de um retângulo preenchido com borda preta"""
+        chave = ('retangulo', tamanho, cor)
+        superficie = self._buscar(chave)
+        if superficie is None:
+            superficie = pygame.Surface(tamanho)
+            superficie.fill(cor)
+            pygame.draw.rect(superficie, BLACK, superficie.get_rect(), 2)
+            superficie = self._guardar(chave, self._preparar(superficie))
+        return superficie
+
+    def botao(self, texto: str, tamanho: Tuple[int, int], cor: Tuple[int, int, int],
+              pequeno: bool = True, margem_topo: int = 10) -> pygame.Surface:
+        """Superfície de um botão com fundo, borda e texto centralizado na horizontal"""
+        chave = ('botao', texto, tamanho, cor, pequeno, margem_topo)
+        superficie = self._buscar(chave)
+        if superficie is None:
+            superficie = pygame.Surface(tamanho)
+            superficie.fill(cor)
+            pygame.draw.rect(superficie, BLACK, superficie.get_rect(), 2)
+            rotulo = (self.small_font if pequeno else self.font).render(texto, True, BLACK)
+            superficie.blit(rotulo, ((tamanho[0] - rotulo.get_width()) // 2, margem_topo))
+            superficie = self._guardar(chave, self._preparar(superficie))
+        return superficie
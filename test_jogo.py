@@ -0,0 +1,47 @@
+import random
+import unittest
+from collections import Counter
+from acoes import COMPRAR_DESCARTE, COMPRAR_MONTE, DESCARTAR, ESTENDER, FORMAR, PASSAR, Acao
+from jogo import Jogo
+
+
+def _estado(jogo: Jogo) -> tuple:
+    """O que desfazer precisa restaurar: o estado serializado e o que não vai para ele"""
+    return (jogo.para_bytes(), [e.pontos_agrupamentos for e in jogo.equipes],
+            [list(j.mao) for j in jogo.jogadores], len(jogo.historico))
+
+
+class TestDesfazer(unittest.TestCase):
+    def _conferir(self, jogo: Jogo, acao: Acao, feitas: Counter) -> None:
+        antes = _estado(jogo)
+        delta = jogo.fazer(acao)
+        self.assertIsNotNone(delta, str(acao))
+        feitas[acao.tipo] += 1
+        feitas["pilha"] += len(delta.pilha) > 1
+        feitas["morto"] += delta.morto
+        self.assertIs(jogo.desfazer(), delta)
+        self.assertEqual(_estado(jogo), antes, str(acao))
+
+    def test_fazer_e_desfazer_restauram_o_estado(self):
+        rng = random.Random(23)
+        feitas: Counter = Counter()
+        configuracoes = [dict(), dict(mortos=0, descarte_inteiro=False),
+                         dict(nomes=["A", "B", "C", "D"], baralhos=2, equipes=(0, 1, 0, 1))]
+        for regras in configuracoes:
+            for _ in range(4):
+                jogo = Jogo(rng.randrange(2 ** 64), **regras)
+                jogo.iniciar()
+                while not jogo.verificar_fim_jogo() and jogo.turno < 300:
+                    acoes = jogo.acoes_legais()
+                    for acao in acoes:
+                        self._conferir(jogo, acao, feitas)
+                    self._conferir(jogo, Acao(PASSAR, jogo.jogador_atual), feitas)
+                    # Prefere comprar do descarte e baixar cartas, para a partida avançar
+                    preferidas = [a for a in acoes if a.tipo in (COMPRAR_DESCARTE, FORMAR, ESTENDER)]
+                    jogo.fazer(rng.choice(preferidas or acoes))
+        for tipo in (COMPRAR_MONTE, COMPRAR_DESCARTE, FORMAR, ESTENDER, DESCARTAR, PASSAR, "pilha", "morto"):
+            self.assertGreater(feitas[tipo], 0, tipo)
+
+
+if __name__ == "__main__":
+    unittest.main()
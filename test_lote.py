@@ -0,0 +1,109 @@
+import random
+import unittest
+from itertools import combinations
+from agrupamento import Agrupamento, TRINCA, SEQUENCIA
+from carta import Carta, FACES_POR_BARALHO, NUM_VALORES
+from mao import Mao
+
+try:
+    import numpy as np
+    import lote
+except ImportError:
+    lote = None
+
+
+def _grupo_aleatorio(rng: random.Random, baralhos: int) -> list:
+    """Cartas sem repetir código, metade das vezes perto de uma trinca ou sequência (para ter grupos válidos)"""
+    codigos = list(range(FACES_POR_BARALHO * baralhos))
+    forma = rng.random()
+    if forma < 0.25:
+        valor = rng.randrange(NUM_VALORES)
+        candidatos = [c for c in codigos if c % FACES_POR_BARALHO % NUM_VALORES == valor
+                      and c % FACES_POR_BARALHO < 52]
+    elif forma < 0.5:
+        naipe = rng.randrange(4)
+        inicio = rng.randrange(NUM_VALORES)
+        candidatos = [c for c in codigos if c % FACES_POR_BARALHO // NUM_VALORES == naipe
+                      and inicio <= c % FACES_POR_BARALHO % NUM_VALORES < inicio + 6]
+    else:
+        candidatos = codigos
+    # Especiais (curingas e '2's) de qualquer naipe entram em todas as formas
+    especiais = [c for c in codigos if Carta(c).especial and c not in candidatos]
+    quantidade = rng.randint(1, 14)
+    escolhidos = rng.sample(candidatos, min(quantidade, len(candidatos)))
+    escolhidos += rng.sample(especiais, rng.randint(0, min(3, len(especiais))))
+    return [Carta(c) for c in escolhidos]
+
+
+def _formaveis(cartas: list) -> tuple:
+    """Valores de trinca e naipes de sequência formáveis, por força bruta sobre os subconjuntos"""
+    trincas, sequencias = set(), set()
+    for tamanho in range(3, len(cartas) + 1):
+        for subconjunto in combinations(cartas, tamanho):
+            agrupamento = Agrupamento(list(subconjunto))
+            if not agrupamento.validar():
+                continue
+            if agrupamento.tipo & TRINCA:
+                trincas.add(agrupamento.min_valor)
+            if agrupamento.tipo & SEQUENCIA:
+                sequencias.add(agrupamento.naipes.bit_length() - 1)
+    return trincas, sequencias
+
+
+@unittest.skipIf(lote is None, "NumPy não instalado")
+class TestLote(unittest.TestCase):
+    def test_agrupamentos_iguais_aos_objetos(self):
+        rng = random.Random(21)
+        for baralhos in (1, 2, 3):
+            grupos = [_grupo_aleatorio(rng, baralhos) for _ in range(3000)]
+            matriz = lote.contagens(grupos)
+            tipos = lote.classificar(matriz)
+            validos = lote.validos(matriz)
+            canastras = lote.canastras(matriz)
+            pontos = lote.pontos_agrupamentos(matriz)
+            for i, grupo in enumerate(grupos):
+                agrupamento = Agrupamento(grupo)
+                mensagem = f"{baralhos} baralho(s): {[str(c) for c in grupo]}"
+                self.assertEqual(tipos[i], agrupamento.tipo, mensagem)
+                self.assertEqual(validos[i], agrupamento.validar(), mensagem)
+                self.assertEqual(canastras[i], agrupamento.validar() and agrupamento.eh_canastra(), mensagem)
+                if agrupamento.validar():
+                    self.assertEqual(pontos[i], agrupamento.get_pontos(), mensagem)
+                else:
+                    self.assertEqual(pontos[i], 0, mensagem)
+
+    def test_pontos_das_maos(self):
+        rng = random.Random(7)
+        for baralhos in (1, 2, 3):
+            maos = [[Carta(c) for c in rng.sample(range(FACES_POR_BARALHO * baralhos), rng.randint(0, 20))]
+                    for _ in range(2000)]
+            pontos = lote.pontos_cartas(lote.contagens(maos))
+            curingas = lote.curingas(lote.contagens(maos))
+            for i, mao in enumerate(maos):
+                self.assertEqual(pontos[i], Mao(mao).get_pontos())
+                self.assertEqual(curingas[i], sum(1 for c in mao if c.especial))
+
+    def test_contagens_de_codigos(self):
+        rng = random.Random(3)
+        grupos = [rng.sample(range(FACES_POR_BARALHO * 2), rng.randint(0, 15)) for _ in range(500)]
+        esperado = lote.contagens([[Carta(c) for c in grupo] for grupo in grupos])
+        codigos = [c for grupo in grupos for c in grupo]
+        calculado = lote.contagens_de_codigos(codigos, [len(grupo) for grupo in grupos])
+        self.assertTrue(np.array_equal(esperado, calculado))
+
+    def test_formaveis_por_forca_bruta(self):
+        rng = random.Random(5)
+        for baralhos in (1, 2):
+            maos = [_grupo_aleatorio(rng, baralhos)[:8] for _ in range(400)]
+            matriz = lote.contagens(maos)
+            trincas = lote.trincas_formaveis(matriz)
+            sequencias = lote.sequencias_formaveis(matriz)
+            for i, mao in enumerate(maos):
+                esperadas_trincas, esperadas_sequencias = _formaveis(mao)
+                mensagem = f"{baralhos} baralho(s): {[str(c) for c in mao]}"
+                self.assertEqual(set(np.flatnonzero(trincas[i])), esperadas_trincas, mensagem)
+                self.assertEqual(set(np.flatnonzero(sequencias[i])), esperadas_sequencias, mensagem)
+
+
+if __name__ == "__main__":
+    unittest.main()
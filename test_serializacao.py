@@ -0,0 +1,120 @@
+import io
+import random
+import struct
+import unittest
+from acoes import NOVO_JOGO, RegistroAcoes, decodificar_novo_jogo, ler_registros
+from carta import codificar
+from jogo import Jogo
+from reproducao import reproduzir
+from serializacao import ESTADOS, MAGICO
+from simulacao import jogar_partida
+
+
+def _partida(rng: random.Random, acoes: int, **regras) -> Jogo:
+    """Partida com 'acoes' ações aleatórias entre as legais"""
+    jogo = Jogo(rng.randrange(2 ** 64), **regras)
+    jogo.iniciar()
+    for _ in range(acoes):
+        if jogo.verificar_fim_jogo():
+            break
+        jogo.fazer(rng.choice(jogo.acoes_legais()))
+    return jogo
+
+
+def _cartas(cartas) -> bytes:
+    codigos = list(codificar(cartas))
+    return struct.pack(f'<H{len(codigos)}H', len(codigos), *codigos)
+
+
+def _texto(texto: str) -> bytes:
+    dados = texto.encode('utf-8')
+    return struct.pack('<H', len(dados)) + dados
+
+
+def _agrupamentos(agrupamentos) -> bytes:
+    partes = [struct.pack('<H', len(agrupamentos))]
+    for agrupamento in agrupamentos:
+        partes.append(_cartas(agrupamento._cartas))
+        sequencia = agrupamento.eh_sequencia()
+        partes.append(struct.pack('<b', agrupamento.inicio if sequencia else -1))
+        if sequencia:
+            partes.append(_cartas(agrupamento.cartas)[2:])
+    return b''.join(partes)
+
+
+def _estado_antigo(jogo: Jogo, versao: int) -> bytes:
+    """Codifica a partida nos formatos 2 (um baralho, sem equipes) e 3 (sem mortos nem descarte inteiro)"""
+    partes = [struct.pack('<3sBBBBIQ', MAGICO, versao, ESTADOS.index(jogo.estado), jogo.jogador_atual,
+                          len(jogo.jogadores), jogo.turno, jogo.semente)]
+    if versao >= 3:
+        partes.append(struct.pack('<B', jogo.baralhos))
+    partes += [_cartas(jogo.monte.cartas), _cartas(jogo.monte.descarte), _texto(jogo.mensagem)]
+    for jogador in jogo.jogadores:
+        partes += [_texto(jogador.nome), struct.pack('<B', jogador.comprou_carta)]
+        if versao >= 3:
+            partes.append(struct.pack('<B', jogador.equipe.indice))
+        partes.append(_cartas(jogador.mao))
+        if versao == 2:
+            partes.append(_agrupamentos(jogador.agrupamentos))
+    if versao >= 3:
+        for equipe in jogo.equipes:
+            partes.append(_agrupamentos(equipe.agrupamentos))
+    return b''.join(partes)
+
+
+def _log_antigo(log: bytes, versao: int) -> bytes:
+    """Reescreve os registros NOVO_JOGO de um log nos formatos 1 (só semente e jogadores) e 2 (sem as regras)"""
+    saida = io.BytesIO()
+    for tipo, conteudo in ler_registros(io.BytesIO(log)):
+        if tipo == NOVO_JOGO:
+            novo = decodificar_novo_jogo(conteudo)
+            conteudo = struct.pack('<BQB', versao, novo.semente, novo.num_jogadores)
+            if versao == 2:
+                conteudo += struct.pack('<B', novo.baralhos) + bytes(novo.equipes)
+        saida.write(struct.pack('<BH', tipo, len(conteudo)) + conteudo)
+    return saida.getvalue()
+
+
+class TestSerializacao(unittest.TestCase):
+    def test_ida_e_volta(self):
+        rng = random.Random(11)
+        configuracoes = [dict(), dict(mortos=0, descarte_inteiro=False),
+                         dict(nomes=["A", "B", "C"], baralhos=2),
+                         dict(nomes=["A", "B", "C", "D"], baralhos=2, equipes=(0, 1, 0, 1))]
+        for regras in configuracoes:
+            for acoes in (0, 5, 40, 150, 400):
+                jogo = _partida(rng, acoes, **regras)
+                copia = Jogo.de_bytes(jogo.para_bytes())
+                mensagem = f"{regras}, {acoes} ações"
+                self.assertEqual(copia.para_bytes(), jogo.para_bytes(), mensagem)
+                self.assertEqual(copia.pontos_equipes(), jogo.pontos_equipes(), mensagem)
+                self.assertEqual([j.equipe.indice for j in copia.jogadores],
+                                 [j.equipe.indice for j in jogo.jogadores], mensagem)
+                if jogo.estado == "jogando" and not jogo.verificar_fim_jogo():
+                    self.assertEqual(copia.acoes_legais(), jogo.acoes_legais(), mensagem)
+
+    def test_le_estados_antigos(self):
+        rng = random.Random(2)
+        for versao, regras in ((2, dict()), (3, dict(nomes=["A", "B", "C", "D"], baralhos=2, equipes=(0, 1, 0, 1)))):
+            for acoes in (0, 30, 200):
+                jogo = _partida(rng, acoes, mortos=0, descarte_inteiro=False, **regras)
+                copia = Jogo.de_bytes(_estado_antigo(jogo, versao))
+                mensagem = f"versão {versao}, {acoes} ações"
+                self.assertEqual((copia.mortos, copia.descarte_inteiro), (0, False), mensagem)
+                self.assertEqual(copia.para_bytes(), jogo.para_bytes(), mensagem)
+                self.assertEqual(copia.pontos_equipes(), jogo.pontos_equipes(), mensagem)
+
+    def test_le_logs_antigos(self):
+        for versao, nomes, regras in ((1, ["gulosa", "aleatoria"], dict()),
+                                      (2, ["gulosa", "aleatoria"] * 2, dict(baralhos=2, equipes=(0, 1, 0, 1)))):
+            arquivo = io.BytesIO()
+            registro = RegistroAcoes(arquivo, intervalo_checkpoint=5)
+            resultados = [jogar_partida(nomes, semente, registro=registro, mortos=0, descarte_inteiro=False, **regras)
+                          for semente in range(3)]
+            reproduzidas = list(reproduzir(io.BytesIO(_log_antigo(arquivo.getvalue(), versao)), verificar=True))
+            self.assertEqual([(r.semente, r.pontos, r.vencedor) for r in reproduzidas],
+                             [(r.semente, r.pontos, r.vencedor) for r in resultados], f"versão {versao}")
+
+
+if __name__ == "__main__":
+    unittest.main()
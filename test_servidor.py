@@ -0,0 +1,119 @@
+import asyncio
+import json
+import unittest
+from servidor import Servidor
+
+
+class Cliente:
+    """Cliente de teste que fala o protocolo de linhas JSON do servidor"""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def conectar(cls, porta: int) -> 'Cliente':
+        return cls(*await asyncio.open_connection("127.0.0.1", porta))
+
+    async def enviar(self, mensagem: dict) -> None:
+        self.writer.write(json.dumps(mensagem).encode() + b"\n")
+        await self.writer.drain()
+
+    async def esperar(self, tipo: str) -> dict:
+        while True:
+            mensagem = json.loads(await asyncio.wait_for(self.reader.readline(), 2))
+            if mensagem["tipo"] == tipo:
+                return mensagem
+
+    async def restantes(self, espera: float = 0.3) -> list:
+        """Mensagens que chegam até 'espera' segundos sem nada novo"""
+        mensagens = []
+        try:
+            while True:
+                mensagens.append(json.loads(await asyncio.wait_for(self.reader.readline(), espera)))
+        except asyncio.TimeoutError:
+            return mensagens
+
+    async def fechar(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class TestServidor(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.servidor = Servidor()
+        self.porta = await self.servidor.iniciar(porta=0)
+
+    async def asyncTearDown(self):
+        await self.servidor.encerrar()
+
+    async def test_feed_do_assento_acaba_ao_sair(self):
+        a = await Cliente.conectar(self.porta)
+        b = await Cliente.conectar(self.porta)
+        await a.enviar({"tipo": "entrar", "mesa": "m", "semente": 1})
+        self.assertEqual((await a.esperar("entrou"))["assento"], 0)
+        await b.enviar({"tipo": "entrar", "mesa": "m"})
+        await b.esperar("entrou")
+        await a.enviar({"tipo": "assistir", "mesa": "m", "assento": 0})
+        await a.esperar("quadro")
+        await a.enviar({"tipo": "sair"})
+        await a.restantes()
+
+        # Quem entra no assento vago recebe uma mão que 'a' não pode ver
+        c = await Cliente.conectar(self.porta)
+        await c.enviar({"tipo": "entrar", "mesa": "m"})
+        self.assertEqual((await c.esperar("entrou"))["assento"], 0)
+        await c.enviar({"tipo": "acao", "acao": "comprar_monte"})
+        await c.restantes()
+        for mensagem in await a.restantes():
+            self.assertNotIn("mao", json.dumps(mensagem))
+        for cliente in (a, b, c):
+            await cliente.fechar()
+
+    async def test_oponente_so_registrado(self):
+        cliente = await Cliente.conectar(self.porta)
+        for nome in ("sys:exit", "os:abort", "estrategias:EstrategiaGulosa"):
+            await cliente.enviar({"tipo": "entrar", "mesa": "x", "oponente": nome})
+            self.assertIn("Oponente desconhecido", (await cliente.esperar("erro"))["mensagem"])
+        await cliente.enviar({"tipo": "entrar", "mesa": "x", "oponente": "gulosa"})
+        self.assertEqual((await cliente.esperar("entrou"))["assento"], 0)
+        await cliente.fechar()
+
+    async def test_entrar_numa_mesa_removida_enquanto_espera(self):
+        a = await Cliente.conectar(self.porta)
+        await a.enviar({"tipo": "entrar", "mesa": "m"})
+        await a.esperar("entrou")
+        mesa = self.servidor.mesas["m"]
+
+        # 'sair' (que esvazia e remove a mesa) e 'entrar' esperam a mesma trava, nessa ordem
+        await mesa.trava.acquire()
+        b = await Cliente.conectar(self.porta)
+        await a.enviar({"tipo": "sair"})
+        await asyncio.sleep(0.1)
+        await b.enviar({"tipo": "entrar", "mesa": "m"})
+        await asyncio.sleep(0.1)
+        mesa.trava.release()
+
+        self.assertEqual((await b.esperar("entrou"))["assento"], 0)
+        self.assertIsNot(self.servidor.mesas["m"], mesa)
+        self.assertIsNotNone(self.servidor.mesas["m"].assentos[0])
+        await a.enviar({"tipo": "assistir", "mesa": "m"})
+        await a.esperar("quadro")
+        for cliente in (a, b):
+            await cliente.fechar()
+
+    async def test_limite_de_mesas_mcts(self):
+        self.servidor.maximo_mesas_mcts = 1
+        a = await Cliente.conectar(self.porta)
+        b = await Cliente.conectar(self.porta)
+        await a.enviar({"tipo": "entrar", "mesa": "m1", "oponente": "mcts"})
+        await a.esperar("entrou")
+        await b.enviar({"tipo": "entrar", "mesa": "m2", "oponente": "mcts"})
+        self.assertIn("MCTS", (await b.esperar("erro"))["mensagem"])
+        await b.enviar({"tipo": "entrar", "mesa": "m2", "oponente": "gulosa"})
+        await b.esperar("entrou")
+        for cliente in (a, b):
+            await cliente.fechar()
+
+
+if __name__ == "__main__":
+    unittest.main()
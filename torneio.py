@@ -0,0 +1,416 @@
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from multiprocessing import Pool
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Set, Tuple
+from jogo import Jogo, MORTOS
+from simulacao import Estatisticas, ResultadoPartida, jogar_partida, semente_da_partida, validar_semente
+
+# Arquivo de resultados de um torneio (little-endian):
+#   cabeçalho: MAGICO, versão (B), tamanho da configuração (I) e a configuração (Torneio) em JSON
+#   blocos: MARCA_BLOCO, linhas (I), CRC-32 das colunas (I) e as colunas de COLUNAS, uma
+#   depois da outra, cada uma com um valor por partida do bloco
+# Cada bloco é gravado de uma vez depois de um lote de partidas; um bloco
+# incompleto ou corrompido no fim do arquivo (gravação interrompida) é
+# descartado ao retomar, e essas partidas são jogadas de novo.
+MAGICO = b'BUT'
+VERSAO = 1
+MARCA_BLOCO = b'BLC'
+COLUNAS: Tuple[Tuple[str, str], ...] = (
+    ("partida", "I"),  # Índice da partida no torneio (ver Torneio.partida)
+    ("semente", "Q"),
+    ("rodada", "H"),
+    ("a", "B"),  # Participantes do confronto (índices em Torneio.estrategias)
+    ("b", "B"),
+    ("pontos_a", "i"),  # Pontos finais da equipe de cada participante (Equipe.get_pontos)
+    ("pontos_b", "i"),
+    ("canastras_a", "H"),
+    ("canastras_b", "H"),
+    ("turnos", "H"),
+    ("resultado", "b"),  # 1: vitória de a, 0: empate, -1: vitória de b
+)
+
+_CABECALHO = struct.Struct('<3sBI')
+_BLOCO = struct.Struct('<3sII')
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+TODOS_CONTRA_TODOS = "todos"
+SUICO = "suico"
+
+ELO_INICIAL = 1500.0
+ELO_K = 16.0
+GLICKO_DESVIO = 350.0  # Desvio de quem ainda não jogou
+GLICKO_C = 34.6  # Crescimento do desvio por rodada: de 50 volta a 350 em cerca de 100 rodadas sem jogar
+_Q = math.log(10) / 400
+
+
+class Torneio(NamedTuple):
+    """Configuração de um torneio entre estratégias, gravada no cabeçalho do arquivo de resultados
+
+    Cada rodada emparelha os participantes em confrontos de 'partidas'
+    partidas (quem começa alterna a cada partida); com 'parcerias' cada
+    participante joga com duas cópias de si mesmo em dupla. As demais regras
+    são as de Jogo.
+    """
+    estrategias: Tuple[str, ...]
+    formato: str = TODOS_CONTRA_TODOS
+    rodadas: int = 0  # 0: uma volta completa (todos contra todos) ou ceil(log2(n)) rodadas (suíço)
+    partidas: int = 100  # Partidas por confronto
+    semente: int = 0
+    max_turnos: int = 1000
+    baralhos: int = 1
+    parcerias: bool = False
+    mortos: int = MORTOS
+    descarte_inteiro: bool = True
+
+    def total_rodadas(self) -> int:
+        n = len(self.estrategias)
+        if self.rodadas:
+            return self.rodadas
+        if self.formato == SUICO:
+            return max(1, math.ceil(math.log2(n)))
+        return n - 1 if n % 2 == 0 else n
+
+    def confrontos_por_rodada(self) -> int:
+        return len(self.estrategias) // 2
+
+    def partida(self, rodada: int, confronto: int, jogo: int) -> int:
+        """Índice global de uma partida, que define a sua semente"""
+        return (rodada * self.confrontos_por_rodada() + confronto) * self.partidas + jogo
+
+    def validar(self) -> None:
+        """ValueError se a configuração não pode ser disputada"""
+        if len(self.estrategias) < 2 or len(set(self.estrategias)) != len(self.estrategias):
+            raise ValueError("O torneio precisa de pelo menos 2 estratégias diferentes")
+        if len(self.estrategias) > 255:
+            raise ValueError("No máximo 255 estratégias")
+        if self.formato not in (TODOS_CONTRA_TODOS, SUICO):
+            raise ValueError(f"Formato desconhecido: {self.formato}")
+        if self.partidas < 1:
+            raise ValueError("Cada confronto precisa de pelo menos uma partida")
+        validar_semente(self.semente)
+        Jogo(0, nomes=["a", "b"] * (2 if self.parcerias else 1), baralhos=self.baralhos,
+             equipes=(0, 1, 0, 1) if self.parcerias else None, mortos=self.mortos)
+
+
+class Elo:
+    """Notas Elo, atualizadas partida a partida"""
+    def __init__(self, participantes: int, k: float = ELO_K):
+        self.k = k
+        self.notas = [ELO_INICIAL] * participantes
+
+    def atualizar(self, jogos: Sequence[Tuple[int, int, float]]) -> None:
+        """Aplica os jogos (a, b, pontuação de a: 1, 0,5 ou 0) em ordem"""
+        for a, b, pontuacao in jogos:
+            esperado = 1 / (1 + 10 ** ((self.notas[b] - self.notas[a]) / 400))
+            variacao = self.k * (pontuacao - esperado)
+            self.notas[a] += variacao
+            self.notas[b] -= variacao
+
+
+class Glicko:
+    """Notas Glicko (Glickman, 1999), com cada rodada como um período de avaliação"""
+    def __init__(self, participantes: int, c: float = GLICKO_C):
+        self.c = c
+        self.notas = [ELO_INICIAL] * participantes
+        self.desvios = [GLICKO_DESVIO] * participantes
+
+    @staticmethod
+    def _g(desvio: float) -> float:
+        return 1 / math.sqrt(1 + 3 * _Q ** 2 * desvio ** 2 / math.pi ** 2)
+
+    def atualizar(self, jogos: Sequence[Tuple[int, int, float]]) -> None:
+        """Aplica os jogos (a, b, pontuação de a) de um período, todos com as notas do início dele"""
+        self.desvios = [min(math.sqrt(d ** 2 + self.c ** 2), GLICKO_DESVIO) for d in self.desvios]
+        variancia = [0.0] * len(self.notas)  # Soma de g² E (1 - E) de cada participante
+        melhora = [0.0] * len(self.notas)  # Soma de g (s - E)
+        for a, b, pontuacao in jogos:
+            for eu, outro, s in ((a, b, pontuacao), (b, a, 1 - pontuacao)):
+                g = self._g(self.desvios[outro])
+                esperado = 1 / (1 + 10 ** (-g * (self.notas[eu] - self.notas[outro]) / 400))
+                variancia[eu] += g ** 2 * esperado * (1 - esperado)
+                melhora[eu] += g * (s - esperado)
+        for i, soma in enumerate(variancia):
+            if soma:
+                inverso = 1 / self.desvios[i] ** 2 + _Q ** 2 * soma
+                self.notas[i] += _Q / inverso * melhora[i]
+                self.desvios[i] = math.sqrt(1 / inverso)
+
+
+def emparelhar_todos(participantes: int, rodada: int) -> List[Tuple[int, int]]:
+    """Confrontos de uma rodada de todos contra todos (método do círculo; com número ímpar, um folga)"""
+    assentos: List[Optional[int]] = list(range(participantes)) + ([None] if participantes % 2 else [])
+    m = len(assentos)
+    giro = rodada % (m - 1)
+    resto = assentos[1:]
+    roda = [assentos[0]] + resto[m - 1 - giro:] + resto[:m - 1 - giro]
+    pares = [(roda[i], roda[m - 1 - i]) for i in range(m // 2)]
+    # A cada volta completa os lados se invertem
+    if rodada // (m - 1) % 2:
+        pares = [(b, a) for a, b in pares]
+    return [(a, b) for a, b in pares if a is not None and b is not None]
+
+
+def emparelhar_suico(pontuacao: Sequence[float], notas: Sequence[float], jogados: Set[FrozenSet[int]],
+                     folgas: Sequence[int]) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+    """Confrontos de uma rodada do sistema suíço e quem folga (None com número par)
+
+    Ordena por pontuação e nota e emparelha cada um com o próximo da lista
+    que ainda não enfrentou (se já enfrentou todos, com o próximo). Com
+    número ímpar, folga o último colocado entre os que folgaram menos.
+    """
+    ordem = sorted(range(len(pontuacao)), key=lambda i: (-pontuacao[i], -notas[i], i))
+    folga = None
+    if len(ordem) % 2:
+        folga = min(reversed(ordem), key=lambda i: folgas[i])
+        ordem.remove(folga)
+    pares = []
+    while ordem:
+        a = ordem.pop(0)
+        b = next((x for x in ordem if frozenset((a, x)) not in jogados), ordem[0])
+        ordem.remove(b)
+        pares.append((a, b))
+    return pares, folga
+
+
+def _codificar_bloco(linhas: Sequence[tuple]) -> bytes:
+    colunas = []
+    for indice, (_, tipo) in enumerate(COLUNAS):
+        valores = array(tipo, (linha[indice] for linha in linhas))
+        if _BIG_ENDIAN:
+            valores.byteswap()
+        colunas.append(valores.tobytes())
+    dados = b''.join(colunas)
+    return _BLOCO.pack(MARCA_BLOCO, len(linhas), zlib.crc32(dados)) + dados
+
+
+_TAMANHO_LINHA = sum(array(tipo).itemsize for _, tipo in COLUNAS)
+
+
+def ler_resultados(caminho: str) -> Tuple[Torneio, Dict[str, array], int]:
+    """Lê um arquivo de resultados: a configuração, as colunas e onde termina o último bloco íntegro"""
+    with open(caminho, "rb") as arquivo:
+        dados = arquivo.read()
+    magico, versao, tamanho = _CABECALHO.unpack_from(dados, 0)
+    if magico != MAGICO or versao != VERSAO:
+        raise ValueError(f"{caminho} não é um arquivo de resultados de torneio compatível")
+    pos = _CABECALHO.size + tamanho
+    configuracao = json.loads(dados[_CABECALHO.size:pos].decode('utf-8'))
+    torneio = Torneio(**{**configuracao, "estrategias": tuple(configuracao["estrategias"])})
+
+    colunas = {nome: array(tipo) for nome, tipo in COLUNAS}
+    while pos + _BLOCO.size <= len(dados):
+        marca, linhas, crc = _BLOCO.unpack_from(dados, pos)
+        fim = pos + _BLOCO.size + linhas * _TAMANHO_LINHA
+        if marca != MARCA_BLOCO or fim > len(dados) or zlib.crc32(dados[pos + _BLOCO.size:fim]) != crc:
+            break
+        inicio = pos + _BLOCO.size
+        for nome, tipo in COLUNAS:
+            valores = array(tipo)
+            valores.frombytes(dados[inicio:inicio + linhas * valores.itemsize])
+            if _BIG_ENDIAN:
+                valores.byteswap()
+            colunas[nome].extend(valores)
+            inicio += linhas * valores.itemsize
+        pos = fim
+    return torneio, colunas, pos
+
+
+def _jogar_partidas(args: tuple) -> List[tuple]:
+    """Joga um lote de partidas (partida, rodada, a, b) dentro de um processo e retorna as linhas"""
+    torneio, partidas = args
+    equipes = (0, 1, 0, 1) if torneio.parcerias else None
+    linhas = []
+    for partida, rodada, a, b in partidas:
+        # Quem começa alterna a cada partida do confronto
+        primeiro, segundo = (a, b) if partida % torneio.partidas % 2 == 0 else (b, a)
+        nomes = [torneio.estrategias[primeiro], torneio.estrategias[segundo]] * (2 if torneio.parcerias else 1)
+        semente = semente_da_partida(torneio.semente, partida)
+        resultado = jogar_partida(nomes, semente, torneio.max_turnos, None, torneio.baralhos, equipes,
+                                  torneio.mortos, torneio.descarte_inteiro)
+        assento_a = 0 if primeiro == a else 1
+        if resultado.vencedor is None:
+            placar = 0
+        else:
+            placar = 1 if resultado.vencedor % 2 == assento_a else -1
+        linhas.append((partida, semente, rodada, a, b, resultado.pontos[assento_a], resultado.pontos[1 - assento_a],
+                       resultado.canastras[assento_a], resultado.canastras[1 - assento_a], resultado.turnos, placar))
+    return linhas
+
+
+class Classificacao:
+    """Notas, pontuação e estatísticas acumuladas dos participantes ao longo das rodadas"""
+    def __init__(self, torneio: Torneio):
+        n = len(torneio.estrategias)
+        self.torneio = torneio
+        self.elo = Elo(n)
+        self.glicko = Glicko(n)
+        self.pontuacao = [0.0] * n  # Vitórias mais meio ponto por empate (e pelas folgas)
+        self.folgas = [0] * n
+        self.jogados: Set[FrozenSet[int]] = set()
+        self.estatisticas = Estatisticas()
+
+    def emparelhar(self, rodada: int) -> List[Tuple[int, int]]:
+        """Confrontos da rodada; no suíço, a folga já é contada"""
+        if self.torneio.formato == TODOS_CONTRA_TODOS:
+            return emparelhar_todos(len(self.torneio.estrategias), rodada)
+        pares, folga = emparelhar_suico(self.pontuacao, self.elo.notas, self.jogados, self.folgas)
+        if folga is not None:
+            self.folgas[folga] += 1
+            self.pontuacao[folga] += self.torneio.partidas / 2
+        return pares
+
+    def registrar_rodada(self, linhas: Sequence[tuple]) -> None:
+        """Soma as partidas de uma rodada, em ordem de partida (as notas não dependem da ordem de chegada)"""
+        jogos = []
+        nomes = self.torneio.estrategias
+        for partida, semente, _, a, b, pontos_a, pontos_b, canastras_a, canastras_b, turnos, placar in sorted(linhas):
+            pontuacao = (placar + 1) / 2
+            jogos.append((a, b, pontuacao))
+            self.pontuacao[a] += pontuacao
+            self.pontuacao[b] += 1 - pontuacao
+            self.jogados.add(frozenset((a, b)))
+            self.estatisticas.registrar(ResultadoPartida(
+                semente, (nomes[a], nomes[b]), (pontos_a, pontos_b), None if placar == 0 else 0 if placar > 0 else 1,
+                turnos, (canastras_a, canastras_b)))
+        self.elo.atualizar(jogos)
+        self.glicko.atualizar(jogos)
+
+    def tabela(self) -> List[dict]:
+        """Participantes do primeiro ao último (pela nota Elo)"""
+        resumo = self.estatisticas.resumo()["estrategias"]
+        linhas = []
+        for i, nome in enumerate(self.torneio.estrategias):
+            linhas.append({"estrategia": nome, "elo": self.elo.notas[i], "glicko": self.glicko.notas[i],
+                           "desvio": self.glicko.desvios[i], "pontuacao": self.pontuacao[i],
+                           **resumo.get(nome, {"partidas": 0})})
+        return sorted(linhas, key=lambda linha: -linha["elo"])
+
+
+def disputar(caminho: str, torneio: Optional[Torneio] = None, processos: Optional[int] = None,
+             tamanho_lote: Optional[int] = None, mostrar: bool = False) -> Classificacao:
+    """Disputa (ou retoma) o torneio gravado em 'caminho' e retorna a classificação
+
+    Sem o arquivo, ele é criado com a configuração 'torneio'; com ele, as
+    partidas já gravadas são lidas (a configuração, se dada, tem de ser a
+    mesma) e só as que faltam são jogadas. As partidas de cada rodada são
+    jogadas em paralelo e gravadas em blocos à medida que os lotes terminam;
+    as notas são atualizadas no fim de cada rodada, em ordem de partida, então
+    o resultado não depende do número de processos nem das interrupções.
+    """
+    if os.path.exists(caminho):
+        gravado, colunas, tamanho_valido = ler_resultados(caminho)
+        if torneio is not None and torneio != gravado:
+            raise ValueError(f"{caminho} é de um torneio com outra configuração")
+        torneio = gravado
+        with open(caminho, "r+b") as arquivo:
+            arquivo.truncate(tamanho_valido)
+    else:
+        if torneio is None:
+            raise ValueError(f"{caminho} não existe e nenhuma configuração foi dada")
+        torneio.validar()
+        colunas = {nome: array(tipo) for nome, tipo in COLUNAS}
+        configuracao = json.dumps(torneio._asdict(), ensure_ascii=False).encode('utf-8')
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(_CABECALHO.pack(MAGICO, VERSAO, len(configuracao)) + configuracao)
+
+    gravadas: Dict[int, List[tuple]] = {}  # Linhas já gravadas, por rodada
+    for linha in zip(*(colunas[nome] for nome, _ in COLUNAS)):
+        gravadas.setdefault(linha[2], []).append(linha)
+
+    processos = processos or os.cpu_count() or 1
+    por_rodada = torneio.confrontos_por_rodada() * torneio.partidas
+    tamanho_lote = tamanho_lote or max(1, min(100, por_rodada // (processos * 4)))
+    classificacao = Classificacao(torneio)
+    pool = Pool(processos) if processos > 1 else None
+    try:
+        with open(caminho, "ab") as arquivo:
+            for rodada in range(torneio.total_rodadas()):
+                inicio = time.perf_counter()
+                linhas = gravadas.get(rodada, [])
+                feitas = {linha[0]: linha for linha in linhas}
+                pendentes = []
+                for confronto, (a, b) in enumerate(classificacao.emparelhar(rodada)):
+                    for jogo in range(torneio.partidas):
+                        partida = torneio.partida(rodada, confronto, jogo)
+                        if partida not in feitas:
+                            pendentes.append((partida, rodada, a, b))
+                        elif feitas[partida][3:5] != (a, b):
+                            raise ValueError(f"A partida {partida} de {caminho} não corresponde ao emparelhamento")
+                lotes = [(torneio, pendentes[i:i + tamanho_lote]) for i in range(0, len(pendentes), tamanho_lote)]
+                resultados = pool.imap_unordered(_jogar_partidas, lotes) if pool else map(_jogar_partidas, lotes)
+                for novas in resultados:
+                    arquivo.write(_codificar_bloco(novas))
+                    arquivo.flush()
+                    os.fsync(arquivo.fileno())
+                    linhas.extend(novas)
+                classificacao.registrar_rodada(linhas)
+                if mostrar and pendentes:
+                    print(f"Rodada {rodada + 1}/{torneio.total_rodadas()}: {len(pendentes)} partidas em "
+                          f"{time.perf_counter() - inicio:.1f}s ({len(linhas) - len(pendentes)} já gravadas)",
+                          flush=True)
+    finally:
+        if pool:
+            pool.terminate()
+    return classificacao
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Disputa ou retoma um torneio pela linha de comando"""
+    parser = argparse.ArgumentParser(description="Torneio entre estratégias de Buraco, com notas Elo e Glicko")
+    parser.add_argument("resultados", help="arquivo de resultados (retomado se já existe)")
+    parser.add_argument("-e", "--estrategias", nargs="+",
+                        help="participantes (nome registrado ou modulo:Classe); sem eles, retoma o arquivo")
+    parser.add_argument("--suico", action="store_true", help="sistema suíço em vez de todos contra todos")
+    parser.add_argument("-r", "--rodadas", type=int, default=0,
+                        help="rodadas (padrão: uma volta completa, ou log2 dos participantes no suíço)")
+    parser.add_argument("-n", "--partidas", type=int, default=100, help="partidas por confronto")
+    parser.add_argument("-j", "--processos", type=int, default=None, help="processos (padrão: todos os núcleos)")
+    parser.add_argument("-s", "--semente", type=int, default=0, help="semente geral do torneio")
+    parser.add_argument("-b", "--baralhos", type=int, default=1, help="baralhos de 54 cartas")
+    parser.add_argument("--parcerias", action="store_true", help="cada participante joga em dupla consigo mesmo")
+    parser.add_argument("-m", "--mortos", type=int, default=MORTOS, help="mortos separados na distribuição")
+    parser.add_argument("--descarte-topo", action="store_true", help="comprar do descarte leva só a carta do topo")
+    parser.add_argument("--max-turnos", type=int, default=1000, help="limite de turnos por partida")
+    parser.add_argument("--json", action="store_true", help="imprime a classificação em JSON")
+    args = parser.parse_args(argv)
+
+    torneio = None
+    if args.estrategias:
+        torneio = Torneio(tuple(args.estrategias), SUICO if args.suico else TODOS_CONTRA_TODOS, args.rodadas,
+                          args.partidas, args.semente, args.max_turnos, args.baralhos, args.parcerias, args.mortos,
+                          not args.descarte_topo)
+        try:
+            torneio.validar()
+        except ValueError as erro:
+            parser.error(str(erro))
+    elif not os.path.exists(args.resultados):
+        parser.error("informe as estratégias para começar um torneio novo")
+
+    inicio = time.perf_counter()
+    try:
+        classificacao = disputar(args.resultados, torneio, args.processos, mostrar=not args.json)
+    except ValueError as erro:
+        parser.error(str(erro))
+    duracao = time.perf_counter() - inicio
+
+    tabela = classificacao.tabela()
+    if args.json:
+        print(json.dumps({"torneio": classificacao.torneio._asdict(), "segundos": duracao,
+                          "classificacao": tabela}, indent=2, ensure_ascii=False))
+        return
+    print(f"{classificacao.estatisticas.partidas} partidas ({duracao:.1f}s)")
+    for posicao, linha in enumerate(tabela, 1):
+        print(f"{posicao:3}. {linha['estrategia']}: Elo {linha['elo']:.0f}, Glicko {linha['glicko']:.0f} "
+              f"± {2 * linha['desvio']:.0f}, pontuação {linha['pontuacao']:g}/{linha['partidas']}, "
+              f"vitórias {linha.get('taxa_vitoria', 0):.1%}, pontos médios {linha.get('pontos_medios', 0):.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
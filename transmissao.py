@@ -0,0 +1,278 @@
+import asyncio
+import json
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+from jogo import Jogo
+
+# Mensagens do feed de uma mesa (um objeto JSON por linha):
+#   {"tipo": "quadro", "mesa", "seq", "visao"}: estado visível completo, na assinatura e nas ressincronizações
+#   {"tipo": "delta", "mesa", "seq", ...}: só o que mudou desde a mensagem de seq - 1 (ver diferenca)
+#   {"tipo": "encerrada", "mesa"}: a mesa deixou de existir e o feed acabou
+# Quem assiste como espectador não vê nenhuma mão; um jogador pode assinar o
+# feed do próprio assento, que mostra só a mão dele.
+
+PENDENTES_POR_ASSINANTE = 64  # Deltas na fila de um assinante; acima disso ele recebe um quadro novo
+BUFFER_ASSINANTE = 16 * 1024  # Bytes no buffer de envio a partir dos quais a fila do assinante começa a crescer
+CAMPOS = ("estado", "turno", "jogador_atual", "mensagem", "monte", "mortos", "pontos", "vencedor")
+
+
+def visao(jogo: Jogo, assento: Optional[int] = None) -> dict:
+    """Estado visível para uma audiência: a mão de 'assento' (nenhuma para espectadores) e o resto público
+
+    As cartas da mão vão ordenadas pelo código, para que a visão não dependa
+    da ordem em que chegaram.
+    """
+    resultado = {
+        "estado": jogo.estado,
+        "turno": jogo.turno,
+        "jogador_atual": jogo.jogador_atual,
+        "mensagem": jogo.mensagem,
+        "monte": len(jogo.monte.cartas),
+        "mortos": len(jogo.monte.mortos),
+        "descarte": [c.codigo for c in jogo.monte.descarte],
+        "jogadores": [{
+            "nome": jogador.nome,
+            "cartas_na_mao": len(jogador.mao),
+            "mao": sorted(c.codigo for c in jogador.mao) if j == assento else None,
+            "agrupamentos": [[c.codigo for c in g.cartas] for g in jogador.agrupamentos],
+            "pontos_agrupamentos": jogador.pontos_agrupamentos,
+        } for j, jogador in enumerate(jogo.jogadores)],
+        "pontos": None,
+        "vencedor": None,
+    }
+    if jogo.estado == "fim":
+        # O placar completo inclui os pontos das mãos e só é aberto no fim
+        resultado["pontos"] = [j.get_pontos() for j in jogo.jogadores]
+        vencedor = jogo.vencedor()
+        resultado["vencedor"] = jogo.jogadores.index(vencedor) if vencedor else None
+    return resultado
+
+
+def _prefixo_comum(a: List, b: List) -> int:
+    n = min(len(a), len(b))
+    for i in range(n):
+        if a[i] != b[i]:
+            return i
+    return n
+
+
+def diferenca(anterior: dict, atual: dict) -> dict:
+    """Mudanças mínimas entre duas visões da mesma audiência (vazio se nada mudou)
+
+    - "campos": valores simples que mudaram (turno, vez, monte, mensagem...)
+    - "descarte": [k, cartas]: a pilha fica com as k primeiras cartas e recebe as novas no topo
+    - "jogadores": [[j, mudanças]], com "mao": {"-": cartas, "+": cartas} (só se visível),
+      "cartas_na_mao", "pontos_agrupamentos", "agrupamentos": [[i, cartas]] (cada
+      agrupamento novo ou alterado inteiro) e "num_agrupamentos" se algum foi desfeito
+    """
+    mudancas: dict = {}
+    campos = {campo: atual[campo] for campo in CAMPOS if atual[campo] != anterior[campo]}
+    if campos:
+        mudancas["campos"] = campos
+
+    if atual["descarte"] != anterior["descarte"]:
+        k = _prefixo_comum(anterior["descarte"], atual["descarte"])
+        mudancas["descarte"] = [k, atual["descarte"][k:]]
+
+    jogadores = []
+    for j, (antes, depois) in enumerate(zip(anterior["jogadores"], atual["jogadores"])):
+        mudou: dict = {}
+        if depois["mao"] != antes["mao"] and depois["mao"] is not None:
+            saiu, entrou = set(antes["mao"] or ()), set(depois["mao"])
+            mudou["mao"] = {"-": sorted(saiu - entrou), "+": sorted(entrou - saiu)}
+        for campo in ("nome", "cartas_na_mao", "pontos_agrupamentos"):
+            if depois[campo] != antes[campo]:
+                mudou[campo] = depois[campo]
+        grupos_antes, grupos_depois = antes["agrupamentos"], depois["agrupamentos"]
+        alterados = [[i, cartas] for i, cartas in enumerate(grupos_depois)
+                     if i >= len(grupos_antes) or grupos_antes[i] != cartas]
+        if alterados:
+            mudou["agrupamentos"] = alterados
+        if len(grupos_depois) < len(grupos_antes):
+            mudou["num_agrupamentos"] = len(grupos_depois)
+        if mudou:
+            jogadores.append([j, mudou])
+    if jogadores:
+        mudancas["jogadores"] = jogadores
+    return mudancas
+
+
+def aplicar_diferenca(visao_atual: dict, mudancas: dict) -> None:
+    """Atualiza uma visão com uma diferença (o que um cliente do feed faz a cada delta)"""
+    visao_atual.update(mudancas.get("campos", {}))
+    if "descarte" in mudancas:
+        k, novas = mudancas["descarte"]
+        visao_atual["descarte"] = visao_atual["descarte"][:k] + novas
+    for j, mudou in mudancas.get("jogadores", ()):
+        jogador = visao_atual["jogadores"][j]
+        if "mao" in mudou:
+            saiu = set(mudou["mao"]["-"])
+            jogador["mao"] = sorted([c for c in jogador["mao"] or () if c not in saiu] + mudou["mao"]["+"])
+        for campo in ("nome", "cartas_na_mao", "pontos_agrupamentos"):
+            if campo in mudou:
+                jogador[campo] = mudou[campo]
+        if "num_agrupamentos" in mudou:
+            del jogador["agrupamentos"][mudou["num_agrupamentos"]:]
+        for i, cartas in mudou.get("agrupamentos", ()):
+            if i < len(jogador["agrupamentos"]):
+                jogador["agrupamentos"][i] = cartas
+            else:
+                jogador["agrupamentos"].append(cartas)
+
+
+def _codificar(mensagem: dict) -> bytes:
+    return json.dumps(mensagem, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class Assinante:
+    """Um destino do feed, com fila limitada e ressincronização quando fica para trás
+
+    As mensagens são bytes já codificados e compartilhados entre todos os
+    assinantes da mesma audiência. Enquanto o buffer de envio do socket tem
+    espaço, cada mensagem é escrita direto nele; só quando ele enche as
+    mensagens vão para a fila, esvaziada por uma tarefa própria. Se a fila
+    enche (cliente lento) ela é descartada, e o próximo envio é um quadro
+    completo do estado atual, a partir do qual os deltas seguintes voltam a
+    valer.
+    """
+    def __init__(self, writer: asyncio.StreamWriter, limite: int = PENDENTES_POR_ASSINANTE):
+        self.writer = writer
+        self.limite = limite
+        writer.transport.set_write_buffer_limits(high=BUFFER_ASSINANTE)
+        self.pendentes: Deque[bytes] = deque()
+        self.atrasado = True  # Começa precisando de um quadro
+        self.ressincronizacoes = 0
+        self.audiencia: Optional['_Audiencia'] = None
+        self._final: Optional[bytes] = None
+        self._evento = asyncio.Event()
+        self._tarefa: Optional[asyncio.Task] = None
+
+    def publicar(self, mensagem: bytes) -> None:
+        if not self.atrasado and not self.pendentes and self._final is None and \
+                self.writer.transport.get_write_buffer_size() < BUFFER_ASSINANTE:
+            # Caso comum: o cliente acompanha, e a mensagem vai sem acordar a tarefa
+            if not self.writer.is_closing():
+                self.writer.write(mensagem)
+            return
+        if not self.atrasado:
+            if len(self.pendentes) >= self.limite:
+                self.pendentes.clear()
+                self.atrasado = True
+                self.ressincronizacoes += 1
+            else:
+                self.pendentes.append(mensagem)
+        self._evento.set()
+
+    async def _escrever(self) -> None:
+        try:
+            while True:
+                await self._evento.wait()
+                self._evento.clear()
+                if self.atrasado and self.audiencia is not None:
+                    self.atrasado = False
+                    self.pendentes.clear()
+                    self.writer.write(self.audiencia.quadro())
+                while self.pendentes:
+                    self.writer.write(self.pendentes.popleft())
+                if self._final is not None:
+                    self.writer.write(self._final)
+                    await self.writer.drain()
+                    return
+                await self.writer.drain()
+        except ConnectionError:
+            pass
+
+    def iniciar(self) -> None:
+        self._tarefa = asyncio.create_task(self._escrever())
+        self._evento.set()
+
+    def encerrar(self, mensagem: bytes) -> None:
+        """Envia o que está na fila e uma última mensagem, e termina"""
+        self._final = mensagem
+        self._evento.set()
+
+    def parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            self._tarefa = None
+
+
+class _Audiencia:
+    """Quem vê a mesa do mesmo jeito: a última visão, o número de sequência e os assinantes"""
+    def __init__(self, mesa: str, jogo: Jogo, assento: Optional[int]):
+        self.mesa = mesa
+        self.jogo = jogo
+        self.assento = assento
+        self.visao = visao(jogo, assento)
+        self.seq = 0
+        self.assinantes: Set[Assinante] = set()
+        self._quadro: Optional[bytes] = None  # Quadro codificado do seq atual, compartilhado nas ressincronizações
+
+    def quadro(self) -> bytes:
+        if self._quadro is None:
+            self._quadro = _codificar({"tipo": "quadro", "mesa": self.mesa, "seq": self.seq, "visao": self.visao})
+        return self._quadro
+
+    def publicar(self) -> int:
+        """Calcula a diferença desde a última publicação e a envia a todos; retorna os bytes enviados a cada um"""
+        nova = visao(self.jogo, self.assento)
+        mudancas = diferenca(self.visao, nova)
+        if not mudancas:
+            return 0
+        self.visao = nova
+        self.seq += 1
+        self._quadro = None
+        mensagem = _codificar({"tipo": "delta", "mesa": self.mesa, "seq": self.seq, **mudancas})
+        for assinante in self.assinantes:
+            assinante.publicar(mensagem)
+        return len(mensagem)
+
+
+class Transmissao:
+    """Feed de uma mesa para espectadores e jogadores, com uma audiência por visão distinta
+
+    Depois de cada mudança na mesa, publicar() calcula uma diferença por
+    audiência que tem assinantes, codifica cada uma uma única vez e entrega
+    os mesmos bytes a todos os assinantes daquela audiência.
+    """
+    def __init__(self, mesa: str, jogo: Jogo):
+        self.mesa = mesa
+        self.jogo = jogo
+        self.audiencias: Dict[Optional[int], _Audiencia] = {}
+
+    def assinar(self, assinante: Assinante, assento: Optional[int] = None) -> None:
+        """Passa a enviar o feed de 'assento' (None: espectador) ao assinante, começando por um quadro"""
+        self.cancelar(assinante)
+        audiencia = self.audiencias.get(assento)
+        if audiencia is None:
+            audiencia = self.audiencias[assento] = _Audiencia(self.mesa, self.jogo, assento)
+        audiencia.assinantes.add(assinante)
+        assinante.audiencia = audiencia
+        assinante.atrasado = True
+        assinante.iniciar()
+
+    def cancelar(self, assinante: Assinante) -> None:
+        audiencia = assinante.audiencia
+        if audiencia is None:
+            return
+        audiencia.assinantes.discard(assinante)
+        if not audiencia.assinantes:
+            del self.audiencias[audiencia.assento]
+        assinante.audiencia = None
+        assinante.parar()
+
+    def publicar(self) -> None:
+        for audiencia in list(self.audiencias.values()):
+            audiencia.publicar()
+
+    def encerrar(self) -> None:
+        """Avisa todos os assinantes de que a mesa acabou e os desliga do feed"""
+        mensagem = _codificar({"tipo": "encerrada", "mesa": self.mesa})
+        for audiencia in self.audiencias.values():
+            for assinante in audiencia.assinantes:
+                assinante.audiencia = None
+                assinante.encerrar(mensagem)
+        self.audiencias.clear()
+
+    def assinantes(self) -> int:
+        return sum(len(a.assinantes) for a in self.audiencias.values())